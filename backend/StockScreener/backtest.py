@@ -0,0 +1,187 @@
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from StockScreener.engine import Indicators, all_of, breakout_components, shift
+from StockScreener.rolling import store_panel
+from StockScreener.store import BACKFILL_PERIOD, default_store, universe_symbols
+
+# Backtest of the breakout rules over the stored daily history. Each rule combination is
+# evaluated once over the whole (dates, symbols) panel, so every date is a signal date in
+# the same vectorized pass; forward returns, hit rate and drawdowns then come from the
+# signal mask with array shifts. Parameter grids are spread over worker processes, each
+# holding the panel once and sharing memoized indicators across the combinations it runs.
+BACKTEST_YEARS = int(os.getenv("BACKTEST_YEARS", "5"))
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+# Holding periods (trading days) forward returns are measured over; entry at the signal close
+HORIZONS = (5, 10, 20)
+
+DEFAULT_GRID = {
+    "sma_windows": [(20, 50), (50, 200), (20, 50, 200)],
+    "range_lookback": [2, 4, 6],
+}
+
+
+def load_history(symbols, years=None, store=None, backfill=False):
+    # The symbols' aligned daily panel over the last `years` years of the store. The store
+    # normally holds only PRICE_STORE_BACKFILL of history; with backfill, shorter symbols are
+    # re-downloaded first, otherwise a shorter history is used with a warning.
+    store = store or default_store()
+    years = years or BACKTEST_YEARS
+    ends = [store.last_date(symbol) for symbol in symbols]
+    ends = [end for end in ends if end is not None]
+    end = max(ends) if ends else pd.Timestamp.now().normalize()
+    start = end - pd.DateOffset(years=years)
+    if backfill:
+        store.extend(symbols, start)
+    elif not ends:
+        return store_panel(store, symbols, rows=0)
+    short = [symbol for symbol in symbols
+             if store.first_date(symbol) is not None and store.first_date(symbol) > start + pd.Timedelta(days=7)]
+    if short:
+        print(f"Warning: {len(short)} of {len(symbols)} symbols have less than {years} years of stored history "
+              f"(the store backfills {BACKFILL_PERIOD}); run with --backfill to download the rest", file=sys.stderr)
+    return store_panel(store, symbols, start=np.datetime64(start, 'ns'))
+
+
+def expand_grid(grid):
+    # {"sma_windows": [...], "range_lookback": [...]} -> [{"sma_windows": .., "range_lookback": ..}, ...]
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def ablations(params=None):
+    # The full rule set plus each variant with one component left out, e.g. to see what
+    # the volume filter actually contributes
+    components = breakout_components(**(params or {}))
+    variants = [("all", all_of(*components))]
+    for i, component in enumerate(components):
+        variants.append((f"without {component.name}", all_of(*(components[:i] + components[i + 1:]))))
+    return variants
+
+
+def forward_returns(close, horizon):
+    # close[t + horizon] / close[t] - 1, NaN where the horizon runs past the data
+    out = np.full_like(close, np.nan)
+    if horizon < len(close):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    return out
+
+
+def daily_returns(close):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return close / shift(close) - 1
+
+
+def adverse_excursion(close, low, horizon):
+    # Worst low over the next `horizon` bars relative to the entry close (<= 0 when it dipped)
+    worst = np.full_like(low, np.nan)
+    for k in range(1, min(horizon, len(low) - 1) + 1):
+        worst[:-k] = np.fmin(worst[:-k], low[k:])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = worst / close - 1
+    out[len(close) - horizon:] = np.nan
+    return out
+
+
+def portfolio_drawdown(signals, daily, horizon):
+    # Max drawdown of an equal-weight book that holds every signal for `horizon` bars
+    entered = np.vstack([np.zeros((1, signals.shape[1])), np.cumsum(signals, axis=0)])
+    # Positions opened at t - horizon .. t - 1 earn day t's return
+    held = entered[:-1] - np.vstack([np.zeros((horizon, signals.shape[1])), entered[:-horizon - 1]])[:len(signals)]
+    held = np.where(np.isnan(daily), 0, held)
+    weight = held.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        book = np.where(weight > 0, (held * np.nan_to_num(daily)).sum(axis=1) / weight, 0.0)
+    equity = np.cumprod(1 + book)
+    return float((equity / np.maximum.accumulate(equity) - 1).min()) if len(equity) else 0.0
+
+
+def rule_stats(mask, indicators, horizons=HORIZONS):
+    # Outcome arrays are memoized on the Indicators, so every rule in a sweep shares them
+    close = indicators['Close']
+    signals = mask & ~np.isnan(close)
+    daily = indicators._memo(('daily_return',), lambda: daily_returns(close))
+    stats = {"signals": int(signals.sum()), "symbols": int(signals.any(axis=0).sum())}
+    for horizon in horizons:
+        returns = indicators._memo(('forward', horizon), lambda horizon=horizon: forward_returns(close, horizon))[signals]
+        resolved = returns[~np.isnan(returns)]
+        excursion = indicators._memo(('excursion', horizon),
+                                     lambda horizon=horizon: adverse_excursion(close, indicators['Low'], horizon))[signals]
+        excursion = excursion[~np.isnan(excursion)]
+        stats[f"{horizon}d"] = {
+            "trades": int(len(resolved)),
+            "mean_return": float(resolved.mean()) if len(resolved) else None,
+            "median_return": float(np.median(resolved)) if len(resolved) else None,
+            "hit_rate": float((resolved > 0).mean()) if len(resolved) else None,
+            "mean_adverse_excursion": float(excursion.mean()) if len(excursion) else None,
+            "max_drawdown": portfolio_drawdown(signals, daily, horizon),
+        }
+    return stats
+
+
+def baseline_stats(panel, horizons=HORIZONS):
+    # Every symbol-day as a "signal": what the rules have to beat
+    return rule_stats(~np.isnan(panel['Close']), Indicators(panel), horizons)
+
+
+def run_combination(indicators, params, horizons=HORIZONS, ablate=False):
+    variants = ablations(params) if ablate else [("all", all_of(*breakout_components(**params)))]
+    return [{"params": params, "rule": name, **rule_stats(rule(indicators), indicators, horizons)}
+            for name, rule in variants]
+
+
+_worker_indicators = None
+
+
+def _init_worker(panel):
+    global _worker_indicators
+    _worker_indicators = Indicators(panel)
+
+
+def _run_in_worker(params, horizons, ablate):
+    return run_combination(_worker_indicators, params, horizons, ablate)
+
+
+def backtest(panel, grid=None, horizons=HORIZONS, ablate=False, workers=None):
+    # [{"params", "rule", "signals", "symbols", "<h>d": {...}}, ...] for every grid point
+    # (and, with ablate, every leave-one-out variant of it)
+    combinations = expand_grid(grid if grid is not None else DEFAULT_GRID) or [{}]
+    workers = max(1, min(workers or BACKTEST_WORKERS, len(combinations)))
+    if workers == 1:
+        indicators = Indicators(panel)
+        return [row for params in combinations for row in run_combination(indicators, params, horizons, ablate)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(panel,)) as pool:
+        futures = [pool.submit(_run_in_worker, params, horizons, ablate) for params in combinations]
+        return [row for future in futures for row in future.result()]
+
+
+if __name__ == "__main__":
+    # python -m StockScreener.backtest [universe ...] [--years N] [--backfill] [--ablate] [--json]
+    import json
+    import time
+
+    from StockScreener.store import UNIVERSES
+
+    args = sys.argv[1:]
+    years = int(args[args.index("--years") + 1]) if "--years" in args else None
+    names = [arg for arg in args if not arg.startswith('--') and arg in UNIVERSES] or list(UNIVERSES)
+    symbols = list(dict.fromkeys(symbol for name in names for symbol in universe_symbols(name)))
+    panel = load_history(symbols, years=years, backfill="--backfill" in args)
+    started = time.perf_counter()
+    rows = backtest(panel, ablate="--ablate" in args)
+    elapsed = time.perf_counter() - started
+    if "--json" in args:
+        print(json.dumps({"baseline": baseline_stats(panel), "results": rows, "seconds": elapsed}, indent=2, default=list))
+    else:
+        print(f"{panel.shape[1]} symbols x {panel.shape[0]} days, {len(rows)} combinations in {elapsed:.2f}s")
+        for row in [{"params": "baseline", "rule": "every day", **baseline_stats(panel)}] + rows:
+            stats = row["20d"]
+            print(f"{str(row['params']):>50} {row['rule']:>36}: {row['signals']:6d} signals  "
+                  f"hit {stats['hit_rate'] or 0:.1%}  mean {stats['mean_return'] or 0:+.2%}  "
+                  f"MAE {stats['mean_adverse_excursion'] or 0:+.2%}  maxDD {stats['max_drawdown']:+.1%}")
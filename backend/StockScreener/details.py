@@ -0,0 +1,268 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+from StockScreener.fundamentals import convert_series, default_fundamentals
+from StockScreener.llmcache import ANALYSIS_FAILED, StubAnalyst, cached_analysis, default_analysis_cache, fingerprint
+from StockScreener.screener import (
+    LLM_MODEL, STOCK_AGENT_PROMPT, CompanyNews, analyze_financial_data, plotShareholding, scrapper, stock_node,
+    stock_node_stream,
+)
+from StockScreener.symbols import default_registry
+
+# Per-stage timeouts (seconds). A stage that times out or fails is left out of the response
+# (listed under "partial") instead of failing the whole request; only the scrape is required.
+STAGE_TIMEOUTS = {
+    "scrape": float(os.getenv("DETAILS_TIMEOUT_SCRAPE", "15")),
+    "news": float(os.getenv("DETAILS_TIMEOUT_NEWS", "10")),
+    "analysis": float(os.getenv("DETAILS_TIMEOUT_ANALYSIS", "90")),
+    "shareholding_chart": float(os.getenv("DETAILS_TIMEOUT_CHART", "10")),
+}
+
+ANALYSIS_UNAVAILABLE = ANALYSIS_FAILED
+
+# Changing the agent's system prompt invalidates cached reports
+PROMPT_VERSION = hashlib.sha1(STOCK_AGENT_PROMPT.encode('utf-8')).hexdigest()[:12]
+
+# STOCK_ANALYST=stub swaps the Groq agent for a deterministic local stand-in
+if os.getenv("STOCK_ANALYST") == "stub":
+    _stub = StubAnalyst()
+    analyst, analyst_stream, analyst_model = _stub, _stub.stream, "stub"
+else:
+    analyst, analyst_stream, analyst_model = stock_node, stock_node_stream, LLM_MODEL
+
+
+def cached_stock_node(fundainfo, shareholdnres, news):
+    return cached_analysis(default_analysis_cache(), analyst_model, analyst, fundainfo, shareholdnres, news, PROMPT_VERSION)
+
+
+def fundamentals_for(symbol):
+    # Fresh row of the fundamentals snapshot if there is one; otherwise scrape and write it through.
+    # Shareholding series come back converted to floats either way.
+    snapshot = default_fundamentals()
+    local = snapshot.get(symbol)
+    if local is not None:
+        return local
+    fundainfo, shareholdnres = scrapper(symbol)
+    shareholdnres = convert_series(shareholdnres)
+    snapshot.put(symbol, fundainfo, shareholdnres)
+    try:
+        snapshot.save()
+    except OSError as e:
+        print(f"Could not save fundamentals snapshot: {e}")
+    return fundainfo, shareholdnres
+
+
+def company_name_for(symbol):
+    # Name from the symbol registry, so news can start without waiting for the scrape
+    return default_registry().company_name(symbol)
+
+
+class StageTimings:
+
+    def __init__(self):
+        self.durations = {}
+        self.failed = {}
+
+    async def run(self, name, fn, *args):
+        # Run a blocking stage on a worker thread with its timeout. On timeout the thread
+        # can't be interrupted; it finishes in the background and its result is dropped.
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args), STAGE_TIMEOUTS.get(name))
+        except asyncio.TimeoutError:
+            self.failed[name] = "timeout"
+            raise
+        except Exception as e:
+            self.failed[name] = str(e) or type(e).__name__
+            raise
+        finally:
+            self.durations[name] = (time.perf_counter() - start) * 1000
+
+    def server_timing(self):
+        return ", ".join(
+            f'{name};dur={duration:.1f}' + (';desc="failed"' if name in self.failed else '')
+            for name, duration in self.durations.items()
+        )
+
+
+def _shareholding_chart_json(shareholdnres):
+    chart = plotShareholding(shareholdnres)
+    return chart.to_json() if chart is not None else None
+
+
+async def stock_details(symbol, timings=None):
+    # Dependency graph:
+    #   scrape ─┬─> financial_analysis, shareholding_chart
+    #           └─> analysis <─ news
+    #   news needs only the company name, so it starts alongside the scrape when the
+    #   symbol is in a known universe
+    timings = timings or StageTimings()
+
+    async def news_for(name):
+        try:
+            return await timings.run("news", CompanyNews, name)
+        except Exception as e:
+            print(f"News unavailable for {symbol}: {e!r}")
+            return []
+
+    known_name = company_name_for(symbol)
+    news_task = asyncio.ensure_future(news_for(known_name)) if known_name else None
+
+    try:
+        fundainfo, shareholdnres = await timings.run("scrape", fundamentals_for, symbol)
+    except BaseException:
+        if news_task is not None:
+            news_task.cancel()
+        raise
+
+    if news_task is None:
+        news_task = asyncio.ensure_future(news_for(fundainfo['Company Name']))
+
+    async def chart():
+        try:
+            return await timings.run("shareholding_chart", _shareholding_chart_json, shareholdnres)
+        except Exception as e:
+            print(f"Shareholding chart unavailable for {symbol}: {e!r}")
+            return None
+
+    async def analysis():
+        news = await news_task
+        try:
+            return await timings.run("analysis", cached_stock_node, fundainfo, shareholdnres, news)
+        except Exception as e:
+            print(f"Analysis unavailable for {symbol}: {e!r}")
+            return ANALYSIS_UNAVAILABLE
+
+    chart_task = asyncio.ensure_future(chart())
+    analysis_task = asyncio.ensure_future(analysis())
+    financial_analysis = analyze_financial_data(shareholdnres)
+    news, shareholding_chart_json, ai_analysis = await asyncio.gather(news_task, chart_task, analysis_task)
+
+    return {
+        "fundamentals": fundainfo,
+        "shareholding": shareholdnres,
+        "news": news,
+        "analysis": ai_analysis,
+        "financial_analysis": financial_analysis,
+        "shareholding_chart": shareholding_chart_json,
+        "partial": sorted(timings.failed),
+    }
+
+
+async def iterate_in_thread(gen_fn, *args):
+    # Drive a blocking generator on a worker thread and hand its items to the event loop
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in gen_fn(*args):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+
+    loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Consumer stopped early (timeout, client gone): let the producer wind down
+        stop.set()
+
+
+def encode_section(section, payload, sse=False):
+    body = json.dumps({"section": section, **payload})
+    if sse:
+        return f"event: {section}\ndata: {body}\n\n".encode('utf-8')
+    return body.encode('utf-8') + b'\n'
+
+
+async def stream_stock_details(symbol, sse=False, timings=None):
+    # Progressive variant of stock_details: sections go out as soon as they're ready, in the
+    # order fundamentals, shareholding, financial_analysis, shareholding_chart, news, analysis.
+    # The analysis is streamed as {"delta": ...} pieces followed by {"done": true, "data": ...}.
+    timings = timings or StageTimings()
+
+    async def news_for(name):
+        try:
+            return await timings.run("news", CompanyNews, name)
+        except Exception as e:
+            print(f"News unavailable for {symbol}: {e!r}")
+            return []
+
+    known_name = company_name_for(symbol)
+    news_task = asyncio.ensure_future(news_for(known_name)) if known_name else None
+
+    try:
+        try:
+            fundainfo, shareholdnres = await timings.run("scrape", fundamentals_for, symbol)
+        except Exception as e:
+            yield encode_section("error", {"stage": "scrape", "detail": str(e)}, sse)
+            return
+
+        if news_task is None:
+            news_task = asyncio.ensure_future(news_for(fundainfo['Company Name']))
+
+        yield encode_section("fundamentals", {"data": fundainfo}, sse)
+        yield encode_section("shareholding", {"data": shareholdnres}, sse)
+        yield encode_section("financial_analysis", {"data": analyze_financial_data(shareholdnres)}, sse)
+
+        try:
+            chart_json = await timings.run("shareholding_chart", _shareholding_chart_json, shareholdnres)
+        except Exception as e:
+            print(f"Shareholding chart unavailable for {symbol}: {e!r}")
+            chart_json = None
+        yield encode_section("shareholding_chart", {"data": chart_json}, sse)
+
+        news = await news_task
+        yield encode_section("news", {"data": news}, sse)
+
+        start = time.perf_counter()
+        cache = default_analysis_cache()
+        key = fingerprint(fundainfo, shareholdnres, news, analyst_model, PROMPT_VERSION)
+        report = await asyncio.to_thread(cache.lookup, key, analyst_model, analyst, (fundainfo, shareholdnres, news))
+        if report is not None:
+            yield encode_section("analysis", {"delta": report}, sse)
+            yield encode_section("analysis", {"done": True, "data": report, "cached": True}, sse)
+        else:
+            deadline = start + STAGE_TIMEOUTS["analysis"]
+            report = ""
+            deltas = iterate_in_thread(analyst_stream, fundainfo, shareholdnres, news)
+            try:
+                while True:
+                    try:
+                        delta = await asyncio.wait_for(deltas.__anext__(), max(deadline - time.perf_counter(), 0))
+                    except StopAsyncIteration:
+                        break
+                    report += delta
+                    yield encode_section("analysis", {"delta": delta}, sse)
+            except asyncio.TimeoutError:
+                timings.failed["analysis"] = "timeout"
+            except Exception as e:
+                print(f"Error during LLM call: {e}")
+                timings.failed["analysis"] = str(e) or type(e).__name__
+            finally:
+                await deltas.aclose()
+            if report and "analysis" not in timings.failed:
+                await asyncio.to_thread(cache.put, key, analyst_model, report)
+            report = report or ANALYSIS_UNAVAILABLE
+            yield encode_section("analysis", {"done": True, "data": report, "cached": False}, sse)
+        timings.durations["analysis"] = (time.perf_counter() - start) * 1000
+        yield encode_section("complete", {"partial": sorted(timings.failed), "timings": timings.durations}, sse)
+    finally:
+        if news_task is not None and not news_task.done():
+            news_task.cancel()
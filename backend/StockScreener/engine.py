@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+
+from StockScreener.fetch import OHLCV_COLUMNS
+
+# Whole-universe screening over a dates x symbols array per field.
+# Indicators are computed once for every symbol along axis 0; rules are composable
+# predicates returning a (dates, symbols) boolean mask, so the same rule set serves the
+# live scan (last row) and any replay over history (every row).
+
+
+class Panel:
+
+    def __init__(self, dates, symbols, fields):
+        self.dates = dates
+        self.symbols = symbols
+        self.fields = fields
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.symbols)
+
+    @classmethod
+    def from_frames(cls, frames, fields=OHLCV_COLUMNS, dtype=np.float64, bars=None):
+        # Align per-symbol frames on the union of their dates; missing bars become NaN
+        symbols = [symbol for symbol, df in frames.items() if df is not None and not df.empty]
+        indexes = [_date_values(frames[symbol].index) for symbol in symbols]
+        dates = np.unique(np.concatenate(indexes)) if indexes else np.empty(0, dtype='datetime64[ns]')
+        if bars:
+            dates = dates[-bars:]
+
+        fields = list(fields)
+        arrays = {field: np.full((len(dates), len(symbols)), np.nan, dtype=dtype) for field in fields}
+        for j, (symbol, index) in enumerate(zip(symbols, indexes)):
+            df = frames[symbol]
+            # Skip the (slow) column re-selection when the frame is already in field order
+            values = (df if list(df.columns) == fields else df[fields]).to_numpy(dtype=dtype)
+            if len(index) == len(dates) and (index == dates).all():
+                rows = slice(None)
+            else:
+                rows = np.searchsorted(dates, index)
+                keep = rows < len(dates)
+                keep[keep] = dates[rows[keep]] == index[keep]
+                rows, values = rows[keep], values[keep]
+            for k, field in enumerate(fields):
+                arrays[field][rows, j] = values[:, k]
+        return cls(dates, symbols, arrays)
+
+
+def _date_values(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    values = index.values.astype('datetime64[ns]')
+    # Daily bars from the store are already at midnight; only normalize when needed
+    if (values != values.astype('datetime64[D]')).any():
+        values = index.normalize().values.astype('datetime64[ns]')
+    return values
+
+
+def shift(x, periods=1):
+    out = np.full_like(x, np.nan)
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    return out
+
+
+def rolling_mean(x, window):
+    # Same semantics as ta's sma_indicator (min_periods=window), for every column at once
+    # (the running sums are float64 even for a float32 panel, so long sums don't lose cents)
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0, dtype=np.float64)
+    ccount = np.cumsum(valid, axis=0)
+    csum = np.vstack([np.zeros((1, x.shape[1])), csum])
+    ccount = np.vstack([np.zeros((1, x.shape[1]), dtype=ccount.dtype), ccount])
+    total = csum[window:] - csum[:-window]
+    count = ccount[window:] - ccount[:-window]
+    out = np.full(x.shape, np.nan, dtype=x.dtype)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out[window - 1:] = np.where(count == window, total / window, np.nan)
+    return out
+
+
+def ewm_mean(x, span):
+    # Equivalent of Series.ewm(span=span, adjust=False, ignore_na=True).mean(); one vector
+    # step per date. NaN rows are dates a symbol has no bar on (panel alignment), so they are
+    # skipped without decay: each column matches the EMA of that symbol's own bars, as the
+    # per-symbol pandas/ta computation it replaced did
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty_like(x)
+    current = np.full(x.shape[1], np.nan, dtype=x.dtype)
+    for t in range(x.shape[0]):
+        row = x[t]
+        current = np.where(np.isnan(current), row, np.where(np.isnan(row), current, alpha * row + (1 - alpha) * current))
+        out[t] = current
+    return out
+
+
+def period_open(dates, opens, freq):
+    # Open of the first bar of the week ('W') or month ('M') each row belongs to
+    periods = pd.DatetimeIndex(dates).to_period(freq).asi8
+    starts = np.r_[True, periods[1:] != periods[:-1]] if len(periods) else np.empty(0, dtype=bool)
+    first_row = np.maximum.accumulate(np.where(starts, np.arange(len(periods)), 0))
+    return opens[first_row]
+
+
+class Indicators:
+    # Lazily computed, memoized indicator arrays over a Panel
+
+    def __init__(self, panel):
+        self.panel = panel
+        self._cache = {}
+
+    def _memo(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def __getitem__(self, field):
+        return self.panel[field]
+
+    def sma(self, window, field='Close'):
+        return self._memo(('sma', field, window), lambda: rolling_mean(self.panel[field], window))
+
+    def ema(self, span, field='Volume'):
+        return self._memo(('ema', field, span), lambda: ewm_mean(self.panel[field], span))
+
+    def shifted(self, field, periods=1):
+        return self._memo(('shift', field, periods), lambda: shift(self.panel[field], periods))
+
+    def range(self):
+        return self._memo(('range',), lambda: np.abs(self.panel['High'] - self.panel['Low']))
+
+    def prev_range(self, periods):
+        return self._memo(('prev_range', periods), lambda: shift(self.range(), periods))
+
+    def week_open(self):
+        return self._memo(('week_open',), lambda: period_open(self.panel.dates, self.panel['Open'], 'W'))
+
+    def month_open(self):
+        return self._memo(('month_open',), lambda: period_open(self.panel.dates, self.panel['Open'], 'M'))
+
+
+class Rule:
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+
+    def __call__(self, ind):
+        with np.errstate(invalid='ignore'):
+            return self.fn(ind)
+
+    def __and__(self, other):
+        return Rule(f"({self.name} & {other.name})", lambda ind: self(ind) & other(ind))
+
+    def __or__(self, other):
+        return Rule(f"({self.name} | {other.name})", lambda ind: self(ind) | other(ind))
+
+    def __invert__(self):
+        return Rule(f"~{self.name}", lambda ind: ~self(ind))
+
+    def __repr__(self):
+        return f"Rule({self.name})"
+
+
+def all_of(*rules):
+    combined = rules[0]
+    for rule in rules[1:]:
+        combined = combined & rule
+    return combined
+
+
+# The BreakoutVolume filter rules (NaN comparisons are False, so short histories never pass)
+
+def volume_above_ema(span=20):
+    return Rule(f"volume_above_ema{span}", lambda ind: ind['Volume'] >= ind.ema(span, 'Volume'))
+
+
+def close_above_sma(window):
+    return Rule(f"close_above_sma{window}", lambda ind: ind['Close'] >= ind.sma(window))
+
+
+def range_expansion(lookback=4):
+    def fn(ind):
+        today = ind.range()
+        mask = np.ones(today.shape, dtype=bool)
+        for k in range(1, lookback + 1):
+            mask &= today > ind.prev_range(k)
+        return mask
+    return Rule(f"range_expansion{lookback}", fn)
+
+
+def close_above_open():
+    return Rule("close_above_open", lambda ind: ind['Close'] > ind['Open'])
+
+
+def close_above_week_open():
+    return Rule("close_above_week_open", lambda ind: ind['Close'] > ind.week_open())
+
+
+def close_above_month_open():
+    return Rule("close_above_month_open", lambda ind: ind['Close'] > ind.month_open())
+
+
+def low_guard(divisor=222):
+    def fn(ind):
+        prev_close = ind.shifted('Close')
+        return ind['Low'] > prev_close - np.abs(prev_close / divisor)
+    return Rule(f"low_guard{divisor}", fn)
+
+
+def breakout_components(sma_windows=(20, 50), volume_span=20, range_lookback=4, low_divisor=222):
+    return [
+        volume_above_ema(volume_span),
+        *[close_above_sma(window) for window in sma_windows],
+        range_expansion(range_lookback),
+        close_above_open(),
+        close_above_week_open(),
+        close_above_month_open(),
+        low_guard(low_divisor),
+    ]
+
+
+def breakout_rules(sma_windows=(20, 50), volume_span=20, range_lookback=4, low_divisor=222):
+    return all_of(*breakout_components(sma_windows, volume_span, range_lookback, low_divisor))
+
+
+BREAKOUT_RULES = breakout_rules()
+
+
+def evaluate(panel, rule=BREAKOUT_RULES):
+    # Full (dates, symbols) mask
+    return rule(Indicators(panel))
+
+
+def screen(panel, rule=BREAKOUT_RULES):
+    # Symbols passing the rule on the latest bar
+    if panel.shape[0] == 0:
+        return []
+    mask = evaluate(panel, rule)[-1]
+    return [symbol for symbol, hit in zip(panel.symbols, mask) if hit]
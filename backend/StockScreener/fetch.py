@@ -0,0 +1,153 @@
+import os
+import time
+
+import pandas as pd
+
+from StockScreener.metrics import fetch_symbol_seconds, timed
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# One multi-symbol download per chunk instead of one request per symbol
+DEFAULT_CHUNK_SIZE = int(os.getenv("FETCH_CHUNK_SIZE", "50"))
+
+
+class PriceSource:
+    # Anything that can return a wide (symbol, field) column frame for a list of symbols.
+    # yfinance is the default; LocalPriceSource stands in for tests and benchmarks.
+
+    def download(self, symbols, period="6mo", interval="1d", start=None):
+        raise NotImplementedError
+
+    def frames(self, symbols, period="6mo", interval="1d", start=None):
+        # Per-symbol frames; sources that already hold per-symbol data override this
+        return split_frame(self.download(symbols, period=period, interval=interval, start=start), symbols)
+
+
+class YFinanceSource(PriceSource):
+
+    def __init__(self, threads=True, timeout=30):
+        self.threads = threads
+        self.timeout = timeout
+
+    def download(self, symbols, period="6mo", interval="1d", start=None):
+        # Imported on first download so store/engine-only processes never load yfinance
+        import yfinance as yf
+
+        return yf.download(
+            list(symbols),
+            period=None if start is not None else period,
+            start=start,
+            interval=interval,
+            group_by='ticker',
+            auto_adjust=True,
+            actions=False,
+            threads=self.threads,
+            timeout=self.timeout,
+            progress=False,
+        )
+
+
+class LocalPriceSource(PriceSource):
+    # Reads <directory>/<symbol>.csv (or .parquet) files with a Date column and OHLCV columns.
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _read(self, symbol):
+        for ext, reader in (('.parquet', pd.read_parquet), ('.csv', pd.read_csv)):
+            path = os.path.join(self.directory, symbol + ext)
+            if os.path.exists(path):
+                df = reader(path)
+                if 'Date' in df.columns:
+                    df = df.set_index(pd.to_datetime(df['Date']))
+                df.index.name = 'Date'
+                return df[[col for col in OHLCV_COLUMNS if col in df.columns]]
+        return None
+
+    def frames(self, symbols, period="6mo", interval="1d", start=None):
+        frames = {}
+        for symbol in symbols:
+            df = self._read(symbol)
+            if df is None or df.empty:
+                continue
+            begin = pd.Timestamp(start) if start is not None else period_start(period, df.index[-1])
+            if begin is not None:
+                df = df[df.index >= begin]
+            frames[symbol] = df
+        return frames
+
+    def download(self, symbols, period="6mo", interval="1d", start=None):
+        frames = self.frames(symbols, period=period, interval=interval, start=start)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+
+def period_start(period, end):
+    # Translate a yfinance period string ("5d", "6mo", "1y", "max") into a start timestamp
+    if not period or period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(end.year, 1, 1, tz=end.tz)
+    for suffix, unit in (("mo", "months"), ("y", "years"), ("d", "days"), ("wk", "weeks")):
+        if period.endswith(suffix):
+            return end - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def split_frame(wide, symbols):
+    # Split a wide (symbol, field) frame back into per-symbol frames.
+    # Column selection on the MultiIndex does not copy the price data; rows are only
+    # filtered when a symbol actually has missing bars (e.g. listed mid-period).
+    frames = {}
+    if wide is None or wide.empty:
+        return frames
+
+    if not isinstance(wide.columns, pd.MultiIndex):
+        # Single-symbol download without a ticker level
+        if len(symbols) == 1:
+            frames[symbols[0]] = wide
+        return frames
+
+    available = set(wide.columns.get_level_values(0))
+    for symbol in symbols:
+        if symbol not in available:
+            continue
+        df = wide[symbol]
+        missing = df['Close'].isna() if 'Close' in df.columns else df.isna().all(axis=1)
+        if missing.all():
+            continue
+        if missing.any():
+            df = df[~missing]
+        frames[symbol] = df
+    return frames
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def fetch_universe(symbols, source=None, period="6mo", interval="1d", chunk_size=None, start=None):
+    # Generator of (chunk_symbols, {symbol: frame}) so callers can report progress per chunk
+    source = source or YFinanceSource()
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    symbols = list(symbols)
+
+    for chunk in chunked(symbols, chunk_size):
+        began = time.perf_counter()
+        try:
+            with timed("fetch"):
+                frames = source.frames(chunk, period=period, interval=interval, start=start)
+        except Exception as e:
+            print(f"Error downloading chunk starting at {chunk[0]}: {e}")
+            frames = {}
+        fetch_symbol_seconds.observe((time.perf_counter() - began) / len(chunk), source=type(source).__name__)
+        yield chunk, frames
+
+
+def fetch_prices(symbols, source=None, period="6mo", interval="1d", chunk_size=None, start=None):
+    frames = {}
+    for _, chunk_frames in fetch_universe(symbols, source, period, interval, chunk_size, start):
+        frames.update(chunk_frames)
+    return frames
@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from StockScreener.store import UNIVERSES, universe_symbols
+
+# Snapshot of the scraped screener.in fundamentals for the whole universe, kept in one
+# columnar .npz: a row per symbol, numeric columns (PE, ROE, ...) as float64 for filtering,
+# text and per-quarter series packed as flat arrays plus offsets. Refreshed by a batch job
+# (python -m StockScreener.fundamentals) that only re-scrapes stale rows; the rate limit
+# comes from the shared scrape client.
+FUNDAMENTALS_PATH = os.getenv("FUNDAMENTALS_PATH", "StockScreener/data/fundamentals.npz")
+FUNDAMENTALS_MAX_AGE = float(os.getenv("FUNDAMENTALS_MAX_AGE", str(24 * 3600)))
+FUNDAMENTALS_WORKERS = int(os.getenv("FUNDAMENTALS_WORKERS", "4"))
+# Write the snapshot to disk every this many scraped symbols during a refresh
+FUNDAMENTALS_SAVE_EVERY = int(os.getenv("FUNDAMENTALS_SAVE_EVERY", "50"))
+
+TEXT_FIELDS = ("Company Name", "Current Price", "Market Cap", "About", "PE", "ROE", "ROCE")
+NUMERIC_FIELDS = {"price": "Current Price", "market_cap": "Market Cap", "pe": "PE", "roe": "ROE", "roce": "ROCE"}
+SERIES_FIELDS = ("Quarter", "Yearly", "Promoters", "DII", "FII", "Public")
+
+
+def parse_number(text):
+    # '₹ 3,512' / '12,34,567' / '18.5' / '31.2 %' -> float; NaN when missing or not a number
+    if text is None:
+        return np.nan
+    cleaned = str(text).replace('₹', '').replace(',', '').replace('%', '').replace('Cr.', '').strip()
+    try:
+        return float(cleaned)
+    except ValueError:
+        return np.nan
+
+
+def convert_series(shareholdnres):
+    # convert_to_float per series; a series it can't parse (e.g. blank cells) is left empty
+    from StockScreener.screener import convert_to_float
+
+    converted = {}
+    for key in SERIES_FIELDS:
+        try:
+            converted[key] = convert_to_float(shareholdnres.get(key, []))
+        except ValueError:
+            converted[key] = []
+    return converted
+
+
+def scrape_record(symbol):
+    from StockScreener.screener import scrapper
+
+    fundainfo, shareholdnres = scrapper(symbol)
+    return fundainfo, convert_series(shareholdnres)
+
+
+def _pack_text(values):
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_text(blob, offsets):
+    data = blob.tobytes()
+    return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def _pack_series(values):
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    flat = np.fromiter((x for value in values for x in value), dtype=np.float64, count=int(offsets[-1]))
+    return flat, offsets
+
+
+class FundamentalsSnapshot:
+
+    def __init__(self, path=None):
+        self.path = path or FUNDAMENTALS_PATH
+        self.records = {}
+        self._lock = threading.Lock()
+        self._frame = None
+        if os.path.exists(self.path):
+            self.load()
+
+    def load(self):
+        with np.load(self.path) as data:
+            symbols = _unpack_text(data['symbol'], data['symbol_offsets'])
+            fetched = data['fetched_at']
+            text = {field: _unpack_text(data[f'text:{field}'], data[f'text_offsets:{field}']) for field in TEXT_FIELDS}
+            series = {field: (data[f'series:{field}'], data[f'series_offsets:{field}']) for field in SERIES_FIELDS}
+        records = {}
+        for i, symbol in enumerate(symbols):
+            fundainfo = {field: text[field][i] for field in TEXT_FIELDS}
+            shareholdnres = {field: values[offsets[i]:offsets[i + 1]].tolist() for field, (values, offsets) in series.items()}
+            records[symbol] = (float(fetched[i]), fundainfo, shareholdnres)
+        with self._lock:
+            self.records = records
+            self._frame = None
+
+    def save(self):
+        with self._lock:
+            items = sorted(self.records.items())
+        columns = {}
+        columns['symbol'], columns['symbol_offsets'] = _pack_text([symbol for symbol, _ in items])
+        columns['fetched_at'] = np.array([fetched for _, (fetched, _, _) in items], dtype=np.float64)
+        for name, field in NUMERIC_FIELDS.items():
+            columns[f'num:{name}'] = np.array([parse_number(f.get(field)) for _, (_, f, _) in items], dtype=np.float64)
+        for field in TEXT_FIELDS:
+            columns[f'text:{field}'], columns[f'text_offsets:{field}'] = _pack_text(
+                [str(f.get(field, "N/A")) for _, (_, f, _) in items])
+        for field in SERIES_FIELDS:
+            columns[f'series:{field}'], columns[f'series_offsets:{field}'] = _pack_series(
+                [s.get(field, []) for _, (_, _, s) in items])
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(tmp, self.path)
+
+    def get(self, symbol, max_age=None):
+        # (fundainfo, shareholdnres) if the symbol was scraped within max_age, else None
+        max_age = FUNDAMENTALS_MAX_AGE if max_age is None else max_age
+        record = self.records.get(symbol)
+        if record is None or time.time() - record[0] > max_age:
+            return None
+        return record[1], record[2]
+
+    def put(self, symbol, fundainfo, shareholdnres, fetched_at=None):
+        with self._lock:
+            self.records[symbol] = (fetched_at or time.time(), fundainfo, shareholdnres)
+            self._frame = None
+
+    def stale(self, symbols, max_age=None):
+        max_age = FUNDAMENTALS_MAX_AGE if max_age is None else max_age
+        now = time.time()
+        return [s for s in symbols if s not in self.records or now - self.records[s][0] > max_age]
+
+    def frame(self):
+        # Numeric columns indexed by symbol, for screening on PE / ROE / ROCE offline
+        with self._lock:
+            if self._frame is None:
+                items = sorted(self.records.items())
+                data = {name: [parse_number(f.get(field)) for _, (_, f, _) in items] for name, field in NUMERIC_FIELDS.items()}
+                data['fetched_at'] = [fetched for _, (fetched, _, _) in items]
+                self._frame = pd.DataFrame(data, index=pd.Index([symbol for symbol, _ in items], name='symbol'))
+            return self._frame
+
+    def stats(self):
+        ages = [time.time() - fetched for fetched, _, _ in self.records.values()]
+        return {
+            "symbols": len(self.records),
+            "stale": sum(age > FUNDAMENTALS_MAX_AGE for age in ages),
+            "oldest_seconds": max(ages) if ages else None,
+            "path": self.path,
+        }
+
+
+def refresh_fundamentals(snapshot, symbols, max_age=None, workers=None, force=False, scrape=scrape_record):
+    # Scrape the stale (or, with force, all) symbols concurrently; returns a summary
+    pending = list(symbols) if force else snapshot.stale(symbols, max_age)
+    summary = {"requested": len(symbols), "scraped": 0, "failed": 0, "skipped": len(symbols) - len(pending)}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or FUNDAMENTALS_WORKERS) as executor:
+        futures = {executor.submit(scrape, symbol): symbol for symbol in pending}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                fundainfo, shareholdnres = future.result()
+            except Exception as e:
+                print(f"Fundamentals refresh failed for {symbol}: {e}")
+                summary["failed"] += 1
+                continue
+            snapshot.put(symbol, fundainfo, shareholdnres)
+            summary["scraped"] += 1
+            if summary["scraped"] % FUNDAMENTALS_SAVE_EVERY == 0:
+                snapshot.save()
+    if summary["scraped"]:
+        snapshot.save()
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+_refresh_lock = threading.Lock()
+
+
+def refresh_universe(names=None, force=False, snapshot=None):
+    # One refresh at a time; returns None if another is already running
+    if not _refresh_lock.acquire(blocking=False):
+        return None
+    try:
+        symbols = list(dict.fromkeys(s for name in names or list(UNIVERSES) for s in universe_symbols(name)))
+        return refresh_fundamentals(snapshot or default_fundamentals(), symbols, force=force)
+    finally:
+        _refresh_lock.release()
+
+
+def refresh_running():
+    return _refresh_lock.locked()
+
+
+_default_snapshot = None
+
+
+def default_fundamentals():
+    global _default_snapshot
+    if _default_snapshot is None:
+        _default_snapshot = FundamentalsSnapshot()
+    return _default_snapshot
+
+
+if __name__ == "__main__":
+    # Scrape stale entries: python -m StockScreener.fundamentals [universe ...] [--force]
+    import sys
+
+    names = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    print(refresh_universe(names or None, force="--force" in sys.argv))
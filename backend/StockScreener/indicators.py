@@ -0,0 +1,152 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+
+from StockScreener.cache import LRUCache
+from StockScreener.engine import ewm_mean, rolling_mean
+from StockScreener.store import default_store
+
+# OHLCV plus the chart's indicators (SMA10/20/50/200, RSI, MACD) as columnar typed arrays,
+# so the frontend can draw interactive charts itself instead of fetching a rendered PNG.
+# Indicators are computed over the whole stored history (so SMA200 is defined from the first
+# returned bar) and cached per (symbol, last bar date); encoded payloads are cached too.
+INDICATOR_BARS = int(os.getenv("INDICATOR_BARS", "250"))
+INDICATOR_MAX_BARS = int(os.getenv("INDICATOR_MAX_BARS", "2000"))
+
+FORMATS = ("json", "arrow")
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+SMA_WINDOWS = (10, 20, 50, 200)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+
+# Computed arrays keyed on (symbol, last bar date); encoded bodies keyed on the request too
+indicator_cache = LRUCache(max_bytes=int(os.getenv("INDICATOR_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+                           sizeof=lambda columns: sum(array.nbytes for array in columns.values()))
+payload_cache = LRUCache(max_bytes=int(os.getenv("INDICATOR_PAYLOAD_CACHE_MAX_BYTES", str(16 * 1024 * 1024))))
+
+
+class IndicatorFormatError(ValueError):
+    pass
+
+
+def rsi(close, period=RSI_PERIOD):
+    # Wilder's RSI: smoothing with alpha = 1/period, i.e. an EMA with span 2*period - 1
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = ewm_mean(gain, 2 * period - 1)
+    avg_loss = ewm_mean(loss, 2 * period - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = 100 - 100 / (1 + avg_gain / avg_loss)
+    out = np.where(avg_loss == 0, 100.0, out)
+    # First value at index period - 1, as in ta (the first diff counts as no change)
+    out[:period - 1] = np.nan
+    return out
+
+
+def compute_indicators(prices):
+    # {column: 1-D array}; prices is a store window (Open/High/Low/Close/Volume, DatetimeIndex)
+    close = prices['Close'].to_numpy(dtype=np.float64).reshape(-1, 1)
+    columns = {
+        "time": prices.index.values.astype('datetime64[ms]').astype(np.int64),
+        "open": prices['Open'].to_numpy(dtype=np.float32),
+        "high": prices['High'].to_numpy(dtype=np.float32),
+        "low": prices['Low'].to_numpy(dtype=np.float32),
+        "close": close[:, 0].astype(np.float32),
+        "volume": np.nan_to_num(prices['Volume'].to_numpy(dtype=np.float64)).astype(np.int64),
+    }
+    for window in SMA_WINDOWS:
+        columns[f"sma{window}"] = rolling_mean(close, window)[:, 0].astype(np.float32)
+    columns["rsi"] = rsi(close)[:, 0].astype(np.float32)
+    macd = ewm_mean(close, MACD_FAST) - ewm_mean(close, MACD_SLOW)
+    # Undefined until the slow EMA has a full window (as in ta), so the signal starts there
+    macd[:MACD_SLOW - 1] = np.nan
+    signal = ewm_mean(macd, MACD_SIGNAL)
+    # ...and the signal (and histogram) once it has MACD_SIGNAL MACD values
+    signal[:MACD_SLOW + MACD_SIGNAL - 2] = np.nan
+    columns["macd"] = macd[:, 0].astype(np.float32)
+    columns["macd_signal"] = signal[:, 0].astype(np.float32)
+    columns["macd_hist"] = (macd - signal)[:, 0].astype(np.float32)
+    return columns
+
+
+def symbol_indicators(symbol, store=None, sync=True):
+    # (last bar date, columns) or None when there are no prices
+    prices = (store or default_store()).window(symbol, sync=sync)
+    if prices.empty:
+        return None
+    bar_date = prices.index[-1].strftime('%Y-%m-%d')
+    key = (symbol, bar_date)
+    columns = indicator_cache.get(key)
+    if columns is None:
+        columns = compute_indicators(prices)
+        indicator_cache.put(key, columns)
+    return bar_date, columns
+
+
+def encode_json(symbol, columns):
+    body = {"symbol": symbol, "length": len(columns["time"]), "columns": {}}
+    for name, array in columns.items():
+        if array.dtype.kind == 'f':
+            # 4 decimal places is plenty for drawing; NaN (warm-up bars) -> null
+            values = np.round(array.astype(np.float64), 4)
+            body["columns"][name] = [None if v != v else v for v in values.tolist()]
+        else:
+            body["columns"][name] = array.tolist()
+    return json.dumps(body, separators=(',', ':')).encode('utf-8')
+
+
+def encode_arrow(symbol, columns, compression=None):
+    # Arrow IPC stream, one record batch; compression here is Arrow's own buffer compression
+    import pyarrow as pa
+
+    table = pa.table({
+        name: pa.array(array, type=pa.timestamp('ms') if name == "time" else None, from_pandas=True)
+        for name, array in columns.items()
+    }).replace_schema_metadata({"symbol": symbol})
+    sink = io.BytesIO()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def indicator_payload(symbol, fmt="json", compression="none", bars=None, store=None):
+    # (body, media_type, content_encoding, etag) or None when there are no prices.
+    # gzip is applied as Content-Encoding; zstd only exists as Arrow buffer compression.
+    if fmt not in FORMATS:
+        raise IndicatorFormatError(f"Unknown format {fmt!r}: {', '.join(FORMATS)}")
+    if compression not in COMPRESSIONS:
+        raise IndicatorFormatError(f"Unknown compression {compression!r}: {', '.join(COMPRESSIONS)}")
+    if compression == "zstd" and fmt != "arrow":
+        raise IndicatorFormatError("zstd compression is only available with format=arrow")
+    bars = max(1, min(bars or INDICATOR_BARS, INDICATOR_MAX_BARS))
+
+    result = symbol_indicators(symbol, store=store)
+    if result is None:
+        return None
+    bar_date, columns = result
+    key = (symbol, bar_date, fmt, compression, bars)
+    etag = '"' + hashlib.sha1("|".join(map(str, key)).encode('utf-8')).hexdigest()[:20] + '"'
+    media_type = "application/vnd.apache.arrow.stream" if fmt == "arrow" else "application/json"
+    encoding = "gzip" if compression == "gzip" else None
+
+    body = payload_cache.get(key)
+    if body is None:
+        window = {name: array[-bars:] for name, array in columns.items()}
+        if fmt == "arrow":
+            try:
+                body = encode_arrow(symbol, window, compression="zstd" if compression == "zstd" else None)
+            except ImportError:
+                raise IndicatorFormatError("format=arrow needs pyarrow installed on the server")
+        else:
+            body = encode_json(symbol, window)
+        if encoding == "gzip":
+            body = gzip.compress(body, compresslevel=6)
+        payload_cache.put(key, body)
+    return body, media_type, encoding, etag
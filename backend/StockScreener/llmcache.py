@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent cache of LLM stock reports keyed on a fingerprint of the normalized prompt
+# inputs plus the model name, so unchanged fundamentals/shareholding/news never hit the LLM twice.
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "StockScreener/data/analysis_cache.sqlite")
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", str(24 * 3600)))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "5000"))
+# Serve an expired report immediately and refresh it in the background
+ANALYSIS_CACHE_SWR = os.getenv("ANALYSIS_CACHE_SWR", "1") == "1"
+
+# stock_node's fallback text; never cached
+ANALYSIS_FAILED = "AI analysis is currently unavailable due to an error."
+
+# News fields that identify an article; volatile ones (e.g. the fetch-relative description) are ignored
+NEWS_KEYS = ('title', 'url', 'published date', 'publisher')
+
+
+def _normalize_news(news):
+    items = []
+    for article in news or []:
+        if isinstance(article, dict):
+            item = {key: article.get(key) for key in NEWS_KEYS if article.get(key) is not None}
+            if isinstance(item.get('publisher'), dict):
+                item['publisher'] = item['publisher'].get('title')
+            items.append(item)
+        else:
+            items.append(str(article))
+    return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+
+
+def fingerprint(fundamentals, shareholding, news, model, prompt_version=""):
+    payload = {
+        "fundamentals": fundamentals,
+        "shareholding": shareholding,
+        "news": _normalize_news(news),
+        "model": model,
+        "prompt": prompt_version,
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+
+    def __init__(self, path=None, ttl=None, max_entries=None):
+        self.path = path or ANALYSIS_CACHE_PATH
+        self.ttl = ANALYSIS_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries or ANALYSIS_CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            " key TEXT PRIMARY KEY, model TEXT, report TEXT, created REAL, accessed REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS analysis_accessed ON analysis (accessed)")
+        self._db.commit()
+
+    def get(self, key):
+        # (report, age_seconds) or None
+        with self._lock:
+            row = self._db.execute("SELECT report, created FROM analysis WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE analysis SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return row[0], time.time() - row[1]
+
+    def put(self, key, model, report):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis (key, model, report, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, model, report, now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        # Expired-and-unused entries first (kept for one extra TTL so SWR has something to serve),
+        # then least recently used beyond max_entries
+        self._db.execute("DELETE FROM analysis WHERE created < ?", (time.time() - 2 * self.ttl,))
+        count = self._db.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM analysis WHERE key IN (SELECT key FROM analysis ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM analysis")
+            self._db.commit()
+
+    def _refresh(self, key, model, analyst, args):
+        try:
+            report = analyst(*args)
+            if report and report != ANALYSIS_FAILED:
+                self.put(key, model, report)
+        except Exception as e:
+            print(f"Background analysis refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def refresh_in_background(self, key, model, analyst, args):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, model, analyst, args), daemon=True).start()
+
+    def lookup(self, key, model, analyst, args, stale_while_revalidate=None):
+        # Cached report if fresh; the stale one (refreshing in the background) under SWR;
+        # otherwise None and the caller runs the analyst itself
+        swr = ANALYSIS_CACHE_SWR if stale_while_revalidate is None else stale_while_revalidate
+        entry = self.get(key)
+        if entry is not None:
+            report, age = entry
+            if age < self.ttl:
+                self.hits += 1
+                return report
+            if swr:
+                self.stale_hits += 1
+                self.refresh_in_background(key, model, analyst, args)
+                return report
+        self.misses += 1
+        return None
+
+    def stats(self):
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": count,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+
+def cached_analysis(cache, model, analyst, fundamentals, shareholding, news, prompt_version="", stale_while_revalidate=None):
+    args = (fundamentals, shareholding, news)
+    key = fingerprint(fundamentals, shareholding, news, model, prompt_version)
+    report = cache.lookup(key, model, analyst, args, stale_while_revalidate)
+    if report is not None:
+        return report
+    report = analyst(*args)
+    if report and report != ANALYSIS_FAILED:
+        cache.put(key, model, report)
+    return report
+
+
+class StubAnalyst:
+    # Deterministic stand-in for stock_node in tests and benchmarks (no network, no API key)
+
+    def __init__(self, report=None, delay=0.0):
+        self.report = report
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, fundamentals, shareholding, news):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.report is not None:
+            return self.report
+        name = fundamentals.get('Company Name', 'N/A') if isinstance(fundamentals, dict) else 'N/A'
+        return f"Thought: stub analysis for {name} ({len(news or [])} news items).\nRecommendation: Hold."
+
+    def stream(self, fundamentals, shareholding, news):
+        report = self(fundamentals, shareholding, news)
+        for start in range(0, len(report), 16):
+            yield report[start:start + 16]
+
+
+_default_cache = None
+
+
+def default_analysis_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AnalysisCache()
+    return _default_cache
@@ -0,0 +1,259 @@
+import bisect
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Process-wide metrics in the Prometheus text exposition format (no client library needed).
+# Counters and histograms are updated on the hot paths; cache hit ratios and pool sizes are
+# read from the existing stats() methods only when /metrics is scraped.
+
+# Seconds; covers a cached lookup (sub-ms) up to a slow LLM report
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+PREFIX = "stockscreener_"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    # Named with the _total suffix so HELP/TYPE and the samples share one metric name
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        if not name.endswith("_total"):
+            raise ValueError(f"counter {name} must end in _total")
+        super().__init__(name, help, labels)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_label_text(self.labels, key)} {_number(value)}" for key, value in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        entry = self._values.get(self._key(labels))
+        return entry[1] if entry else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(entry[0]), entry[1], entry[2])) for key, entry in self._values.items())
+        lines = self.header()
+        names = self.labels + ("le",)
+        for key, (counts, total, value_sum) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(names, key + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_text(names, key + ('+Inf',))} {total}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(value_sum)}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {total}")
+        return lines
+
+
+class GaugeCallback(Metric):
+    # Read at scrape time: `collect()` returns {label values tuple: number}
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def render(self):
+        try:
+            items = sorted(self.collect().items())
+        except Exception as e:
+            print(f"Error collecting {self.name}: {e!r}")
+            items = []
+        return self.header() + [f"{self.name}{_label_text(self.labels, key)} {_number(value)}"
+                                for key, value in items if value is not None]
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = {}
+        self.caches = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, labels=(), collect=None):
+        return self.register(GaugeCallback(name, help, labels, collect))
+
+    def register_cache(self, name, stats):
+        # `stats` returns a dict with hits / misses (and optionally entries, bytes, hit_ratio)
+        self.caches[name] = stats
+
+    def _cache_field(self, field):
+        values = {}
+        for name, stats in list(self.caches.items()):
+            try:
+                result = stats()
+            except Exception as e:
+                print(f"Error reading {name} cache stats: {e!r}")
+                continue
+            if field == "hit_ratio" and field not in result:
+                lookups = result.get("hits", 0) + result.get("misses", 0)
+                values[(name,)] = result.get("hits", 0) / lookups if lookups else 0.0
+            elif isinstance(result.get(field), (int, float)):
+                values[(name,)] = result[field]
+        return values
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "stage_duration_seconds", "Duration of backend stages (fetch, evaluate, scrape, parse, render, llm, news).",
+    labels=("stage",))
+stage_errors = registry.counter("stage_errors_total", "Stages that raised or timed out.", labels=("stage",))
+fetch_symbol_seconds = registry.histogram(
+    "scan_fetch_seconds_per_symbol", "Price fetch latency per symbol (chunk fetch time / chunk size).",
+    labels=("source",), buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+scan_symbols = registry.counter("scan_symbols_total", "Symbols scanned, by outcome.", labels=("outcome",))
+llm_tokens = registry.counter("llm_tokens_total", "LLM tokens reported by the model.", labels=("model", "kind"))
+llm_requests = registry.counter("llm_requests_total", "LLM report generations.", labels=("model", "outcome"))
+http_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", labels=("method", "route", "status"))
+
+
+def process_memory():
+    # Current and peak resident set size in bytes; None where the platform doesn't report it
+    rss = peak = None
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        # (the kernel's high-water mark can trail the current figure by a little)
+        peak = max(peak, rss or 0)
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def _memory_gauge():
+    memory = process_memory()
+    return {("current",): memory["rss_bytes"], ("peak",): memory["peak_rss_bytes"]}
+
+
+registry.gauge("process_resident_memory_bytes", "Resident set size, current and peak since start.",
+               labels=("kind",), collect=_memory_gauge)
+
+for field, help in (("hits", "Cache hits."), ("misses", "Cache misses."), ("entries", "Cached entries."),
+                    ("bytes", "Cached bytes."), ("hit_ratio", "Cache hit ratio since start.")):
+    registry.gauge(f"cache_{field}", help, labels=("cache",), collect=lambda field=field: registry._cache_field(field))
+
+
+@contextmanager
+def timed(stage):
+    # Observes the stage duration; errors are counted and re-raised (a cancelled or
+    # abandoned stage is timed but not counted as an error)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=stage)
+
+
+def record_usage(model, message):
+    # Token counts from a LangChain message's usage_metadata (present on Groq responses)
+    usage = getattr(message, "usage_metadata", None) or {}
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            llm_tokens.inc(usage[kind], model=model, kind=kind.removesuffix("_tokens"))
@@ -1,19 +1,55 @@
-import yfinance as yf
+import hashlib
+import os
+import pandas as pd
 
-from mplchart.chart import Chart
-from mplchart.primitives import Candlesticks, Volume
-from mplchart.indicators import ROC, SMA, EMA, RSI, MACD
-from PIL import Image
-import io 
-import base64
+from email.utils import format_datetime
 
-def chart(ticker):
+from StockScreener.cache import LRUCache
+from StockScreener.metrics import timed
+from StockScreener.mlpchart.pool import RenderPool, RenderQueueFull
+from StockScreener.store import MARKET_CLOSE, MARKET_TZ, default_store
 
-    prices = yf.Ticker(ticker).history(period="1y", interval="1d")
+# Part of the cache key: bump when the indicators below change so old PNGs aren't served
+INDICATOR_SET = "candles,sma10,sma20,sma50,sma200,volume,rsi,macd"
 
+# Rendered PNGs keyed on (ticker, last bar date, indicator set)
+chart_cache = LRUCache(max_bytes=int(os.getenv("CHART_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+
+# Seconds a request waits for its render in the process pool
+CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "60"))
+
+# Finished renders (including pre-renders nobody is waiting on) land in the cache
+render_pool = RenderPool(on_done=chart_cache.put)
+
+
+def chart_prices(ticker):
+    # Served from the local price store; only bars missing since the last stored date are downloaded
+    return default_store().window(ticker, period="1y", sync=True)
+
+
+def chart_key(ticker, prices):
+    return (ticker, prices.index[-1].strftime('%Y-%m-%d'), INDICATOR_SET)
+
+
+def chart_validators(ticker, prices=None):
+    # (ETag, Last-Modified) for the chart that would be served, without rendering it;
+    # pass the chart_prices frame when the caller goes on to render it
+    prices = chart_prices(ticker) if prices is None else prices
     if prices.empty:
-        print(f"No data found for {ticker} from yfinance.")
         return None
+    key = chart_key(ticker, prices)
+    etag = '"' + hashlib.sha1("|".join(key).encode('utf-8')).hexdigest()[:20] + '"'
+    # The chart only changes when a new bar closes
+    bar_close = pd.Timestamp(key[1], tz=MARKET_TZ) + pd.Timedelta(hours=MARKET_CLOSE[0], minutes=MARKET_CLOSE[1])
+    return etag, format_datetime(bar_close.tz_convert('UTC').to_pydatetime(), usegmt=True)
+
+
+def render_chart(ticker, prices, figure=None):
+    # matplotlib/mplchart load on the first render (in the pool workers, normally), not on import
+    from matplotlib.figure import Figure
+    from mplchart.chart import Chart
+    from mplchart.indicators import MACD, RSI, SMA
+    from mplchart.primitives import Candlesticks, Volume
 
     indicators = [
         Candlesticks(colordn='red',colorup='green'),SMA(10),SMA(20), SMA(50), SMA(200), Volume(),
@@ -21,11 +57,52 @@ def chart(ticker):
         MACD(),
     ]
 
-    chart = Chart(title=ticker)
+    # A plain Figure (not pyplot's) so inline renders aren't kept alive by the pyplot registry
+    chart = Chart(title=ticker, figure=figure if figure is not None else Figure(figsize=Chart.DEFAULT_FIGSIZE))
     chart.plot(prices, indicators)
-    x = chart.render(format='png')
-    return x
+    return chart.render(format='png')
+
+
+def chart(ticker, prices=None):
 
+    prices = chart_prices(ticker) if prices is None else prices
+
+    if prices.empty:
+        print(f"No data found for {ticker} from yfinance.")
+        return None
+
+    key = chart_key(ticker, prices)
+    cached = chart_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if render_pool.enabled:
+        # Raises RenderQueueFull when the pool is saturated
+        return render_pool.submit(key, ticker, prices).result(timeout=CHART_RENDER_TIMEOUT)
+
+    with timed("chart_render"):
+        x = render_chart(ticker, prices)
+    chart_cache.put(key, x)
+    return x
 
 
-    
\ No newline at end of file
+def prerender(tickers):
+    # Warm the cache for screener hits; uses at most half the render queue
+    for ticker in tickers:
+        try:
+            prices = chart_prices(ticker)
+            if prices.empty:
+                continue
+            key = chart_key(ticker, prices)
+            if key in chart_cache:
+                continue
+            if render_pool.enabled:
+                render_pool.submit(key, ticker, prices, reserve=render_pool.queue_size // 2)
+            else:
+                with timed("chart_render"):
+                    chart_cache.put(key, render_chart(ticker, prices))
+        except RenderQueueFull:
+            print(f"Render queue busy, stopped pre-rendering at {ticker}")
+            return
+        except Exception as e:
+            print(f"Error pre-rendering chart for {ticker}: {e}")
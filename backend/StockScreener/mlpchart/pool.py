@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from StockScreener.metrics import stage_errors, stage_seconds
+
+# Chart rendering is CPU-bound matplotlib work that holds the GIL, so it runs in worker
+# processes. Each worker loads matplotlib, mplchart and the font cache once and reuses a
+# single Figure for every render.
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+# Renders queued or running at once; submissions past this are refused (backpressure)
+CHART_QUEUE_SIZE = int(os.getenv("CHART_QUEUE_SIZE", "16"))
+
+
+class RenderQueueFull(Exception):
+    pass
+
+
+_figure = None
+
+
+def _init_worker():
+    global _figure
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import font_manager
+    from matplotlib.figure import Figure
+    from mplchart.chart import Chart
+
+    font_manager.findfont(font_manager.FontProperties(family=matplotlib.rcParams['font.family']))
+    _figure = Figure(figsize=Chart.DEFAULT_FIGSIZE)
+
+
+def _render(ticker, dates, values, columns):
+    from StockScreener.mlpchart.mlpchart import render_chart
+
+    prices = pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='Date'), columns=columns)
+    return render_chart(ticker, prices, figure=_figure)
+
+
+class RenderPool:
+
+    def __init__(self, workers=CHART_WORKERS, queue_size=CHART_QUEUE_SIZE, on_done=None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.on_done = on_done
+        self._executor = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: forking a threaded server process is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return self._executor
+
+    def pending(self):
+        return len(self._inflight)
+
+    def submit(self, key, ticker, prices, reserve=0):
+        # Returns a Future for the PNG bytes; identical in-flight renders share one Future.
+        # `reserve` keeps that many slots free (used by pre-renders so they never
+        # crowd out a user's request).
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if len(self._inflight) >= self.queue_size - reserve:
+                self.rejected += 1
+                raise RenderQueueFull(f"{len(self._inflight)} chart renders already queued")
+            args = (_render, ticker, np.asarray(prices.index.values), prices.to_numpy(), list(prices.columns))
+            try:
+                future = self._pool().submit(*args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); start a fresh pool once
+                self._executor = None
+                future = self._pool().submit(*args)
+            self._inflight[key] = future
+
+        submitted = time.perf_counter()
+
+        def done(future):
+            # Renders happen in the worker processes, so latency (queue wait included) is taken here
+            stage_seconds.observe(time.perf_counter() - submitted, stage="chart_render")
+            if future.cancelled() or future.exception() is not None:
+                stage_errors.inc(stage="chart_render")
+            with self._lock:
+                self._inflight.pop(key, None)
+            if self.on_done is not None and not future.cancelled() and future.exception() is None:
+                self.on_done(key, future.result())
+
+        future.add_done_callback(done)
+        return future
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "pending": self.pending(),
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
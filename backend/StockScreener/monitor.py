@@ -0,0 +1,335 @@
+import asyncio
+import csv
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from StockScreener.engine import BREAKOUT_RULES, Panel, evaluate
+from StockScreener.fetch import OHLCV_COLUMNS, period_start
+from StockScreener.rolling import store_panel
+from StockScreener.scan import scan_executor
+from StockScreener.store import MARKET_TZ, default_store, universe_symbols
+
+# Intraday breakout monitor. Each universe's daily history (the same 6mo window the scan
+# evaluates) is held in memory as a Panel whose last row is today's bar; quote batches from
+# a feed update that row, and the breakout rules are re-evaluated only for the columns
+# (symbols) a batch touched, or for all of them when a batch opens a new session. Symbols
+# entering or leaving the breakout set are pushed to every subscriber as
+# {"type": "enter"|"exit", ...} events.
+MONITOR_PERIOD = os.getenv("MONITOR_PERIOD", "6mo")
+# Replay file used as the feed when no live feed is plugged in (NDJSON or CSV quotes)
+MONITOR_REPLAY_FILE = os.getenv("MONITOR_REPLAY_FILE")
+# Seconds between replayed batches; 0 replays as fast as the monitor ingests
+MONITOR_REPLAY_INTERVAL = float(os.getenv("MONITOR_REPLAY_INTERVAL", "1"))
+# Events buffered per subscriber; a client that falls this far behind is disconnected
+MONITOR_QUEUE_SIZE = int(os.getenv("MONITOR_QUEUE_SIZE", "1000"))
+
+QUOTE_FIELDS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "price": "Close", "volume": "Volume"}
+
+
+def quote_date(value):
+    # Session date (naive datetime64[ns]) of a quote timestamp: ISO string or epoch seconds
+    if value is None or value == "":
+        stamp = pd.Timestamp.now(tz=MARKET_TZ)
+    elif isinstance(value, (int, float)) or str(value).replace('.', '', 1).isdigit():
+        stamp = pd.Timestamp(float(value), unit='s', tz='UTC').tz_convert(MARKET_TZ)
+    else:
+        stamp = pd.Timestamp(value)
+        stamp = stamp.tz_localize(MARKET_TZ) if stamp.tz is None else stamp.tz_convert(MARKET_TZ)
+    return np.datetime64(stamp.tz_localize(None).normalize(), 'ns')
+
+
+class QuoteFeed:
+    # A source of quote batches: `batches()` is an async iterator of lists of quote dicts
+    # {"symbol", "price" or "close", optional "open"/"high"/"low"/"volume" (day cumulative), "time"}
+
+    async def batches(self):
+        raise NotImplementedError
+        yield
+
+
+class ReplayFeed(QuoteFeed):
+    # Replays a recorded session. NDJSON: one quote per line, or one JSON list per line as
+    # a batch. CSV: one quote per row with a header. Consecutive quotes sharing a "time"
+    # form one batch.
+
+    def __init__(self, path, interval=None, loop=False):
+        self.path = path
+        self.interval = MONITOR_REPLAY_INTERVAL if interval is None else interval
+        self.loop = loop
+
+    def _quotes(self):
+        with open(self.path, newline='', encoding='utf-8') as f:
+            if self.path.endswith('.csv'):
+                for row in csv.DictReader(f):
+                    yield row
+                return
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def read_batches(self):
+        batch, batch_time = [], None
+        for item in self._quotes():
+            if isinstance(item, list):
+                if batch:
+                    yield batch
+                batch, batch_time = [], None
+                yield item
+                continue
+            if batch and item.get("time") != batch_time:
+                yield batch
+                batch = []
+            batch.append(item)
+            batch_time = item.get("time")
+        if batch:
+            yield batch
+
+    async def batches(self):
+        while True:
+            for batch in self.read_batches():
+                yield batch
+                await asyncio.sleep(self.interval)
+            if not self.loop:
+                return
+
+
+class LiveUniverse:
+    # In-memory price state of one universe plus the current breakout set; not thread-safe,
+    # the Monitor serializes access
+
+    def __init__(self, symbols, store=None, period=None, rule=BREAKOUT_RULES):
+        self.symbols = list(symbols)
+        self.rule = rule
+        self.period = period or MONITOR_PERIOD
+        self._index = {symbol: j for j, symbol in enumerate(self.symbols)}
+        panel = store_panel(store or default_store(), self.symbols)
+        self.dates = panel.dates
+        self.fields = panel.fields
+        self._trim()
+        self.members = set(self.symbols[j] for j in np.flatnonzero(self._evaluate(np.arange(len(self.symbols)))))
+        self.quotes = 0
+        self.evaluated = 0
+
+    def _trim(self):
+        if not len(self.dates):
+            return
+        begin = period_start(self.period, pd.Timestamp(self.dates[-1]))
+        start = int(np.searchsorted(self.dates, np.datetime64(begin))) if begin is not None else 0
+        if start:
+            self.dates = self.dates[start:]
+            self.fields = {field: values[start:] for field, values in self.fields.items()}
+
+    def _roll(self, date):
+        # A quote for a new session: append an empty row for it
+        self.dates = np.append(self.dates, date)
+        self.fields = {field: np.vstack([values, np.full((1, len(self.symbols)), np.nan)])
+                       for field, values in self.fields.items()}
+        self._trim()
+
+    def _evaluate(self, columns):
+        # Latest-bar rule mask for the given symbol columns only
+        if not len(self.dates) or not len(columns):
+            return np.zeros(len(columns), dtype=bool)
+        panel = Panel(self.dates, [self.symbols[j] for j in columns],
+                      {field: values[:, columns] for field, values in self.fields.items()})
+        return evaluate(panel, self.rule)[-1]
+
+    def resolve(self, symbol):
+        symbol = str(symbol).strip().upper()
+        if symbol in self._index:
+            return self._index[symbol]
+        return self._index.get(symbol + '.NS')
+
+    def apply(self, quotes):
+        # Update today's bar from a batch of quotes; returns the enter/exit events
+        changed = set()
+        rolled = False
+        for quote in quotes:
+            j = self.resolve(quote.get("symbol", ""))
+            values = {QUOTE_FIELDS[key]: float(value) for key, value in quote.items()
+                      if key in QUOTE_FIELDS and value not in (None, "")}
+            if j is None or "Close" not in values:
+                continue
+            date = quote_date(quote.get("time"))
+            if not len(self.dates) or date > self.dates[-1]:
+                self._roll(date)
+                rolled = True
+            elif date < self.dates[-1]:
+                continue  # Late quote for a closed session
+            row = {field: self.fields[field][-1, j] for field in OHLCV_COLUMNS}
+            price = values["Close"]
+            # Missing open/high/low build up from the trades seen so far today
+            values.setdefault("Open", row["Open"] if row["Open"] == row["Open"] else price)
+            values.setdefault("High", np.nanmax([row["High"], price]))
+            values.setdefault("Low", np.nanmin([row["Low"], price]))
+            values.setdefault("Volume", row["Volume"])
+            for field, value in values.items():
+                self.fields[field][-1, j] = value
+            changed.add(j)
+            self.quotes += 1
+
+        # After a roll every symbol's latest bar is new (empty until quoted), so members
+        # carried over from the previous session are re-evaluated too
+        columns = np.arange(len(self.symbols)) if rolled else np.array(sorted(changed), dtype=np.intp)
+        mask = self._evaluate(columns)
+        self.evaluated += len(columns)
+        events = []
+        stamp = pd.Timestamp.now(tz=MARKET_TZ).isoformat()
+        for j, hit in zip(columns, mask):
+            symbol = self.symbols[j]
+            if hit == (symbol in self.members):
+                continue
+            (self.members.add if hit else self.members.discard)(symbol)
+            events.append({"type": "enter" if hit else "exit", "symbol": symbol,
+                           "close": float(self.fields["Close"][-1, j]), "time": stamp})
+        return events
+
+    def snapshot(self):
+        date = str(self.dates[-1])[:10] if len(self.dates) else None
+        return {"type": "snapshot", "date": date, "stocks": [symbol for symbol in self.symbols if symbol in self.members]}
+
+
+class Monitor:
+    # One universe: owns the LiveUniverse, runs the feed and fans events out to subscribers
+
+    def __init__(self, universe, symbols=None, store=None, rule=BREAKOUT_RULES):
+        self.universe = universe
+        self._symbols = symbols
+        self._store = store
+        self._rule = rule
+        self.live = None
+        self.subscribers = set()
+        self.batches = 0
+        self.last_batch_ms = None
+        self._feed_task = None
+        self._lock = threading.Lock()
+
+    def _ensure_live(self):
+        with self._lock:
+            if self.live is None:
+                symbols = self._symbols if self._symbols is not None else universe_symbols(self.universe)
+                self.live = LiveUniverse(symbols, store=self._store, rule=self._rule)
+            return self.live
+
+    async def ready(self):
+        # Build the in-memory state off the event loop (reads the whole universe from the store)
+        if self.live is None:
+            await asyncio.get_running_loop().run_in_executor(scan_executor(), self._ensure_live)
+        return self.live
+
+    def _ingest(self, quotes):
+        with self._lock:
+            started = time.perf_counter()
+            events = self.live.apply(quotes)
+            self.last_batch_ms = (time.perf_counter() - started) * 1000
+            self.batches += 1
+            return events
+
+    async def ingest(self, quotes):
+        await self.ready()
+        events = await asyncio.get_running_loop().run_in_executor(scan_executor(), self._ingest, quotes)
+        for event in events:
+            self.publish(event)
+        return events
+
+    def publish(self, event):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too slow to keep up: drop it, its connection closes on the None
+                self.subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def subscribe(self):
+        # Async iterator of events, starting with the current breakout set
+        live = await self.ready()
+        queue = asyncio.Queue(maxsize=MONITOR_QUEUE_SIZE)
+        with self._lock:
+            snapshot = live.snapshot()
+        self.subscribers.add(queue)
+        try:
+            yield snapshot
+            while True:
+                event = await queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self.subscribers.discard(queue)
+
+    async def _run_feed(self, feed):
+        try:
+            async for quotes in feed.batches():
+                await self.ingest(quotes)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Quote feed for {self.universe} stopped: {e!r}")
+
+    def start(self, feed):
+        # Replaces any running feed
+        self.stop()
+        self._feed_task = asyncio.ensure_future(self._run_feed(feed))
+        return self._feed_task
+
+    def stop(self):
+        if self._feed_task is not None:
+            self._feed_task.cancel()
+            self._feed_task = None
+
+    @property
+    def running(self):
+        return self._feed_task is not None and not self._feed_task.done()
+
+    def stats(self):
+        live = self.live
+        return {
+            "universe": self.universe,
+            "loaded": live is not None,
+            "feed_running": self.running,
+            "subscribers": len(self.subscribers),
+            "batches": self.batches,
+            "last_batch_ms": self.last_batch_ms,
+            "quotes": live.quotes if live else 0,
+            "symbols_evaluated": live.evaluated if live else 0,
+            "breakouts": len(live.members) if live else 0,
+        }
+
+
+def default_feed():
+    # The configured replay file, if any; a live quote feed plugs in via Monitor.start
+    if MONITOR_REPLAY_FILE:
+        return ReplayFeed(MONITOR_REPLAY_FILE)
+    return None
+
+
+class Monitors:
+    # Process-wide: one Monitor per universe, created (and its default feed started) on first use
+
+    def __init__(self, feed_factory=default_feed):
+        self._monitors = {}
+        self.feed_factory = feed_factory
+
+    def get(self, universe):
+        monitor = self._monitors.get(universe)
+        if monitor is None:
+            monitor = self._monitors[universe] = Monitor(universe)
+            feed = self.feed_factory() if self.feed_factory else None
+            if feed is not None:
+                monitor.start(feed)
+        return monitor
+
+    def stats(self):
+        return {universe: monitor.stats() for universe, monitor in self._monitors.items()}
+
+
+monitors = Monitors()
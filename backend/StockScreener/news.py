@@ -0,0 +1,264 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from StockScreener.cache import LRUCache
+from StockScreener.metrics import timed
+from StockScreener.symbols import normalize
+
+# Company news for the details page and the LLM prompt. Articles are fetched once per
+# company per NEWS_TTL, near-duplicates (same story syndicated under another URL or a
+# lightly edited title) are dropped, and each article is cut down to the fields the
+# dashboard and the prompt actually use.
+NEWS_TTL = float(os.getenv("NEWS_TTL", "1800"))
+NEWS_PERIOD = os.getenv("NEWS_PERIOD", "30d")
+NEWS_MAX_RESULTS = int(os.getenv("NEWS_MAX_RESULTS", "20"))
+# Articles kept per company after de-duplication, newest first
+NEWS_MAX_ARTICLES = int(os.getenv("NEWS_MAX_ARTICLES", "10"))
+# Titles sharing at least this fraction of their words are the same story
+NEWS_TITLE_SIMILARITY = float(os.getenv("NEWS_TITLE_SIMILARITY", "0.8"))
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", "2000"))
+# Concurrent fetches in batch mode
+NEWS_WORKERS = int(os.getenv("NEWS_WORKERS", "8"))
+# Directory of canned <company-slug>.json article lists; when set it replaces Google News
+NEWS_FIXTURE_DIR = os.getenv("NEWS_FIXTURE_DIR")
+
+_TRACKING_PARAMS = re.compile(r'^(utm_|fbclid$|gclid$|ocid$|ref$|cmpid$)')
+
+
+class NewsSource:
+    # Anything that returns the raw article dicts (GNews shape) for a company name
+
+    def fetch(self, name):
+        raise NotImplementedError
+
+
+class GNewsSource(NewsSource):
+
+    def __init__(self, period=None, max_results=None):
+        self.period = period or NEWS_PERIOD
+        self.max_results = max_results or NEWS_MAX_RESULTS
+        self._client = None
+
+    def fetch(self, name):
+        if self._client is None:
+            from gnews import GNews
+
+            self._client = GNews(language='en', period=self.period, max_results=self.max_results)
+        return self._client.get_news(name) or []
+
+
+def fixture_slug(name):
+    return normalize(name).replace(' ', '-')
+
+
+class FixtureNewsSource(NewsSource):
+    # Offline stand-in: <directory>/<fixture_slug(name)>.json holding a list of GNews articles
+
+    def __init__(self, directory, delay=0.0):
+        self.directory = directory
+        self.delay = delay
+        self.calls = 0
+
+    def fetch(self, name):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        path = os.path.join(self.directory, fixture_slug(name) + '.json')
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+
+def canonical_url(url):
+    # Scheme, 'www.', trailing slash, fragment and tracking parameters don't make a new article
+    if not url:
+        return ''
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix('www.')
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAMS.match(k.lower())))
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else '')
+
+
+def publisher_name(article):
+    publisher = article.get('publisher')
+    if isinstance(publisher, dict):
+        publisher = publisher.get('title')
+    return (publisher or '').strip()
+
+
+def clean_title(title, publisher=''):
+    # Google News titles end in " - <Publisher>"
+    title = (title or '').strip()
+    if publisher and title.endswith(f" - {publisher}"):
+        title = title[:-len(publisher) - 3].rstrip()
+    return title
+
+
+def published_date(value):
+    # 'Mon, 14 Oct 2024 07:00:00 GMT' -> '2024-10-14' (unparseable values are kept as they are)
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def trim_article(article):
+    publisher = publisher_name(article)
+    return {
+        'title': clean_title(article.get('title'), publisher),
+        'publisher': publisher or None,
+        'published date': published_date(article.get('published date')),
+        'url': article.get('url'),
+    }
+
+
+def _similar(words, other):
+    if not words or not other:
+        return False
+    return len(words & other) / len(words | other) >= NEWS_TITLE_SIMILARITY
+
+
+def dedupe(articles):
+    # Keeps the first occurrence of each story (by canonical URL, normalized title, or a
+    # title sharing most of its words with one already kept)
+    kept, urls, titles, word_sets = [], set(), set(), []
+    for article in articles:
+        url = canonical_url(article.get('url'))
+        title = normalize(article.get('title') or '')
+        words = set(title.split())
+        if (url and url in urls) or (title and title in titles) or any(_similar(words, other) for other in word_sets):
+            continue
+        kept.append(article)
+        urls.add(url)
+        titles.add(title)
+        word_sets.append(words)
+    return kept
+
+
+def newest(articles, limit=None):
+    articles = sorted(articles, key=lambda article: article['published date'] or '', reverse=True)
+    return articles[:limit or NEWS_MAX_ARTICLES]
+
+
+def prompt_news(news):
+    # One compact line per article for the LLM prompt; URLs cost tokens and add nothing there
+    if not news:
+        return "No recent news."
+    lines = []
+    for article in news:
+        if isinstance(article, dict):
+            source = ' '.join(filter(None, (article.get('published date'), publisher_name(article))))
+            lines.append(f"- {clean_title(article.get('title'), publisher_name(article))}" + (f" ({source})" if source else ''))
+        else:
+            lines.append(f"- {article}")
+    return '\n'.join(lines)
+
+
+class NewsService:
+    # Per-company TTL cache in front of a NewsSource. Concurrent requests for the same company
+    # share one fetch; a failed refresh serves the expired articles if there are any.
+
+    def __init__(self, source=None, ttl=None, max_entries=None, workers=None):
+        self.source = source or GNewsSource()
+        self.ttl = NEWS_TTL if ttl is None else ttl
+        self.workers = workers or NEWS_WORKERS
+        self.cache = LRUCache(max_bytes=64 * 1024 * 1024, max_entries=max_entries or NEWS_CACHE_MAX_ENTRIES,
+                              sizeof=lambda entry: 256 * (1 + len(entry[1])))
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.errors = 0
+        self.stale_served = 0
+        self.coalesced = 0
+        self.duplicates_dropped = 0
+
+    def _fetch(self, key, name, future):
+        try:
+            with timed("news"):
+                raw = self.source.fetch(name)
+            # Raw source articles -> trimmed, de-duplicated, newest first
+            trimmed = [trim_article(article) for article in raw if isinstance(article, dict)]
+            unique = dedupe(trimmed)
+            articles = newest(unique)
+            self.fetches += 1
+            self.duplicates_dropped += len(trimmed) - len(unique)
+            self.cache.put(key, (time.time(), articles))
+            future.set_result(articles)
+        except Exception as e:
+            self.errors += 1
+            entry = self.cache.get(key)
+            if entry is not None:
+                print(f"News refresh failed for {name}, serving cached articles: {e!r}")
+                self.stale_served += 1
+                future.set_result(entry[1])
+            else:
+                future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get(self, name, force=False):
+        key = normalize(name or '')
+        if not key:
+            return []
+        entry = self.cache.get(key)
+        if entry is not None and not force and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if owner:
+            self._fetch(key, name, future)
+        return future.result()
+
+    def batch(self, names, force=False):
+        # {name: articles} for many companies at once; a company whose fetch fails maps to []
+        names = list(dict.fromkeys(names))
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(names) or 1)), thread_name_prefix="news") as pool:
+            futures = {name: pool.submit(self.get, name, force) for name in names}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"News unavailable for {name}: {e!r}")
+                    results[name] = []
+        return results
+
+    def stats(self):
+        return {
+            **self.cache.stats(),
+            "ttl": self.ttl,
+            "source": type(self.source).__name__,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "stale_served": self.stale_served,
+            "coalesced": self.coalesced,
+            "duplicates_dropped": self.duplicates_dropped,
+        }
+
+
+_default_news = None
+_default_lock = threading.Lock()
+
+
+def default_news():
+    global _default_news
+    with _default_lock:
+        if _default_news is None:
+            source = FixtureNewsSource(NEWS_FIXTURE_DIR) if NEWS_FIXTURE_DIR else GNewsSource()
+            _default_news = NewsService(source)
+    return _default_news
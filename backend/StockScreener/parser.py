@@ -0,0 +1,245 @@
+import os
+from html.parser import HTMLParser
+
+# Single-pass extractor for screener.in company pages. Produces the same
+# (fundainfo, shareholdnres) as the BeautifulSoup extractor it replaced (kept in
+# benchmarks/legacy_parser.py as the reference) but walks the
+# document once, without building a tree. The event handler is shared by two tokenizers:
+# the stdlib html.parser (pure Python, always available) and lxml's C parser in
+# target mode (optional; used automatically when installed).
+PARSER_BACKEND = os.getenv("SCREENER_PARSER", "auto")
+
+VOID_TAGS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'))
+
+ROW_LABELS = {
+    'quarters': (('Net Profit', 'Quarter'),),
+    'profit-loss': (('Net Profit', 'Yearly'),),
+    'shareholding': (('Promoters', 'Promoters'), ('DIIs', 'DII'), ('FIIs', 'FII'), ('Public', 'Public')),
+}
+
+RATIO_LABELS = (('Stock P/E', 'PE'), ('ROE', 'ROE'), ('ROCE', 'ROCE'))
+
+
+class _Capture:
+    __slots__ = ('name', 'depth', 'parts', 'nested')
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.parts = []
+        # Whether an element opened inside it (BeautifulSoup's .string is None then)
+        self.nested = False
+
+    def text(self):
+        return ''.join(self.parts)
+
+
+class PageExtractor:
+    # Event handler: start(tag, attrs), end(tag), data(text), close() -> (fundainfo, shareholdnres)
+
+    def __init__(self):
+        self.stack = []
+        self.captures = []
+        self.fields = {}
+        self.rows = {}
+        self.section = None
+        self.section_depth = None
+        self.seen_sections = set()
+        self.price_div_depth = None
+        self.market_cap_li_depth = None
+        self.profile_depth = None
+        self.pending_ratios = []
+        self.row_cells = None
+
+    @property
+    def depth(self):
+        return len(self.stack)
+
+    def _capture(self, name):
+        self.captures.append(_Capture(name, self.depth))
+
+    def _capturing(self, name):
+        return any(capture.name == name for capture in self.captures)
+
+    def start(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        for capture in self.captures:
+            capture.nested = True
+        self.stack.append(tag)
+        classes = attrs.get('class') or ''
+        fields = self.fields
+
+        if tag == 'section':
+            section_id = attrs.get('id')
+            # Like soup.find('section', id=...): only the first section with each id counts
+            if section_id in ROW_LABELS and section_id not in self.seen_sections and self.section is None:
+                self.section = section_id
+                self.section_depth = self.depth
+                self.seen_sections.add(section_id)
+        elif tag == 'tr' and self.section is not None:
+            self.row_cells = []
+            self._capture('row')
+        elif tag == 'td' and self.row_cells is not None:
+            self._capture('cell')
+        elif tag == 'h1' and 'Company Name' not in fields and classes == 'margin-0 show-from-tablet-landscape':
+            self._capture('Company Name')
+        elif tag == 'div':
+            if classes == 'font-size-18 strong line-height-14' and self.price_div_depth is None and 'Current Price' not in fields:
+                self.price_div_depth = self.depth
+            elif 'company-profile' in classes.split() and self.profile_depth is None and 'About' not in fields:
+                self.profile_depth = self.depth
+            elif self.profile_depth is not None and classes == 'sub show-more-box about' and 'About' not in fields and not self._capturing('About'):
+                self._capture('About')
+        elif tag == 'li':
+            if attrs.get('data-source') == 'default' and self.market_cap_li_depth is None and 'Market Cap' not in fields:
+                self.market_cap_li_depth = self.depth
+        elif tag == 'span':
+            span_classes = classes.split()
+            if self.price_div_depth is not None and 'Current Price' not in fields and not self._capturing('Current Price'):
+                self._capture('Current Price')
+            if 'number' in span_classes:
+                if self.market_cap_li_depth is not None and 'Market Cap' not in fields and not self._capturing('Market Cap'):
+                    self._capture('Market Cap')
+                if self.pending_ratios and not self._capturing('ratio'):
+                    self._capture('ratio')
+            if 'name' in span_classes:
+                self._capture('ratio_name')
+
+    def end(self, tag):
+        # Stray end tags are ignored; a missing end tag is closed implicitly by its parent's
+        if tag in VOID_TAGS or tag not in self.stack:
+            return
+        while self.stack:
+            if self._close_top() == tag:
+                break
+
+    def _close_top(self):
+        depth = self.depth
+        while self.captures and self.captures[-1].depth >= depth:
+            self._finish(self.captures.pop())
+
+        if self.section is not None and depth == self.section_depth:
+            self.section = None
+            self.section_depth = None
+        if depth == self.price_div_depth:
+            self.price_div_depth = None
+            self.fields.setdefault('Current Price', "N/A")
+        if depth == self.market_cap_li_depth:
+            self.market_cap_li_depth = None
+            self.fields.setdefault('Market Cap', "N/A")
+        if depth == self.profile_depth:
+            self.profile_depth = None
+            self.fields.setdefault('About', "N/A")
+        return self.stack.pop()
+
+    def data(self, text):
+        for capture in self.captures:
+            capture.parts.append(text)
+
+    def _finish(self, capture):
+        name = capture.name
+        if name == 'cell':
+            if self.row_cells is not None:
+                self.row_cells.append(''.join(part.strip() for part in capture.parts))
+        elif name == 'row':
+            text = capture.text()
+            for label, key in ROW_LABELS[self.section] if self.section else ():
+                if key not in self.rows and label in text:
+                    self.rows[key] = self.row_cells[1:]
+            self.row_cells = None
+        elif name == 'ratio_name':
+            # soup.find('span', class_='name', string=...) only matches spans without child elements
+            if not capture.nested:
+                text = capture.text()
+                for label, key in RATIO_LABELS:
+                    if key not in self.fields and key not in self.pending_ratios and label in text:
+                        self.pending_ratios.append(key)
+        elif name == 'ratio':
+            # .string of the next span.number (None when it has nested markup)
+            value = capture.text() if not capture.nested and capture.parts else None
+            for key in self.pending_ratios:
+                self.fields[key] = value
+            self.pending_ratios = []
+        elif name == 'Current Price':
+            self.fields[name] = capture.text().strip()
+            self.price_div_depth = None
+        elif name not in self.fields:
+            self.fields[name] = capture.text().strip()
+
+    def close(self):
+        while self.stack:
+            self._close_top()
+        fields = self.fields
+        fundainfo = {
+            "Company Name": fields.get("Company Name", "N/A"),
+            "Current Price": fields.get("Current Price", "N/A"),
+            "Market Cap": fields.get("Market Cap", "N/A"),
+            "About": fields.get("About", "N/A"),
+            "PE": fields.get("PE", "N/A"),
+            "ROE": fields.get("ROE", "N/A"),
+            "ROCE": fields.get("ROCE", "N/A"),
+        }
+        shareholdnres = {key: self.rows.get(key, []) for key in ("Quarter", "Yearly", "Promoters", "DII", "FII", "Public")}
+        return fundainfo, shareholdnres
+
+
+class _StdlibTokenizer(HTMLParser):
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+        if tag not in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def _parse_stdlib(html):
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    target = PageExtractor()
+    tokenizer = _StdlibTokenizer(target)
+    tokenizer.feed(html)
+    tokenizer.close()
+    return target.close()
+
+
+def _parse_lxml(html):
+    from lxml import etree
+
+    target = PageExtractor()
+    parser = etree.HTMLParser(target=target, encoding='utf-8' if isinstance(html, bytes) else None)
+    parser.feed(html)
+    return parser.close()
+
+
+def _lxml_available():
+    try:
+        import lxml.etree  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+BACKENDS = {
+    "html": _parse_stdlib,
+    "lxml": _parse_lxml,
+}
+
+
+def parse_company_page(html, backend=None):
+    backend = backend or PARSER_BACKEND
+    if backend == "auto":
+        backend = "lxml" if _lxml_available() else "html"
+    return BACKENDS[backend](html)
@@ -0,0 +1,113 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+# Opt-in sampling profiler for slow requests. While enabled, a daemon thread samples every
+# thread's Python stack each PROFILER_INTERVAL seconds into a short ring buffer; when a
+# request takes longer than PROFILER_SLOW_MS, the samples taken during it are folded into
+# "frame;frame;frame count" lines (flamegraph.pl / speedscope input) and kept. Samples are
+# process-wide, so a profile also shows whatever other requests were busy at the time.
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.005"))
+PROFILER_SLOW_MS = float(os.getenv("PROFILER_SLOW_MS", "1000"))
+# Slow-request profiles kept in memory
+PROFILER_KEEP = int(os.getenv("PROFILER_KEEP", "20"))
+# Sampling history; a request longer than this is profiled over its last PROFILER_WINDOW seconds
+PROFILER_WINDOW = float(os.getenv("PROFILER_WINDOW", "120"))
+
+# Leaf frames of threads that are parked, not working (event loop select, idle pool workers)
+IDLE_FRAMES = {"select", "poll", "wait", "_worker", "accept"}
+MAX_DEPTH = 64
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold(frame):
+    # Root-first ';'-joined stack of a frame
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+
+    def __init__(self, interval=None, slow_ms=None, keep=None, window=None):
+        self.interval = interval or PROFILER_INTERVAL
+        self.slow_ms = PROFILER_SLOW_MS if slow_ms is None else slow_ms
+        self.window = window or PROFILER_WINDOW
+        self.samples = collections.deque(maxlen=max(1, int(self.window / self.interval)))
+        self.profiles = collections.deque(maxlen=keep or PROFILER_KEEP)
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.enabled:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=1)
+        self.samples.clear()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or frame.f_code.co_name in IDLE_FRAMES:
+                    continue
+                self.samples.append((now, thread_id, fold(frame)))
+
+    def folded(self, start, end):
+        counts = collections.Counter(stack for at, _, stack in list(self.samples) if start <= at <= end)
+        return "\n".join(f"{stack} {count}" for stack, count in counts.most_common())
+
+    def request_finished(self, label, start, end):
+        # Keeps a profile of the request if it was slow; returns it (or None)
+        duration_ms = (end - start) * 1000
+        if not self.enabled or duration_ms < self.slow_ms:
+            return None
+        folded = self.folded(start, end)
+        profile = {
+            "request": label,
+            "duration_ms": duration_ms,
+            "finished_at": time.time(),
+            "samples": sum(int(line.rsplit(" ", 1)[1]) for line in folded.splitlines()),
+            "interval_ms": self.interval * 1000,
+            "folded": folded,
+        }
+        self.profiles.append(profile)
+        return profile
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "interval_ms": self.interval * 1000,
+            "slow_ms": self.slow_ms,
+            "buffered_samples": len(self.samples),
+            "profiles": [{key: value for key, value in profile.items() if key != "folded"} for profile in self.profiles],
+        }
+
+
+profiler = SamplingProfiler()
+if PROFILER_ENABLED:
+    profiler.start()
@@ -0,0 +1,369 @@
+import os
+import re
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from StockScreener.engine import Indicators, Panel
+from StockScreener.fundamentals import NUMERIC_FIELDS, default_fundamentals
+from StockScreener.rolling import full_values, rolling_states
+from StockScreener.store import UNIVERSES, default_store, next_session_close, universe_symbols
+
+# Declarative screens such as "ROE > 15 and close > SMA50 and FII rising 3 quarters".
+# The expression is parsed by a small recursive-descent parser (no eval) into closures
+# that evaluate as vectorized masks over one column per field for the whole universe.
+# Columns come from the fundamentals snapshot and the last bar of a price panel built
+# from the local store; both are computed once per universe and session.
+SCREEN_BARS = int(os.getenv("SCREEN_BARS", "260"))
+SCREEN_MAX_LIMIT = int(os.getenv("SCREEN_MAX_LIMIT", "500"))
+
+PRICE_FIELDS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+SERIES_NAMES = {"promoters": "Promoters", "fii": "FII", "dii": "DII", "public": "Public"}
+OSCILLATORS = ("rsi", "macd", "macd_signal", "macd_hist")
+# sma50 / ema20 on Close, vema20 / vsma20 on Volume, change20 = % change over 20 bars
+INDICATOR_PATTERN = re.compile(r'^(sma|ema|vsma|vema|change)(\d+)$')
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(\d+(?:\.\d+)?)|([A-Za-z_][A-Za-z0-9_]*)|(>=|<=|==|!=|>|<|=|\(|\)|\+|-|\*|/))')
+KEYWORDS = {"and", "or", "not", "rising", "falling", "quarter", "quarters"}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = TOKEN_PATTERN.match(text, pos)
+        if not match or match.end() == pos:
+            raise QueryError(f"Unexpected character at position {pos}: {text[pos:pos + 10]!r}")
+        number, word, op = match.groups()
+        if number is not None:
+            tokens.append(("num", float(number)))
+        elif word is not None:
+            word = word.lower()
+            tokens.append(("kw" if word in KEYWORDS else "name", word))
+        else:
+            tokens.append(("op", "==" if op == "=" else op))
+        pos = match.end()
+    return tokens
+
+
+def field_kind(name):
+    if name in NUMERIC_FIELDS or name in PRICE_FIELDS or name in SERIES_NAMES or name in OSCILLATORS:
+        return True
+    match = INDICATOR_PATTERN.match(name)
+    return bool(match) and 1 <= int(match.group(2)) <= SCREEN_BARS
+
+
+COMPARE = {
+    ">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+    "==": np.equal, "!=": np.not_equal,
+}
+ARITHMETIC = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide}
+
+
+class _Parser:
+    # Each parse method returns (kind, fn, fields): kind is 'num' or 'bool', fn(table) -> array
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.pos = 0
+        if not self.tokens:
+            raise QueryError("Empty filter expression")
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            found = token[1] if token[0] else "end of expression"
+            raise QueryError(f"Expected {value or kind}, found {found!r}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expr()
+        if self.peek()[0] is not None:
+            raise QueryError(f"Unexpected {self.peek()[1]!r}")
+        return self._boolean(node)
+
+    def _boolean(self, node):
+        if node[0] != 'bool':
+            raise QueryError("Expected a condition (comparison or trend), got a number")
+        return node
+
+    def _numeric(self, node):
+        if node[0] != 'num':
+            raise QueryError("Expected a number or field, got a condition")
+        return node
+
+    def _logical(self, sub, word, combine):
+        node = sub()
+        while self.peek() == ("kw", word):
+            self.pos += 1
+            left, right = self._boolean(node), self._boolean(sub())
+            node = ('bool', lambda t, a=left[1], b=right[1]: combine(a(t), b(t)), left[2] | right[2])
+        return node
+
+    def expr(self):
+        return self._logical(self.and_expr, "or", np.logical_or)
+
+    def and_expr(self):
+        return self._logical(self.not_expr, "and", np.logical_and)
+
+    def not_expr(self):
+        if self.peek() == ("kw", "not"):
+            self.pos += 1
+            _, fn, fields = self._boolean(self.not_expr())
+            return 'bool', lambda t: ~fn(t), fields
+        return self.condition()
+
+    def condition(self):
+        start = self.pos
+        node = self.arith()
+        token = self.peek()
+        if token[0] == "op" and token[1] in COMPARE:
+            self.pos += 1
+            left, right = self._numeric(node), self._numeric(self.arith())
+            op = COMPARE[token[1]]
+
+            def compare(t, a=left[1], b=right[1]):
+                with np.errstate(invalid='ignore'):
+                    return op(a(t), b(t))
+            return 'bool', compare, left[2] | right[2]
+        if token in (("kw", "rising"), ("kw", "falling")):
+            self.pos += 1
+            name = self.tokens[start][1] if self.pos - start == 2 and self.tokens[start][0] == "name" else None
+            if name not in SERIES_NAMES:
+                raise QueryError(f"'{token[1]}' applies to a shareholding series: {', '.join(SERIES_NAMES)}")
+            periods = 1
+            if self.peek()[0] == "num":
+                periods = int(self.take("num")[1])
+            if self.peek() in (("kw", "quarter"), ("kw", "quarters")):
+                self.pos += 1
+            direction = 1 if token[1] == "rising" else -1
+            return 'bool', lambda t: t.streak(name, direction) >= periods, {name}
+        return node
+
+    def _binary(self, sub, ops):
+        node = sub()
+        while self.peek()[0] == "op" and self.peek()[1] in ops:
+            op = ARITHMETIC[self.take()[1]]
+            left, right = self._numeric(node), self._numeric(sub())
+
+            def apply(t, a=left[1], b=right[1], op=op):
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    return op(a(t), b(t))
+            node = ('num', apply, left[2] | right[2])
+        return node
+
+    def arith(self):
+        return self._binary(self.term, ("+", "-"))
+
+    def term(self):
+        return self._binary(self.unary, ("*", "/"))
+
+    def unary(self):
+        if self.peek() == ("op", "-"):
+            self.pos += 1
+            _, fn, fields = self._numeric(self.unary())
+            return 'num', lambda t: -fn(t), fields
+        return self.atom()
+
+    def atom(self):
+        kind, value = self.peek()
+        if kind == "num":
+            self.pos += 1
+            return 'num', lambda t: value, set()
+        if kind == "name":
+            self.pos += 1
+            if not field_kind(value):
+                raise QueryError(f"Unknown field {value!r}")
+            return 'num', lambda t: t.column(value), {value}
+        if (kind, value) == ("op", "("):
+            self.pos += 1
+            node = self.expr()
+            self.take("op", ")")
+            return node
+        raise QueryError(f"Unexpected {value if kind else 'end of expression'!r}")
+
+
+@lru_cache(maxsize=256)
+def compile_query(text):
+    # (fn(table) -> bool mask, referenced fields)
+    _, fn, fields = _Parser(text).parse()
+    return fn, sorted(fields)
+
+
+def _streak(values, direction):
+    # Consecutive strictly rising (direction 1) or falling (-1) steps at the end of a series
+    count = 0
+    for i in range(len(values) - 1, 0, -1):
+        if (values[i] - values[i - 1]) * direction > 0:
+            count += 1
+        else:
+            break
+    return count
+
+
+class ScreenTable:
+    # Per-universe columns, one float64 value per symbol, computed on first use
+
+    def __init__(self, symbols, panel, fundamentals, snapshot, state=None):
+        self.symbols = symbols
+        self.panel = panel
+        # Latest values from the incremental indicator state, when it is at the panel's last bar
+        aligned = (state is not None and state.symbols == list(symbols) and len(panel.dates)
+                   and state.last_date == panel.dates[-1])
+        self.state_values = state.values() if aligned else {}
+        self.indicators = Indicators(panel)
+        self.fundamentals = fundamentals
+        self.snapshot = snapshot
+        self._columns = {}
+        self._streaks = {}
+        self._lock = threading.Lock()
+        # Panel columns that actually have prices, aligned to self.symbols
+        positions = {symbol: j for j, symbol in enumerate(panel.symbols)}
+        self._panel_index = np.array([positions.get(symbol, -1) for symbol in symbols])
+
+    @classmethod
+    def build(cls, symbols, store=None, snapshot=None, bars=None, state=None):
+        store = store or default_store()
+        snapshot = snapshot or default_fundamentals()
+        frames = {symbol: store.window(symbol, bars=bars or SCREEN_BARS) for symbol in symbols}
+        panel = Panel.from_frames(frames)
+        return cls(symbols, panel, snapshot.frame(), snapshot, state)
+
+    def _last(self, array):
+        values = array[-1]
+        out = np.full(len(self.symbols), np.nan)
+        found = self._panel_index >= 0
+        out[found] = values[self._panel_index[found]]
+        return out
+
+    def _compute(self, name):
+        if name in NUMERIC_FIELDS:
+            return self.fundamentals[name].reindex(self.symbols).to_numpy(dtype=np.float64)
+        if name in PRICE_FIELDS:
+            return self._last(self.panel[PRICE_FIELDS[name]])
+        if name in SERIES_NAMES:
+            return np.array([(self._series(symbol, name) or [np.nan])[-1] for symbol in self.symbols], dtype=np.float64)
+        if name in self.state_values:
+            return self.state_values[name]
+        if not len(self.panel.dates):
+            return np.full(len(self.symbols), np.nan)
+        if name in OSCILLATORS:
+            return self._last(full_values(self.panel, (), ())[name][None, :])
+        kind, n = INDICATOR_PATTERN.match(name).groups()
+        n = int(n)
+        if kind == 'sma':
+            return self._last(self.indicators.sma(n, 'Close'))
+        if kind == 'ema':
+            return self._last(self.indicators.ema(n, 'Close'))
+        if kind == 'vsma':
+            return self._last(self.indicators.sma(n, 'Volume'))
+        if kind == 'vema':
+            return self._last(self.indicators.ema(n, 'Volume'))
+        close, previous = self._last(self.panel['Close']), self._last(self.indicators.shifted('Close', n))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (close / previous - 1) * 100
+
+    def _series(self, symbol, name):
+        record = self.snapshot.records.get(symbol)
+        return record[2].get(SERIES_NAMES[name], []) if record else []
+
+    def column(self, name):
+        with self._lock:
+            if name not in self._columns:
+                self._columns[name] = self._compute(name)
+            return self._columns[name]
+
+    def streak(self, name, direction):
+        key = (name, direction)
+        with self._lock:
+            if key not in self._streaks:
+                self._streaks[key] = np.array([_streak(self._series(symbol, name), direction) for symbol in self.symbols])
+            return self._streaks[key]
+
+
+class ScreenTables:
+    # One ScreenTable per universe, rebuilt after the next session close or when the
+    # fundamentals snapshot changes
+
+    def __init__(self, store=None, snapshot=None, states=None):
+        self.store = store
+        self.snapshot = snapshot
+        self.states = states
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def get(self, universe):
+        if universe not in UNIVERSES:
+            raise QueryError(f"Unknown universe {universe!r}: {', '.join(UNIVERSES)}")
+        snapshot = self.snapshot or default_fundamentals()
+        with self._lock:
+            entry = self._tables.get(universe)
+            if entry is not None:
+                table, expires = entry
+                if pd.Timestamp.now(tz=expires.tz) < expires and table.fundamentals is snapshot.frame():
+                    return table
+            symbols = universe_symbols(universe)
+            state = None
+            if self.states is not None:
+                try:
+                    # End-of-day update of the rolling indicators (only the new bars)
+                    state = self.states.sync(universe, symbols)
+                except Exception as e:
+                    print(f"Indicator state unavailable for {universe}: {e}")
+            table = ScreenTable.build(symbols, self.store, snapshot, state=state)
+            self._tables[universe] = (table, next_session_close())
+            return table
+
+    def invalidate(self):
+        with self._lock:
+            self._tables.clear()
+
+
+def _json_value(value):
+    return None if value is None or (isinstance(value, float) and np.isnan(value)) else float(value)
+
+
+def run_screen(table, query, sort=None, offset=0, limit=50):
+    # Ranked page of matches: sort is a field name, '-' prefix (the default) for descending,
+    # '+' for ascending
+    fn, fields = compile_query(query)
+    mask = np.asarray(fn(table), dtype=bool)
+    if mask.ndim == 0:
+        mask = np.full(len(table.symbols), bool(mask))
+    matches = np.flatnonzero(mask)
+
+    # (a '+' that arrives unescaped in a query string decodes to a space: '?sort=+roe' is ' roe')
+    sort = sort or "-market_cap"
+    descending = not sort.startswith(('+', ' '))
+    sort_field = sort.strip().lstrip('+-').lower()
+    if not field_kind(sort_field):
+        raise QueryError(f"Unknown sort field {sort_field!r}")
+    keys = table.column(sort_field)[matches]
+    # NaNs last in either direction
+    order = np.lexsort((-keys if descending else keys, np.isnan(keys)))
+    ranked = matches[order]
+
+    limit = max(1, min(limit, SCREEN_MAX_LIMIT))
+    page = ranked[offset:offset + limit]
+    columns = list(dict.fromkeys(fields + [sort_field]))
+    values = {name: table.column(name)[page] for name in columns}
+    results = []
+    for i, row in enumerate(page):
+        symbol = table.symbols[row]
+        results.append({"symbol": symbol, **{name: _json_value(values[name][i]) for name in columns}})
+    return {"query": query, "sort": ("-" if descending else "+") + sort_field, "total": int(len(ranked)),
+            "offset": offset, "limit": limit, "results": results}
+
+
+screen_tables = ScreenTables(states=rolling_states)
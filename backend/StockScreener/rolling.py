@@ -0,0 +1,298 @@
+import os
+import threading
+
+import numpy as np
+
+from StockScreener.engine import Panel, ewm_mean, rolling_mean
+from StockScreener.indicators import MACD_FAST, MACD_SIGNAL, MACD_SLOW, RSI_PERIOD, rsi
+from StockScreener.store import default_store, universe_symbols
+
+# Per-universe rolling indicator state, so an end-of-day bar updates every SMA/EMA/RSI/MACD
+# with O(1) work per symbol instead of recomputing the whole history. SMAs keep a ring
+# buffer of the last `window` values plus a running sum and valid count; EMAs (and RSI's
+# Wilder averages, MACD's EMAs) keep their last value. Semantics match the vectorized
+# full computations in engine.py / indicators.py exactly, including NaN (missing bar) rows.
+INDICATOR_STATE_DIR = os.getenv("INDICATOR_STATE_DIR", "StockScreener/data/indicator_state")
+# Check every sync against a full recomputation and print any mismatch
+INDICATOR_STATE_VERIFY = os.getenv("INDICATOR_STATE_VERIFY", "0") == "1"
+# Bars of history used to bootstrap a new state
+INDICATOR_STATE_BARS = int(os.getenv("INDICATOR_STATE_BARS", "500"))
+
+# (name, field, window): simple moving averages
+SMA_SPECS = (("sma10", "Close", 10), ("sma20", "Close", 20), ("sma50", "Close", 50), ("sma200", "Close", 200),
+             ("vsma20", "Volume", 20))
+# (name, field, span): exponential moving averages (adjust=False, ignore_na=True)
+EMA_SPECS = (("ema20", "Close", 20), ("ema50", "Close", 50), ("vema20", "Volume", 20))
+
+STATE_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def _ema_step(current, row, span):
+    # One row of engine.ewm_mean
+    alpha = 2.0 / (span + 1.0)
+    return np.where(np.isnan(current), row, np.where(np.isnan(row), current, alpha * row + (1 - alpha) * current))
+
+
+class RollingState:
+
+    def __init__(self, symbols, sma_specs=SMA_SPECS, ema_specs=EMA_SPECS):
+        self.symbols = list(symbols)
+        self.sma_specs = sma_specs
+        self.ema_specs = ema_specs
+        n = len(self.symbols)
+        self.rows = 0
+        self.last_date = None
+        self.last_bar = {field: np.full(n, np.nan) for field in STATE_FIELDS}
+        self.buffers = {name: np.full((window, n), np.nan) for name, _, window in sma_specs}
+        self.sums = {name: np.zeros(n) for name, _, _ in sma_specs}
+        self.counts = {name: np.zeros(n, dtype=np.int64) for name, _, _ in sma_specs}
+        self.emas = {name: np.full(n, np.nan) for name, _, _ in ema_specs}
+        self.prev_close = np.full(n, np.nan)
+        self.avg_gain = np.full(n, np.nan)
+        self.avg_loss = np.full(n, np.nan)
+        self.macd_fast = np.full(n, np.nan)
+        self.macd_slow = np.full(n, np.nan)
+        self.macd_signal = np.full(n, np.nan)
+        self.macd = np.full(n, np.nan)
+
+    def push(self, date, bar):
+        # Apply one date's bar for every symbol; bar maps field -> (n,) array, NaN = no bar
+        t = self.rows
+        for name, field, window in self.sma_specs:
+            slot = t % window
+            buffer, old, new = self.buffers[name], self.buffers[name][slot], bar[field]
+            old_valid, new_valid = ~np.isnan(old), ~np.isnan(new)
+            self.sums[name] += np.where(new_valid, new, 0.0) - np.where(old_valid, old, 0.0)
+            self.counts[name] += new_valid.astype(np.int64) - old_valid
+            buffer[slot] = new
+            if slot == window - 1:
+                # Re-sum once per window so add/subtract rounding can't accumulate
+                self.sums[name] = np.nansum(buffer, axis=0)
+        for name, field, span in self.ema_specs:
+            self.emas[name] = _ema_step(self.emas[name], bar[field], span)
+
+        close = bar["Close"]
+        delta = close - self.prev_close
+        with np.errstate(invalid='ignore'):
+            gain = np.where(delta > 0, delta, 0.0)
+            loss = np.where(delta < 0, -delta, 0.0)
+        self.avg_gain = _ema_step(self.avg_gain, gain, 2 * RSI_PERIOD - 1)
+        self.avg_loss = _ema_step(self.avg_loss, loss, 2 * RSI_PERIOD - 1)
+        self.prev_close = close
+
+        self.macd_fast = _ema_step(self.macd_fast, close, MACD_FAST)
+        self.macd_slow = _ema_step(self.macd_slow, close, MACD_SLOW)
+        self.macd = self.macd_fast - self.macd_slow if t >= MACD_SLOW - 1 else np.full(len(self.symbols), np.nan)
+        self.macd_signal = _ema_step(self.macd_signal, self.macd, MACD_SIGNAL)
+
+        for field in STATE_FIELDS:
+            self.last_bar[field] = bar[field]
+        self.rows = t + 1
+        self.last_date = np.datetime64(date, 'ns')
+
+    def push_panel(self, panel, start=0):
+        # Push panel rows from `start`; panel columns are matched to self.symbols by name
+        positions = {symbol: j for j, symbol in enumerate(panel.symbols)}
+        index = np.array([positions.get(symbol, -1) for symbol in self.symbols], dtype=np.int64)
+        found = index >= 0
+        for i in range(start, len(panel.dates)):
+            bar = {}
+            for field in STATE_FIELDS:
+                row = np.full(len(self.symbols), np.nan)
+                row[found] = panel[field][i, index[found]]
+                bar[field] = row
+            self.push(panel.dates[i], bar)
+
+    @classmethod
+    def from_panel(cls, panel, symbols=None, **specs):
+        state = cls(symbols if symbols is not None else panel.symbols, **specs)
+        state.push_panel(panel)
+        return state
+
+    def values(self):
+        # Latest value of every indicator: name -> (n,) array
+        out = {field.lower(): values for field, values in self.last_bar.items()}
+        for name, _, window in self.sma_specs:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out[name] = np.where(self.counts[name] == window, self.sums[name] / window, np.nan)
+        out.update(self.emas)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            value = 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        value = np.where(self.avg_loss == 0, 100.0, value)
+        out["rsi"] = value if self.rows >= RSI_PERIOD else np.full(len(self.symbols), np.nan)
+        out["macd"] = self.macd
+        # The signal line is defined from its MACD_SIGNAL-th MACD value on, as in ta
+        signal = self.macd_signal if self.rows >= MACD_SLOW + MACD_SIGNAL - 1 else np.full(len(self.symbols), np.nan)
+        out["macd_signal"] = signal
+        out["macd_hist"] = self.macd - signal
+        return out
+
+    def save(self, path):
+        arrays = {
+            "symbols": np.array(self.symbols), "rows": np.array(self.rows),
+            "last_date": np.array(self.last_date if self.last_date is not None else np.datetime64('NaT'), dtype='datetime64[ns]'),
+            "prev_close": self.prev_close, "avg_gain": self.avg_gain, "avg_loss": self.avg_loss,
+            "macd_fast": self.macd_fast, "macd_slow": self.macd_slow, "macd_signal": self.macd_signal, "macd": self.macd,
+        }
+        for field, values in self.last_bar.items():
+            arrays[f"bar:{field}"] = values
+        for name, _, _ in self.sma_specs:
+            arrays[f"buffer:{name}"] = self.buffers[name]
+            arrays[f"sum:{name}"] = self.sums[name]
+            arrays[f"count:{name}"] = self.counts[name]
+        for name, _, _ in self.ema_specs:
+            arrays[f"ema:{name}"] = self.emas[name]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, sma_specs=SMA_SPECS, ema_specs=EMA_SPECS):
+        with np.load(path) as data:
+            state = cls(data["symbols"].tolist(), sma_specs, ema_specs)
+            state.rows = int(data["rows"])
+            last_date = data["last_date"][()]
+            state.last_date = None if np.isnat(last_date) else last_date
+            for key in ("prev_close", "avg_gain", "avg_loss", "macd_fast", "macd_slow", "macd_signal", "macd"):
+                setattr(state, key, data[key])
+            for field in STATE_FIELDS:
+                state.last_bar[field] = data[f"bar:{field}"]
+            for name, _, window in sma_specs:
+                if f"buffer:{name}" not in data or data[f"buffer:{name}"].shape[0] != window:
+                    raise ValueError(f"Saved state has no {name} buffer")
+                state.buffers[name] = data[f"buffer:{name}"]
+                state.sums[name] = data[f"sum:{name}"]
+                state.counts[name] = data[f"count:{name}"]
+            for name, _, _ in ema_specs:
+                if f"ema:{name}" not in data:
+                    raise ValueError(f"Saved state has no {name} EMA")
+                state.emas[name] = data[f"ema:{name}"]
+        return state
+
+
+def full_values(panel, sma_specs=SMA_SPECS, ema_specs=EMA_SPECS):
+    # The same indicators recomputed over the whole panel (last row), for verification
+    out = {field.lower(): panel[field][-1] for field in STATE_FIELDS}
+    for name, field, window in sma_specs:
+        out[name] = rolling_mean(panel[field], window)[-1]
+    for name, field, span in ema_specs:
+        out[name] = ewm_mean(panel[field], span)[-1]
+    close = panel["Close"]
+    out["rsi"] = rsi(close)[-1]
+    macd = ewm_mean(close, MACD_FAST) - ewm_mean(close, MACD_SLOW)
+    macd[:MACD_SLOW - 1] = np.nan
+    signal = ewm_mean(macd, MACD_SIGNAL)
+    signal[:MACD_SLOW + MACD_SIGNAL - 2] = np.nan
+    out["macd"], out["macd_signal"], out["macd_hist"] = macd[-1], signal[-1], (macd - signal)[-1]
+    return out
+
+
+def verify(state, panel, rtol=1e-7, atol=1e-6):
+    # {indicator: max abs difference} for indicators where the state disagrees with a full
+    # recomputation over `panel` (which must hold the same rows the state was fed)
+    expected = full_values(panel, state.sma_specs, state.ema_specs)
+    positions = {symbol: j for j, symbol in enumerate(panel.symbols)}
+    columns = [positions[symbol] for symbol in state.symbols if symbol in positions]
+    rows = [j for j, symbol in enumerate(state.symbols) if symbol in positions]
+    mismatches = {}
+    for name, values in state.values().items():
+        got, want = values[rows], expected[name][columns]
+        if not np.allclose(got, want, rtol=rtol, atol=atol, equal_nan=True):
+            mismatches[name] = float(np.nanmax(np.abs(got - want)))
+    return mismatches
+
+
+def store_panel(store, symbols, rows=None, start=None):
+    # The last `rows` dates (or those from `start` on) of the symbols' aligned panel,
+    # sliced straight from the store's memory-mapped arrays
+    tails = []
+    for symbol in symbols:
+        dates, values = store.read(symbol)
+        begin = int(np.searchsorted(dates, start)) if start is not None else max(0, len(dates) - (rows or len(dates)))
+        tails.append((np.asarray(dates[begin:]), np.asarray(values[begin:])))
+    nonempty = [dates for dates, _ in tails if len(dates)]
+    all_dates = np.unique(np.concatenate(nonempty)) if nonempty else np.empty(0, dtype='datetime64[ns]')
+    if rows:
+        all_dates = all_dates[-rows:]
+    fields = {field: np.full((len(all_dates), len(symbols)), np.nan) for field in STATE_FIELDS}
+    for j, (dates, values) in enumerate(tails):
+        positions = np.searchsorted(all_dates, dates)
+        keep = positions < len(all_dates)
+        keep[keep] = all_dates[positions[keep]] == dates[keep]
+        for k, field in enumerate(STATE_FIELDS):
+            fields[field][positions[keep], j] = values[keep, k]
+    return Panel(all_dates, list(symbols), fields)
+
+
+class RollingStates:
+    # One persisted RollingState per universe, advanced from the price store
+
+    def __init__(self, store=None, directory=None):
+        self.store = store
+        self.directory = directory or INDICATOR_STATE_DIR
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def _path(self, universe):
+        return os.path.join(self.directory, f"{universe}.npz")
+
+    def _panel(self, symbols, rows=None, start=None):
+        return store_panel(self.store or default_store(), symbols, rows=rows, start=start)
+
+    def _load(self, universe, symbols):
+        state = self._states.get(universe)
+        if state is None and os.path.exists(self._path(universe)):
+            try:
+                state = RollingState.load(self._path(universe))
+            except (ValueError, KeyError, OSError) as e:
+                print(f"Discarding indicator state for {universe}: {e}")
+        if state is not None and (state.symbols != symbols or state.last_date is None):
+            state = None
+        return state
+
+    def sync(self, universe, symbols=None, verify_state=None):
+        # Bring the universe's state up to the store's latest bar; returns the state
+        symbols = list(symbols) if symbols is not None else universe_symbols(universe)
+        verify_state = INDICATOR_STATE_VERIFY if verify_state is None else verify_state
+        with self._lock:
+            state = self._load(universe, symbols)
+            if state is not None:
+                tail = self._panel(symbols, start=state.last_date)
+                # The state's last bar must still be in the store unchanged; the store reloads
+                # history after a split/dividend adjustment (and replaces a revised last bar),
+                # and then the state is rebuilt
+                if not len(tail.dates) or tail.dates[0] != state.last_date or not all(
+                        np.allclose(tail[field][0], state.last_bar[field], rtol=1e-9, equal_nan=True)
+                        for field in state.last_bar):
+                    state = None
+                else:
+                    state.push_panel(tail, start=1)
+            if state is None:
+                state = RollingState.from_panel(self._panel(symbols, rows=INDICATOR_STATE_BARS))
+            self._states[universe] = state
+            state.save(self._path(universe))
+
+        if verify_state:
+            mismatches = verify(state, self._panel(symbols, rows=state.rows))
+            if mismatches:
+                print(f"Indicator state for {universe} differs from full recomputation: {mismatches}")
+        return state
+
+    def get(self, universe):
+        return self._states.get(universe)
+
+
+rolling_states = RollingStates()
+
+
+if __name__ == "__main__":
+    # End-of-day update: python -m StockScreener.rolling [universe ...] [--verify]
+    import sys
+
+    from StockScreener.store import UNIVERSES
+
+    for name in [arg for arg in sys.argv[1:] if not arg.startswith('--')] or list(UNIVERSES):
+        state = rolling_states.sync(name, verify_state="--verify" in sys.argv or None)
+        print(f"{name}: {len(state.symbols)} symbols, {state.rows} bars, last {state.last_date}")
@@ -0,0 +1,284 @@
+import asyncio
+import functools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from StockScreener.cache import LRUCache
+from StockScreener.engine import BREAKOUT_RULES, Panel, screen
+from StockScreener.fetch import YFinanceSource, chunked
+from StockScreener.metrics import fetch_symbol_seconds, process_memory, scan_symbols, timed
+from StockScreener.store import MARKET_TZ, next_session_close
+
+# Process-wide pool the blocking fetch + evaluate work runs on, so the event loop stays free
+SCAN_MAX_WORKERS = int(os.getenv("SCAN_MAX_WORKERS", "16"))
+# Default number of chunks a single scan keeps in flight
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "4"))
+# Smaller than the batch-download default so matches start streaming early
+SCAN_CHUNK_SIZE = int(os.getenv("SCAN_CHUNK_SIZE", "25"))
+# A chunk taking longer than this is reported as failed instead of holding up the scan
+SCAN_TIMEOUT = float(os.getenv("SCAN_TIMEOUT", "120"))
+# A chunk's panel keeps only the last SCAN_LOOKBACK_BARS sessions per symbol (the 6mo window
+# covers SMA50 plus the EMA warm-up), stored as SCAN_DTYPE; it is dropped once the chunk is
+# evaluated, so a scan holds at most `concurrency` chunks however long the symbol list is
+SCAN_LOOKBACK_BARS = int(os.getenv("SCAN_LOOKBACK_BARS", "130"))
+SCAN_DTYPE = np.dtype(os.getenv("SCAN_DTYPE", "float32"))
+# A scan in which some chunks failed (source down, timeouts) is served from memory only
+# this long, so the next request retries instead of getting the partial result all day
+SCAN_PARTIAL_TTL = float(os.getenv("SCAN_PARTIAL_TTL", "60"))
+# Finished scans kept in memory; uploaded watchlists each get an entry, so this is bounded
+SCAN_CACHE_MAX_ENTRIES = int(os.getenv("SCAN_CACHE_MAX_ENTRIES", "64"))
+SCAN_CACHE_MAX_BYTES = int(os.getenv("SCAN_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# Largest uploaded watchlist accepted (the whole NSE equity list is ~2000 symbols)
+SCAN_MAX_SYMBOLS = int(os.getenv("SCAN_MAX_SYMBOLS", "5000"))
+
+_executor = None
+
+
+def scan_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=SCAN_MAX_WORKERS, thread_name_prefix="scan")
+    return _executor
+
+
+def ndjson(payload):
+    return json.dumps(payload).encode('utf-8') + b'\n'
+
+
+def screen_frames(frames, rule=BREAKOUT_RULES, bars=None, dtype=None):
+    # Symbols among one chunk's frames passing the rule on the latest bar
+    if not frames:
+        return []
+    panel = Panel.from_frames(frames, dtype=dtype or SCAN_DTYPE, bars=bars or SCAN_LOOKBACK_BARS)
+    return screen(panel, rule)
+
+
+def scan_chunk(symbols, source=None, period="6mo", rule=BREAKOUT_RULES):
+    # Blocking unit of work: one batched download plus one vectorized evaluation; only the
+    # match list outlives the call
+    source = source or YFinanceSource()
+    start = time.perf_counter()
+    with timed("fetch"):
+        frames = source.frames(symbols, period=period, interval="1d")
+    fetch_symbol_seconds.observe((time.perf_counter() - start) / max(len(symbols), 1), source=type(source).__name__)
+    missing = [symbol for symbol in symbols if symbol not in frames]
+    with timed("evaluate"):
+        matches = screen_frames(frames, rule)
+    scan_symbols.inc(len(symbols) - len(missing), outcome="fetched")
+    scan_symbols.inc(len(missing), outcome="missing")
+    scan_symbols.inc(len(matches), outcome="matched")
+    return matches, missing
+
+
+async def scan_stream(symbols, source=None, concurrency=None, chunk_size=None, rule=BREAKOUT_RULES, timeout=None):
+    # Async NDJSON generator: progress and partial matches are emitted as each chunk
+    # completes (in completion order); the final {"stocks": [...]} keeps universe order
+    symbols = list(dict.fromkeys(symbols))
+    total_items = len(symbols)
+    concurrency = max(1, min(concurrency or SCAN_CONCURRENCY, SCAN_MAX_WORKERS))
+    timeout = timeout or SCAN_TIMEOUT
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def run(chunk):
+        async with semaphore:
+            future = loop.run_in_executor(scan_executor(), scan_chunk, chunk, source, "6mo", rule)
+            try:
+                matches, missing = await asyncio.wait_for(future, timeout)
+                return chunk, matches, missing, None
+            except Exception as e:
+                # On timeout the worker thread finishes in the background; the scan moves on
+                return chunk, [], chunk, e
+
+    tasks = [asyncio.ensure_future(run(chunk)) for chunk in chunked(symbols, chunk_size or SCAN_CHUNK_SIZE)]
+    found = set()
+    done = 0
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            chunk, matches, missing, error = await next_done
+            done += len(chunk)
+            if error is not None:
+                failed += 1
+                print(f"Error scanning chunk starting at {chunk[0]}: {error!r}")
+            for symbol in missing:
+                print(f"Skipping {symbol}: Empty DataFrame from yfinance")
+            found.update(matches)
+            yield ndjson({"progress": done / total_items, "status": f"Scanned {done}/{total_items} symbols...", "matches": matches})
+    finally:
+        # Client went away: don't leave queued chunks waiting for the pool
+        for task in tasks:
+            task.cancel()
+
+    stockList = [symbol for symbol in symbols if symbol in found]
+    peak = process_memory()["peak_rss_bytes"]
+    status = f"Scan complete. Found {len(stockList)} stocks." + (f" {failed} chunks failed." if failed else "")
+    yield ndjson({"progress": 1.0, "status": status,
+                  "failed_chunks": failed, "peak_rss_mb": round(peak / 2 ** 20, 1) if peak else None})
+    yield ndjson({"stocks": stockList})
+
+
+class _ScanRun:
+    # One in-flight scan; every subscriber replays the lines emitted so far, then follows live
+
+    def __init__(self):
+        self.lines = []
+        self.finished = False
+        self.failed = False
+        self._changed = asyncio.Condition()
+
+    async def publish(self, line):
+        async with self._changed:
+            self.lines.append(line)
+            self._changed.notify_all()
+
+    async def finish(self, failed=False):
+        async with self._changed:
+            self.finished = True
+            self.failed = failed
+            self._changed.notify_all()
+
+    async def follow(self):
+        position = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda position=position: self.finished or len(self.lines) > position)
+                pending = self.lines[position:]
+                finished = self.finished
+            for line in pending:
+                yield line
+            position += len(pending)
+            if finished and position == len(self.lines):
+                return
+
+
+class ScanCoordinator:
+    # Process-wide: identical concurrent scans share one run, and the finished result is
+    # served from memory until the next market bar closes
+
+    def __init__(self):
+        self._runs = {}
+        # The asyncio tasks driving the runs (the loop itself only keeps weak references)
+        self._tasks = {}
+        self._results = LRUCache(max_bytes=SCAN_CACHE_MAX_BYTES, max_entries=SCAN_CACHE_MAX_ENTRIES,
+                                 sizeof=lambda cached: sum(len(line) for line in cached['lines']))
+        # Called as callback(key, stocks) on a worker thread after each successful scan
+        self.on_complete = []
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.partial = 0
+
+    def _cached(self, key):
+        cached = self._results.get(key)
+        if cached is None:
+            return None
+        if pd.Timestamp.now(tz=MARKET_TZ) >= cached['expires_at']:
+            self._results.pop(key)
+            return None
+        return cached
+
+    def _sweep(self, now):
+        for key, cached in self._results.items():
+            if now >= cached['expires_at']:
+                self._results.pop(key)
+
+    def _forget_task(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    async def _run(self, key, run, symbols, scan_kwargs):
+        # Only a scan that reached its final {"stocks": [...]} line is cached; a cancelled
+        # one (CancelledError isn't an Exception) finishes its followers and propagates
+        completed = False
+        try:
+            async for line in scan_stream(symbols, **scan_kwargs):
+                await run.publish(line)
+            completed = True
+        except Exception as e:
+            print(f"Error during {key} scan: {e}")
+            await run.publish(ndjson({"progress": 1.0, "status": f"Scan failed: {e}"}))
+        finally:
+            if completed:
+                finished_at = pd.Timestamp.now(tz=MARKET_TZ)
+                expires_at = next_session_close(finished_at)
+                # The status line just before {"stocks": [...]} counts the chunks that failed
+                partial = len(run.lines) >= 2 and json.loads(run.lines[-2]).get("failed_chunks", 0) > 0
+                if partial:
+                    self.partial += 1
+                    expires_at = min(expires_at, finished_at + pd.Timedelta(seconds=SCAN_PARTIAL_TTL))
+                self._sweep(finished_at)
+                self._results.put(key, {
+                    'lines': run.lines,
+                    'finished_at': finished_at,
+                    'expires_at': expires_at,
+                    'partial': partial,
+                })
+            self._runs.pop(key, None)
+            await run.finish(failed=not completed)
+        if completed:
+            self._notify(key, run.lines)
+
+    def _notify(self, key, lines):
+        stocks = json.loads(lines[-1]).get("stocks", []) if lines else []
+        loop = asyncio.get_running_loop()
+        for callback in self.on_complete:
+            loop.run_in_executor(None, callback, key, stocks)
+
+    async def subscribe(self, key, symbols, **scan_kwargs):
+        cached = self._cached(key)
+        if cached is not None:
+            self.hits += 1
+            for line in cached['lines']:
+                yield line
+            return
+
+        run = self._runs.get(key)
+        if run is None:
+            self.misses += 1
+            run = self._runs[key] = _ScanRun()
+            # Not tied to any one client: the scan completes (and is cached) even if they disconnect
+            task = self._tasks[key] = asyncio.ensure_future(self._run(key, run, symbols, scan_kwargs))
+            task.add_done_callback(functools.partial(self._forget_task, key))
+        else:
+            self.coalesced += 1
+
+        async for line in run.follow():
+            yield line
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._results.clear()
+        else:
+            self._results.pop(key)
+
+    def stats(self):
+        now = pd.Timestamp.now(tz=MARKET_TZ)
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "partial": self.partial,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "running": sorted(self._runs),
+            "entries": len(self._results),
+            "bytes": self._results.size,
+            "evictions": self._results.evictions,
+            "cached": {
+                key: {
+                    "age_seconds": (now - cached['finished_at']).total_seconds(),
+                    "expires_at": cached['expires_at'].isoformat(),
+                    "partial": cached['partial'],
+                }
+                for key, cached in self._results.items()
+            },
+        }
+
+
+scan_coordinator = ScanCoordinator()
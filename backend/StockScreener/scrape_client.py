@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared HTTP client for screener.in: pooled keep-alive connections, timeouts, retries with
+# jittered backoff, a token-bucket rate limit and a disk cache revalidated with
+# ETag / Last-Modified. SCREENER_BASE_URL can point at a local fixture server.
+SCREENER_BASE_URL = os.getenv("SCREENER_BASE_URL", "https://www.screener.in")
+SCRAPE_CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", "StockScreener/data/screener")
+# Cached pages younger than this are served without contacting the server
+SCRAPE_CACHE_FRESH_SECONDS = float(os.getenv("SCRAPE_CACHE_FRESH_SECONDS", "3600"))
+SCRAPE_CONNECT_TIMEOUT = float(os.getenv("SCRAPE_CONNECT_TIMEOUT", "5"))
+SCRAPE_READ_TIMEOUT = float(os.getenv("SCRAPE_READ_TIMEOUT", "15"))
+SCRAPE_RETRIES = int(os.getenv("SCRAPE_RETRIES", "3"))
+SCRAPE_BACKOFF = float(os.getenv("SCRAPE_BACKOFF", "0.5"))
+# Longest single wait between retries, including a server-sent Retry-After
+SCRAPE_MAX_BACKOFF = float(os.getenv("SCRAPE_MAX_BACKOFF", "30"))
+# Sustained requests per second and burst size
+SCRAPE_RATE = float(os.getenv("SCRAPE_RATE", "2"))
+SCRAPE_BURST = int(os.getenv("SCRAPE_BURST", "5"))
+SCRAPE_POOL_SIZE = int(os.getenv("SCRAPE_POOL_SIZE", "10"))
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+class ScrapeError(Exception):
+    pass
+
+
+class TokenBucket:
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # Blocks until a token is available
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ScrapeClient:
+
+    def __init__(self, base_url=None, cache_dir=None, fresh_seconds=None, rate=None, burst=None,
+                 retries=None, timeout=None):
+        self.base_url = (base_url or SCREENER_BASE_URL).rstrip('/')
+        self.cache_dir = cache_dir or SCRAPE_CACHE_DIR
+        self.fresh_seconds = SCRAPE_CACHE_FRESH_SECONDS if fresh_seconds is None else fresh_seconds
+        self.retries = SCRAPE_RETRIES if retries is None else retries
+        self.timeout = timeout or (SCRAPE_CONNECT_TIMEOUT, SCRAPE_READ_TIMEOUT)
+        self.bucket = TokenBucket(rate or SCRAPE_RATE, burst or SCRAPE_BURST)
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept": "text/html"})
+        adapter = HTTPAdapter(pool_connections=SCRAPE_POOL_SIZE, pool_maxsize=SCRAPE_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats = {"requests": 0, "fresh_hits": 0, "revalidated": 0, "downloaded": 0, "stale_served": 0, "retries": 0}
+
+    def _cache_paths(self, key):
+        safe = key if key.replace('-', '').replace('_', '').replace('&', '').isalnum() else hashlib.sha1(key.encode()).hexdigest()
+        base = os.path.join(self.cache_dir, safe)
+        return base + '.html', base + '.json'
+
+    def _read_cache(self, key):
+        body_path, meta_path = self._cache_paths(key)
+        if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+            return None, None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            return f.read(), meta
+
+    def _write_cache(self, key, body, meta):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        body_path, meta_path = self._cache_paths(key)
+        for path, data, mode in ((body_path, body, 'wb'), (meta_path, json.dumps(meta), 'w')):
+            # A unique temp file per write, so concurrent fetches of one page can't interleave
+            with tempfile.NamedTemporaryFile(mode, dir=self.cache_dir, prefix=os.path.basename(path) + '.',
+                                             suffix='.tmp', delete=False) as f:
+                f.write(data)
+            os.replace(f.name, path)
+
+    def _request(self, url, headers):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+            self.bucket.acquire()
+            self.stats["requests"] += 1
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                delay = SCRAPE_BACKOFF * 2 ** attempt
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                last_error = ScrapeError(f"HTTP {response.status_code} for {url}")
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else SCRAPE_BACKOFF * 2 ** attempt
+            if attempt < self.retries:
+                # Full jitter so a batch of lookups doesn't retry in lockstep
+                time.sleep(random.uniform(0, min(delay, SCRAPE_MAX_BACKOFF)))
+        raise ScrapeError(f"Giving up on {url}: {last_error}")
+
+    def get(self, path, key=None):
+        # Body of base_url + path, from the disk cache when fresh or not modified
+        key = key or path.strip('/').replace('/', '_')
+        body, meta = self._read_cache(key)
+        if body is not None and time.time() - meta.get("fetched_at", 0) < self.fresh_seconds:
+            self.stats["fresh_hits"] += 1
+            return body
+
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        url = self.base_url + path
+        try:
+            response = self._request(url, headers)
+        except ScrapeError:
+            if body is not None:
+                print(f"Serving stale cached page for {key}: fetch failed")
+                self.stats["stale_served"] += 1
+                return body
+            raise
+
+        if response.status_code == 304 and body is not None:
+            self.stats["revalidated"] += 1
+            meta["fetched_at"] = time.time()
+            self._write_cache(key, body, meta)
+            return body
+        if response.status_code != 200:
+            raise ScrapeError(f"Failed to fetch {url}. Status code: {response.status_code}")
+
+        self.stats["downloaded"] += 1
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        self._write_cache(key, response.content, meta)
+        return response.content
+
+    def company_page(self, ticker):
+        ticker = ticker.replace('.NS', '')
+        return self.get(f"/company/{ticker}/", key=ticker)
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_scrape_client():
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = ScrapeClient()
+    return _default_client
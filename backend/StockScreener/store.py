@@ -0,0 +1,311 @@
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from StockScreener.fetch import OHLCV_COLUMNS, PriceSource, YFinanceSource, fetch_prices, period_start
+
+# On-disk layout, one directory per YF symbol:
+#   <root>/<SYMBOL>/CURRENT            name of the live generation
+#   <root>/<SYMBOL>/dates-<gen>.npy    datetime64[ns] session dates (ascending)
+#   <root>/<SYMBOL>/ohlcv-<gen>.npy    float64 (n_bars, 5) in OHLCV_COLUMNS order
+# Both arrays are opened with mmap_mode='r' so windows are served straight from the page
+# cache. A write saves a new generation and then swaps CURRENT with a single rename, so a
+# reader always gets a dates/ohlcv pair from the same write.
+STORE_DIR = os.getenv("PRICE_STORE_DIR", "StockScreener/data/prices")
+# History downloaded the first time a symbol is seen
+BACKFILL_PERIOD = os.getenv("PRICE_STORE_BACKFILL", "2y")
+# Don't ask the source again for a symbol checked this recently (covers holidays)
+REFRESH_SECONDS = int(os.getenv("PRICE_STORE_REFRESH_SECONDS", "900"))
+# A stored close that moved more than this on re-download means the history was re-adjusted
+ADJUSTMENT_TOLERANCE = 0.005
+# Times read() re-resolves CURRENT when a writer retires the generation it just named
+READ_ATTEMPTS = 5
+
+UNIVERSES = {
+    "nifty500": "StockScreener/ind_nifty500list.csv",
+    "microcap250": "StockScreener/ind_niftymicrocap250_list.csv",
+}
+
+MARKET_TZ = "Asia/Kolkata"
+MARKET_CLOSE = (15, 30)
+
+
+def universe_symbols(name):
+    df = pd.read_csv(UNIVERSES[name])
+    return list(df['Symbol'] + '.NS')
+
+
+def latest_session(now=None):
+    # Date of the most recent completed daily bar (weekends only; exchange holidays are
+    # handled by REFRESH_SECONDS throttling instead of a holiday calendar)
+    now = now or pd.Timestamp.now(tz=MARKET_TZ)
+    day = now.normalize().tz_localize(None)
+    if (now.hour, now.minute) < MARKET_CLOSE:
+        day -= pd.Timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= pd.Timedelta(days=1)
+    return day
+
+
+def next_session_close(now=None):
+    # Timestamp of the next daily bar close after `now` (weekdays at MARKET_CLOSE)
+    now = now or pd.Timestamp.now(tz=MARKET_TZ)
+    close = now.normalize() + pd.Timedelta(hours=MARKET_CLOSE[0], minutes=MARKET_CLOSE[1])
+    if close <= now:
+        close += pd.Timedelta(days=1)
+    while close.weekday() >= 5:
+        close += pd.Timedelta(days=1)
+    return close
+
+
+def _naive_dates(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize().values.astype('datetime64[ns]')
+
+
+def completed_bars(frame, now=None):
+    # OHLCV rows of sessions that have closed; a bar downloaded during market hours is
+    # still moving and must not be stored as that day's final bar
+    frame = frame[OHLCV_COLUMNS].dropna(subset=['Close'])
+    return frame[_naive_dates(frame.index) <= np.datetime64(latest_session(now), 'ns')]
+
+
+class PriceStore:
+
+    def __init__(self, root=None, source=None):
+        self.root = root or STORE_DIR
+        self.source = source or YFinanceSource()
+        self._lock = threading.Lock()
+
+    def _paths(self, symbol):
+        folder = os.path.join(self.root, symbol)
+        return folder, os.path.join(folder, 'CURRENT')
+
+    def _generation_paths(self, folder, generation):
+        return os.path.join(folder, f'dates-{generation}.npy'), os.path.join(folder, f'ohlcv-{generation}.npy')
+
+    def _generation(self, symbol):
+        _, current_path = self._paths(symbol)
+        try:
+            with open(current_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def read(self, symbol):
+        # Memory-mapped (dates, values); empty arrays when the symbol is not stored
+        folder, _ = self._paths(symbol)
+        for _ in range(READ_ATTEMPTS):
+            generation = self._generation(symbol)
+            if generation is None:
+                return np.empty(0, dtype='datetime64[ns]'), np.empty((0, len(OHLCV_COLUMNS)))
+            dates_path, values_path = self._generation_paths(folder, generation)
+            try:
+                return np.load(dates_path, mmap_mode='r'), np.load(values_path, mmap_mode='r')
+            except FileNotFoundError:
+                # Superseded and removed between reading CURRENT and opening it
+                continue
+        raise RuntimeError(f"{symbol}: price store generation kept changing while reading")
+
+    def last_date(self, symbol):
+        dates, _ = self.read(symbol)
+        return pd.Timestamp(dates[-1]) if len(dates) else None
+
+    def first_date(self, symbol):
+        dates, _ = self.read(symbol)
+        return pd.Timestamp(dates[0]) if len(dates) else None
+
+    def _write(self, symbol, dates, values):
+        folder, current_path = self._paths(symbol)
+        os.makedirs(folder, exist_ok=True)
+        previous = self._generation(symbol)
+        generation = uuid.uuid4().hex
+        dates_path, values_path = self._generation_paths(folder, generation)
+        np.save(values_path, values)
+        np.save(dates_path, dates)
+        # Publish both arrays at once; the pointer is swapped with one atomic rename
+        tmp = f'{current_path}.{generation}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(generation)
+        os.replace(tmp, current_path)
+        if previous is not None:
+            # Readers that already mapped the old pair keep it until they drop it
+            for path in self._generation_paths(folder, previous):
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Already gone, or still mapped on a platform that refuses to unlink it
+                    pass
+
+    def _touch(self, symbol):
+        _, current_path = self._paths(symbol)
+        if os.path.exists(current_path):
+            os.utime(current_path)
+
+    def _checked_recently(self, symbol):
+        _, current_path = self._paths(symbol)
+        return os.path.exists(current_path) and time.time() - os.path.getmtime(current_path) < REFRESH_SECONDS
+
+    def _written_before_close(self, symbol, day):
+        # True when the stored bars predate `day`'s close, i.e. its bar may be intraday
+        _, current_path = self._paths(symbol)
+        close = pd.Timestamp(day).tz_localize(MARKET_TZ) + pd.Timedelta(hours=MARKET_CLOSE[0], minutes=MARKET_CLOSE[1])
+        return os.path.exists(current_path) and os.path.getmtime(current_path) < close.timestamp()
+
+    def write_frame(self, symbol, frame):
+        frame = completed_bars(frame)
+        dates = _naive_dates(frame.index)
+        values = frame.to_numpy(dtype=np.float64)
+        with self._lock:
+            self._write(symbol, dates, values)
+
+    def append(self, symbol, frame):
+        # Merge freshly downloaded bars; returns False when the overlap shows the
+        # history was re-adjusted (split/dividend) and a full reload is needed.
+        # The overlapping bar is replaced by the downloaded one, which is the final
+        # version if the stored one was fetched before its session closed.
+        frame = completed_bars(frame)
+        new_dates = _naive_dates(frame.index)
+        new_values = frame.to_numpy(dtype=np.float64)
+
+        with self._lock:
+            dates, values = self.read(symbol)
+            if len(dates) == 0:
+                self._write(symbol, new_dates, new_values)
+                return True
+
+            overlap = np.searchsorted(new_dates, dates[-1])
+            replaces_last = overlap < len(new_dates) and new_dates[overlap] == dates[-1]
+            if replaces_last:
+                old_close = values[-1, OHLCV_COLUMNS.index('Close')]
+                new_close = new_values[overlap, OHLCV_COLUMNS.index('Close')]
+                if old_close and abs(new_close / old_close - 1) > ADJUSTMENT_TOLERANCE:
+                    return False
+
+            fresh = len(new_dates) - overlap - int(replaces_last)
+            unchanged = not replaces_last or np.array_equal(values[-1], new_values[overlap], equal_nan=True)
+            if fresh or not unchanged:
+                keep = len(dates) - int(replaces_last)
+                self._write(symbol,
+                            np.concatenate([dates[:keep], new_dates[overlap:]]),
+                            np.concatenate([values[:keep], new_values[overlap:]]))
+            else:
+                self._touch(symbol)
+            return True
+
+    def sync(self, symbols, force=False):
+        # Fetch only the bars missing since each symbol's last stored date.
+        # Symbols are grouped by last date so each group is one batched download.
+        target = latest_session()
+        backfill = []
+        groups = {}
+        for symbol in dict.fromkeys(symbols):
+            last = self.last_date(symbol)
+            if last is None:
+                backfill.append(symbol)
+            elif ((last < target or self._written_before_close(symbol, last))
+                  and (force or not self._checked_recently(symbol))):
+                groups.setdefault(last, []).append(symbol)
+
+        reload = []
+        for last, group in groups.items():
+            # Start from the last stored bar (inclusive) so the overlap can be compared
+            frames = fetch_prices(group, source=self.source, start=last.strftime('%Y-%m-%d'))
+            for symbol in group:
+                if symbol not in frames:
+                    self._touch(symbol)
+                elif not self.append(symbol, frames[symbol]):
+                    print(f"Reloading {symbol}: stored history no longer matches adjusted prices")
+                    reload.append(symbol)
+
+        for symbols_to_load in (backfill, reload):
+            if not symbols_to_load:
+                continue
+            frames = fetch_prices(symbols_to_load, source=self.source, period=BACKFILL_PERIOD)
+            for symbol, frame in frames.items():
+                self.write_frame(symbol, frame)
+
+    def extend(self, symbols, start):
+        # Re-download the whole history from `start` for symbols whose stored bars begin later
+        # (the regular backfill is only PRICE_STORE_BACKFILL deep); returns those symbols.
+        # A week of slack covers a start that falls on a weekend or holiday.
+        start = pd.Timestamp(start)
+        short = [symbol for symbol in dict.fromkeys(symbols)
+                 if self.first_date(symbol) is None or self.first_date(symbol) > start + pd.Timedelta(days=7)]
+        if short:
+            frames = fetch_prices(short, source=self.source, start=start.strftime('%Y-%m-%d'))
+            for symbol, frame in frames.items():
+                self.write_frame(symbol, frame)
+        return short
+
+    def sync_universe(self, name, force=False):
+        self.sync(universe_symbols(name), force=force)
+
+    def window(self, symbol, period=None, bars=None, sync=False):
+        # DataFrame view over the memory-mapped arrays (no parsing, no copy)
+        if sync:
+            self.sync([symbol])
+        dates, values = self.read(symbol)
+        start = 0
+        if len(dates) and period:
+            begin = period_start(period, pd.Timestamp(dates[-1]))
+            if begin is not None:
+                start = int(np.searchsorted(dates, np.datetime64(begin)))
+        if bars:
+            start = max(start, len(dates) - bars)
+        index = pd.DatetimeIndex(dates[start:], name='Date')
+        return pd.DataFrame(values[start:], index=index, columns=OHLCV_COLUMNS, copy=False)
+
+
+class StorePriceSource(PriceSource):
+    # Serves PriceSource.download from the store, syncing missing bars first
+
+    def __init__(self, store=None, sync=True):
+        self.store = store or PriceStore()
+        self.sync = sync
+
+    def frames(self, symbols, period="6mo", interval="1d", start=None):
+        if interval != "1d":
+            return self.store.source.frames(symbols, period=period, interval=interval, start=start)
+        if self.sync:
+            self.store.sync(symbols)
+        frames = {}
+        for symbol in symbols:
+            df = self.store.window(symbol, period=None if start is not None else period)
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            if not df.empty:
+                frames[symbol] = df
+        return frames
+
+    def download(self, symbols, period="6mo", interval="1d", start=None):
+        frames = self.frames(symbols, period=period, interval=interval, start=start)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+
+_default_store = None
+
+
+def default_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = PriceStore()
+    return _default_store
+
+
+if __name__ == "__main__":
+    # Pre-populate / refresh the store: python -m StockScreener.store [universe ...]
+    import sys
+
+    store = default_store()
+    for name in sys.argv[1:] or list(UNIVERSES):
+        print(f"Syncing {name}...")
+        store.sync_universe(name, force=True)
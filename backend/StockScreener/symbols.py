@@ -0,0 +1,210 @@
+import bisect
+import csv
+import io
+import json
+import re
+import threading
+from collections import Counter
+
+from StockScreener.store import UNIVERSES
+
+# In-memory registry of every listed symbol across the universe CSVs, built once.
+# Hash indexes resolve a company name, NSE symbol, Yahoo symbol or ISIN in O(1); a sorted
+# prefix list plus a trigram index back the typeahead search.
+
+# An NSE ticker ('M&M', 'BAJAJ-AUTO') with an optional exchange suffix; no '/', '..' or spaces
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9][A-Z0-9&_-]{0,24}(\.[A-Z]{1,3})?$')
+
+
+class SymbolRecord:
+    __slots__ = ('name', 'symbol', 'yf_symbol', 'isin', 'industry', 'series', 'universes')
+
+    def __init__(self, name, symbol, isin, industry, series, universes):
+        self.name = name
+        self.symbol = symbol
+        self.yf_symbol = symbol + '.NS'
+        self.isin = isin
+        self.industry = industry
+        self.series = series
+        self.universes = universes
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"SymbolRecord({self.yf_symbol!r}, {self.name!r})"
+
+
+def normalize(text):
+    # Case, punctuation and spacing insensitive: '3M India Ltd.' == '3m india ltd'
+    return ' '.join(re.sub(r'[^0-9a-z&]+', ' ', text.casefold()).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolRegistry:
+
+    def __init__(self, records):
+        self.records = records
+        self.by_name = {}
+        self.by_symbol = {}
+        self.by_yf_symbol = {}
+        self.by_isin = {}
+        prefixes = []
+        self.trigram_index = {}
+        self._ids = {record.symbol: i for i, record in enumerate(records)}
+        for i, record in enumerate(records):
+            self.by_name.setdefault(normalize(record.name), record)
+            self.by_symbol[record.symbol] = record
+            self.by_yf_symbol[record.yf_symbol] = record
+            if record.isin:
+                self.by_isin[record.isin] = record
+            name = normalize(record.name)
+            # Prefix keys: the symbol, the full name and every word of the name, so
+            # 'tata' finds Tata Motors and 'motors' does too
+            keys = {normalize(record.symbol), name}
+            words = name.split()
+            keys.update(' '.join(words[j:]) for j in range(1, len(words)))
+            prefixes.extend((key, i) for key in keys)
+            for gram in trigrams(name) | trigrams(normalize(record.symbol)):
+                self.trigram_index.setdefault(gram, []).append(i)
+        prefixes.sort()
+        self._prefix_keys = [key for key, _ in prefixes]
+        self._prefix_ids = [i for _, i in prefixes]
+
+    @classmethod
+    def from_csvs(cls, universes=None):
+        universes = universes or UNIVERSES
+        records = {}
+        for universe, path in universes.items():
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    symbol = row['Symbol'].strip()
+                    if symbol in records:
+                        records[symbol].universes += (universe,)
+                        continue
+                    records[symbol] = SymbolRecord(
+                        row['Company Name'].strip(), symbol, row.get('ISIN Code', '').strip(),
+                        row.get('Industry', '').strip(), row.get('Series', '').strip(), (universe,),
+                    )
+        return cls(list(records.values()))
+
+    def __len__(self):
+        return len(self.records)
+
+    def lookup(self, key):
+        # Any of: 'TCS.NS', 'TCS', 'INE467B01029', 'Tata Consultancy Services Ltd.'
+        if not key:
+            return None
+        key = key.strip()
+        upper = key.upper()
+        return (self.by_yf_symbol.get(upper) or self.by_symbol.get(upper) or self.by_isin.get(upper)
+                or self.by_name.get(normalize(key)))
+
+    def yf_symbol(self, company_name):
+        record = self.by_name.get(normalize(company_name))
+        return record.yf_symbol if record else None
+
+    def company_name(self, symbol):
+        record = self.lookup(symbol)
+        return record.name if record else None
+
+    def universe(self, name):
+        return [record.yf_symbol for record in self.records if name in record.universes]
+
+    def resolve(self, keys):
+        # Yahoo symbols for a watchlist, in order and de-duplicated; keys the registry doesn't
+        # know (the rest of the exchange) are taken as NSE symbols. They end up in price store
+        # paths, so anything that isn't shaped like a ticker is rejected with ValueError.
+        symbols, invalid = [], []
+        for key in keys:
+            record = self.lookup(key)
+            if record is not None:
+                symbols.append(record.yf_symbol)
+            elif key.strip():
+                key = key.strip().upper()
+                symbol = key if '.' in key else key + '.NS'
+                if SYMBOL_PATTERN.match(symbol):
+                    symbols.append(symbol)
+                else:
+                    invalid.append(key)
+        if invalid:
+            raise ValueError(f"Not ticker symbols: {', '.join(repr(key) for key in invalid[:10])}")
+        return list(dict.fromkeys(symbols))
+
+    def _prefix_matches(self, prefix):
+        start = bisect.bisect_left(self._prefix_keys, prefix)
+        end = bisect.bisect_left(self._prefix_keys, prefix + '\uffff', start)
+        return self._prefix_ids[start:end]
+
+    def search(self, query, limit=10, universe=None):
+        # Typeahead: exact symbol, then symbol / name / word prefixes, then fuzzy trigram matches
+        text = normalize(query or '')
+        if not text:
+            return []
+        scores = {}
+        exact = self.lookup(query.strip().removesuffix('.NS'))
+        if exact is not None:
+            scores[self._ids[exact.symbol]] = 4.0
+        for i in self._prefix_matches(text):
+            record = self.records[i]
+            if normalize(record.symbol).startswith(text):
+                score = 3.0
+            elif normalize(record.name).startswith(text):
+                score = 2.5
+            else:
+                score = 2.0
+            scores[i] = max(scores.get(i, 0.0), score)
+
+        if len(scores) < limit and len(text) >= 3:
+            grams = trigrams(text)
+            counts = Counter(i for gram in grams for i in self.trigram_index.get(gram, ()))
+            for i, shared in counts.items():
+                similarity = shared / len(grams)
+                if similarity >= 0.5:
+                    scores[i] = max(scores.get(i, 0.0), similarity)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.records[item[0]].name))
+        results = []
+        for i, _ in ranked:
+            record = self.records[i]
+            if universe is None or universe in record.universes:
+                results.append(record)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+def parse_watchlist(text):
+    # Keys from an uploaded watchlist: a JSON list (or {"symbols": [...]}), a CSV with a
+    # Symbol column (the NSE equity list and the universe files both have one), or bare
+    # symbols separated by commas, spaces or newlines
+    text = text.lstrip('\ufeff').strip()
+    if text[:1] in ('[', '{'):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get('symbols', [])
+        return [str(item) for item in data]
+    first_line = text.split('\n', 1)[0]
+    header = [column.strip().casefold() for column in first_line.split(',')]
+    if 'symbol' in header:
+        rows = csv.reader(io.StringIO(text))
+        next(rows)
+        column = header.index('symbol')
+        return [row[column] for row in rows if len(row) > column]
+    return re.split(r'[\s,;]+', text) if text else []
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def default_registry():
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = SymbolRegistry.from_csvs()
+    return _default_registry
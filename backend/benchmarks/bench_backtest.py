@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+import time
+
+from benchmarks.fixtures import synthetic_prices, universe_symbols_all
+from StockScreener.backtest import DEFAULT_GRID, backtest, baseline_stats, expand_grid
+from StockScreener.engine import Panel
+
+# Backtest sweep over 5 years (1250 bars) of daily bars for the 750-symbol universe: the
+# default parameter grid on one process and on a worker pool, plus the leave-one-out rule
+# ablation at the default parameters.
+# Run from backend/: python -m benchmarks.bench_backtest [--json] [--workers N]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(bars=1250, workers=None):
+    workers = workers or os.cpu_count() or 1
+    panel = Panel.from_frames(synthetic_prices(universe_symbols_all(), bars=bars, seed=11))
+    combinations = len(expand_grid(DEFAULT_GRID))
+    _, baseline_ms = _timed(lambda: baseline_stats(panel))
+    _, single_ms = _timed(lambda: backtest(panel, workers=1))
+    _, pool_ms = _timed(lambda: backtest(panel, workers=workers))
+    rows, ablate_ms = _timed(lambda: backtest(panel, grid={}, ablate=True, workers=1))
+    return {
+        "symbols": panel.shape[1],
+        "bars": panel.shape[0],
+        "combinations": combinations,
+        "baseline_ms": baseline_ms,
+        "grid_single_process_ms": single_ms,
+        "grid_pool_ms": pool_ms,
+        "pool_workers": workers,
+        "ablation_variants": len(rows),
+        "ablation_ms": ablate_ms,
+    }
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else None
+    results = run(workers=workers)
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results['symbols']} symbols x {results['bars']} bars, {results['combinations']} grid points")
+        print(f"  baseline (every symbol-day): {results['baseline_ms']:8.1f} ms")
+        print(f"  grid, 1 process:             {results['grid_single_process_ms']:8.1f} ms")
+        print(f"  grid, {results['pool_workers']} workers:           {results['grid_pool_ms']:8.1f} ms")
+        print(f"  ablation ({results['ablation_variants']} variants):      {results['ablation_ms']:8.1f} ms")
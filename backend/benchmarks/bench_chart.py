@@ -0,0 +1,65 @@
+import json
+import sys
+import time
+from concurrent.futures import wait
+
+from benchmarks.fixtures import synthetic_prices
+from benchmarks.timing import latency_summary
+from StockScreener.mlpchart.mlpchart import render_chart
+from StockScreener.mlpchart.pool import RenderPool
+
+# Chart render latency (p50 / p99) for the 6-month candlestick + indicator PNG: inline in
+# this process, and through the worker pool with a burst of renders queued at once (the
+# latency a user sees includes the queue wait).
+# Run from backend/: python -m benchmarks.bench_chart [--json] [--renders N] [--workers N]
+
+
+def run(renders=40, workers=2):
+    symbols = [f"SYM{i}.NS" for i in range(renders)]
+    frames = synthetic_prices(symbols, bars=250, seed=9)
+    render_chart(symbols[0], frames[symbols[0]])  # warm-up: imports and font cache
+
+    inline = []
+    for symbol in symbols:
+        start = time.perf_counter()
+        render_chart(symbol, frames[symbol])
+        inline.append((time.perf_counter() - start) * 1000)
+
+    pool = RenderPool(workers=workers, queue_size=renders + 1)
+    try:
+        pool.submit(("warm",), symbols[0], frames[symbols[0]]).result()
+        started, finished = {}, {}
+        begin = time.perf_counter()
+        futures = []
+        for symbol in symbols:
+            started[symbol] = time.perf_counter()
+            future = pool.submit((symbol,), symbol, frames[symbol])
+            future.add_done_callback(lambda _, symbol=symbol: finished.__setitem__(symbol, time.perf_counter()))
+            futures.append(future)
+        wait(futures)
+        elapsed = time.perf_counter() - begin
+        # Done callbacks may land just after wait() returns
+        while len(finished) < len(symbols):
+            time.sleep(0.001)
+        pooled = [(finished[symbol] - started[symbol]) * 1000 for symbol in symbols]
+    finally:
+        pool.shutdown()
+
+    return {
+        "inline": latency_summary(inline),
+        "pool": {**latency_summary(pooled), "workers": workers, "renders_per_second": renders / elapsed},
+        "png_bytes": len(render_chart(symbols[0], frames[symbols[0]])),
+    }
+
+
+if __name__ == "__main__":
+    renders = int(sys.argv[sys.argv.index("--renders") + 1]) if "--renders" in sys.argv else 40
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else 2
+    results = run(renders=renders, workers=workers)
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+    else:
+        for name in ("inline", "pool"):
+            result = results[name]
+            print(f"{name:>7}: p50 {result['p50_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms  ({result['count']} renders)")
+        print(f"   pool: {results['pool']['renders_per_second']:.1f} renders/s on {results['pool']['workers']} workers")
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.fixtures import news_articles, screener_page
+from benchmarks.timing import latency_summary
+
+# End-to-end /stock-screener/details latency under concurrent load, fully offline: screener.in
+# pages from the local fixture server, canned news, the stub analyst instead of the LLM. Each
+# concurrency level first requests symbols never seen before (scrape + parse + news + chart +
+# analysis) and then the same symbols again (fundamentals snapshot and analysis cache hits).
+# Run from backend/: python -m benchmarks.bench_details [--json] [--requests N]
+
+CONCURRENCY = (1, 8, 32)
+
+
+def _prepare(count):
+    # Fixture pages and news for `count` real universe symbols, and the environment that points
+    # the backend at them; must run before the app (or anything reading these settings) is imported
+    root = tempfile.mkdtemp(prefix="bench-details-")
+    pages, news = os.path.join(root, "screener"), os.path.join(root, "news")
+    os.makedirs(pages)
+    os.makedirs(news)
+    os.environ.update({
+        "STOCK_ANALYST": "stub",
+        "ANALYSIS_CACHE_PATH": ":memory:",
+        "FUNDAMENTALS_PATH": os.path.join(root, "fundamentals.npz"),
+        "NEWS_FIXTURE_DIR": news,
+        "SCRAPE_CACHE_DIR": os.path.join(root, "scrape"),
+        # Measure the backend, not the politeness limit towards screener.in
+        "SCRAPE_RATE": "10000",
+        "SCRAPE_BURST": "10000",
+    })
+
+    from StockScreener.news import fixture_slug
+    from StockScreener.symbols import default_registry
+
+    records = default_registry().records[:count]
+    for seed, record in enumerate(records):
+        with open(os.path.join(pages, f"{record.symbol}.html"), "w", encoding="utf-8") as f:
+            f.write(screener_page(record.name, record.symbol, seed=seed))
+        with open(os.path.join(news, f"{fixture_slug(record.name)}.json"), "w", encoding="utf-8") as f:
+            json.dump(news_articles(record.name, seed=seed), f)
+    return [record.yf_symbol for record in records], pages
+
+
+async def _load(client, symbols, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(symbol):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"/stock-screener/details/{symbol}")
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200 or response.json().get("partial"):
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(symbol) for symbol in symbols))
+    elapsed = time.perf_counter() - start
+    return {**latency_summary(latencies), "requests_per_second": len(symbols) / elapsed, "failures": failures}
+
+
+async def _run(app, symbols, per_level):
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.get(f"/stock-screener/details/{symbols[-1]}")  # warm-up: lazy imports
+        offset = 0
+        for concurrency in CONCURRENCY:
+            batch = symbols[offset:offset + per_level]
+            offset += per_level
+            results[f"c{concurrency}"] = {
+                "cold": await _load(client, batch, concurrency),
+                "warm": await _load(client, batch, concurrency),
+            }
+    return results
+
+
+def run(per_level=32):
+    symbols, pages = _prepare(per_level * len(CONCURRENCY) + 1)
+
+    from benchmarks.fixture_server import serve_fixtures
+
+    server, url = serve_fixtures(directory=pages)
+    os.environ["SCREENER_BASE_URL"] = url
+    try:
+        import main
+
+        return asyncio.run(_run(main.app, symbols, per_level))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    per_level = int(sys.argv[sys.argv.index("--requests") + 1]) if "--requests" in sys.argv else 32
+    results = run(per_level)
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+    else:
+        for level, result in results.items():
+            for phase in ("cold", "warm"):
+                r = result[phase]
+                print(f"{level:>4} {phase}: p50 {r['p50_ms']:8.1f} ms  p99 {r['p99_ms']:8.1f} ms  "
+                      f"{r['requests_per_second']:7.1f} req/s  failures {r['failures']}")
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fixtures import synthetic_prices
+
+# Peak memory of a breakout scan as the symbol list grows (a 500-symbol watchlist up to
+# twice the whole NSE equity list), all read from a local price store. "streamed" is the
+# chunked scan the endpoints run; "whole" first aligns every symbol into one float64 panel,
+# the way BreakoutVolume used to. Each scan runs in its own interpreter so its peak RSS
+# is its own; the streamed figure should stay flat as the list grows.
+# Run from backend/: python -m benchmarks.bench_memory [--json]
+
+SIZES = (500, 2000, 4000)
+MODES = ("streamed", "whole")
+
+
+def _symbols(count):
+    return [f"SYN{i:05d}.NS" for i in range(count)]
+
+
+def write_store(directory, count, bars=500, batch=250):
+    from StockScreener.store import PriceStore
+
+    store = PriceStore(directory)
+    symbols = _symbols(count)
+    for start in range(0, count, batch):
+        for symbol, frame in synthetic_prices(symbols[start:start + batch], bars=bars, seed=start).items():
+            store.write_frame(symbol, frame)
+
+
+def _child(directory, count, mode):
+    # One measured scan; prints {"matches", "seconds", "baseline_mb", "peak_mb"}
+    from StockScreener.engine import Panel, screen
+    from StockScreener.metrics import process_memory
+    from StockScreener.scan import scan_stream
+    from StockScreener.store import PriceStore, StorePriceSource
+
+    symbols = _symbols(count)
+    store = PriceStore(directory)
+    source = StorePriceSource(store, sync=False)
+    baseline = process_memory()
+
+    async def streamed():
+        lines = [line async for line in scan_stream(symbols, source=source)]
+        return json.loads(lines[-1])["stocks"]
+
+    start = time.perf_counter()
+    if mode == "streamed":
+        matches = asyncio.run(streamed())
+    else:
+        matches = screen(Panel.from_frames(source.frames(symbols)))
+    seconds = time.perf_counter() - start
+    peak = process_memory()["peak_rss_bytes"]
+    print(json.dumps({
+        "matches": sorted(matches),
+        "seconds": seconds,
+        "baseline_mb": baseline["rss_bytes"] / 2 ** 20,
+        "peak_mb": peak / 2 ** 20,
+    }))
+
+
+def _measure(directory, count, mode):
+    command = [sys.executable, "-m", "benchmarks.bench_memory", "--child", directory, str(count), mode]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(sizes=SIZES):
+    directory = tempfile.mkdtemp(prefix="bench-memory-store-")
+    try:
+        write_store(directory, max(sizes))
+        results = {}
+        for count in sizes:
+            measured = {mode: _measure(directory, count, mode) for mode in MODES}
+            if measured["streamed"]["matches"] != measured["whole"]["matches"]:
+                raise AssertionError(f"streamed and whole-panel scans disagree at {count} symbols")
+            results[str(count)] = {
+                "matches": len(measured["streamed"]["matches"]),
+                **{f"{mode}_scan_mb": measured[mode]["peak_mb"] - measured[mode]["baseline_mb"] for mode in MODES},
+                **{f"{mode}_ms": measured[mode]["seconds"] * 1000 for mode in MODES},
+            }
+        smallest, largest = results[str(min(sizes))], results[str(max(sizes))]
+        results["streamed_growth_mb"] = largest["streamed_scan_mb"] - smallest["streamed_scan_mb"]
+        results["whole_growth_mb"] = largest["whole_scan_mb"] - smallest["whole_scan_mb"]
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        directory, count, mode = sys.argv[sys.argv.index("--child") + 1:][:3]
+        _child(directory, int(count), mode)
+        sys.exit()
+    results = run()
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+    else:
+        for count in SIZES:
+            row = results[str(count)]
+            print(f"{count:5d} symbols, {row['matches']:4d} breakouts: "
+                  f"streamed +{row['streamed_scan_mb']:6.1f} MB peak ({row['streamed_ms']:7.0f} ms)   "
+                  f"whole panel +{row['whole_scan_mb']:6.1f} MB peak ({row['whole_ms']:7.0f} ms)")
+        print(f"growth {min(SIZES)} -> {max(SIZES)} symbols: streamed {results['streamed_growth_mb']:+.1f} MB, "
+              f"whole panel {results['whole_growth_mb']:+.1f} MB")
@@ -0,0 +1,58 @@
+import json
+import sys
+import time
+
+from benchmarks.fixtures import screener_fixture_paths
+from benchmarks.legacy_parser import parse_company_page as legacy_parse
+from StockScreener.parser import BACKENDS, parse_company_page
+
+# Fundamentals parser throughput over the saved screener.in fixtures:
+# the BeautifulSoup extractor the scraper used before vs the single-pass backends.
+# Run from backend/: python -m benchmarks.bench_parser [--json]
+
+
+def _time(fn, pages, repeat):
+    fn(pages[0])  # warm-up (imports, caches)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            fn(html)
+    elapsed = time.perf_counter() - start
+    count = repeat * len(pages)
+    return {"pages": count, "seconds": elapsed, "ms_per_page": elapsed * 1000 / count, "pages_per_second": count / elapsed}
+
+
+def run(repeat=20):
+    pages = []
+    for path in screener_fixture_paths():
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+
+    reference = [legacy_parse(html) for html in pages]
+    results = {"beautifulsoup": _time(legacy_parse, pages, repeat)}
+    for backend in BACKENDS:
+        try:
+            parse = lambda html, backend=backend: parse_company_page(html, backend)
+            if [parse(html) for html in pages] != reference:
+                raise AssertionError(f"{backend} output differs from the BeautifulSoup extractor")
+            results[backend] = _time(parse, pages, repeat)
+        except ImportError as e:
+            results[backend] = {"skipped": str(e)}
+
+    baseline = results["beautifulsoup"]["ms_per_page"]
+    for name, result in results.items():
+        if "ms_per_page" in result:
+            result["speedup"] = baseline / result["ms_per_page"]
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            if "skipped" in result:
+                print(f"{name:>14}: skipped ({result['skipped']})")
+            else:
+                print(f"{name:>14}: {result['ms_per_page']:7.2f} ms/page  {result['speedup']:5.1f}x")
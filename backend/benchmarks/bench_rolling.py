@@ -0,0 +1,76 @@
+import json
+import sys
+import time
+
+import ta
+
+from benchmarks.fixtures import synthetic_prices, universe_symbols_all
+from StockScreener.engine import Panel
+from StockScreener.rolling import RollingState, full_values, verify
+
+# End-of-day indicator update for the whole universe: the per-symbol pandas/ta recompute the
+# scan and chart used to do, a vectorized full recompute over the panel, and the rolling
+# state absorbing just the new bar. The state is checked against the full recompute.
+# Run from backend/: python -m benchmarks.bench_rolling [--json]
+
+
+def _legacy(frames):
+    # What BreakoutVolume + the chart computed per symbol on every request
+    for df in frames.values():
+        close = df['Close']
+        ta.trend.sma_indicator(close, window=20)
+        ta.trend.sma_indicator(close, window=50)
+        ta.trend.sma_indicator(close, window=200)
+        df['Volume'].ewm(span=20, adjust=False).mean()
+        ta.momentum.rsi(close, 14)
+        ta.trend.macd_diff(close)
+
+
+def _best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def run(bars=500, repeat=5):
+    symbols = universe_symbols_all()
+    frames = synthetic_prices(symbols, bars=bars + 1, seed=7)
+    panel = Panel.from_frames(frames)
+    history = Panel(panel.dates[:-1], panel.symbols, {field: values[:-1] for field, values in panel.fields.items()})
+    new_bar = Panel(panel.dates[-1:], panel.symbols, {field: values[-1:] for field, values in panel.fields.items()})
+
+    bootstrap_ms, update_ms = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        state = RollingState.from_panel(history)
+        bootstrap_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        state.push_panel(new_bar)
+        update_ms.append((time.perf_counter() - start) * 1000)
+    update_ms = min(update_ms)
+    mismatches = verify(state, panel)
+
+    results = {
+        "symbols": len(symbols),
+        "bars": bars,
+        "legacy_per_symbol_ms": _best(lambda: _legacy(frames), max(1, repeat // 2)),
+        "vectorized_full_ms": _best(lambda: full_values(panel), repeat),
+        "state_bootstrap_ms": min(bootstrap_ms),
+        "state_update_ms": update_ms,
+        "verify_mismatches": mismatches,
+    }
+    results["speedup_vs_full"] = results["vectorized_full_ms"] / update_ms
+    results["speedup_vs_legacy"] = results["legacy_per_symbol_ms"] / update_ms
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>22}: {value:.2f}" if isinstance(value, float) else f"{key:>22}: {value}")
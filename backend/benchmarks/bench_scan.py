@@ -0,0 +1,71 @@
+import asyncio
+import json
+import sys
+import tempfile
+import time
+
+from benchmarks.fixtures import synthetic_prices, universe_symbols_all
+from StockScreener.engine import Panel, screen
+from StockScreener.scan import scan_stream
+from StockScreener.store import PriceStore, StorePriceSource
+
+# Full-universe breakout scan over 750 synthetic symbols held in a local price store: the
+# streamed, chunked scan the /nifty500 endpoint runs (first pass and repeat), and the rule
+# evaluation alone over one aligned panel.
+# Run from backend/: python -m benchmarks.bench_scan [--json]
+
+
+async def _scan(symbols, source, concurrency=None):
+    lines = [line async for line in scan_stream(symbols, source=source, concurrency=concurrency)]
+    return json.loads(lines[-1])["stocks"]
+
+
+def run(bars=500, repeat=3):
+    symbols = universe_symbols_all()
+    frames = synthetic_prices(symbols, bars=bars, seed=5)
+    store = PriceStore(tempfile.mkdtemp(prefix="bench-store-"))
+    for symbol, frame in frames.items():
+        store.write_frame(symbol, frame)
+    source = StorePriceSource(store, sync=False)
+
+    start = time.perf_counter()
+    matches = asyncio.run(_scan(symbols, source))
+    first_ms = (time.perf_counter() - start) * 1000
+    repeats = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        asyncio.run(_scan(symbols, source))
+        repeats.append((time.perf_counter() - start) * 1000)
+
+    windows = {symbol: store.window(symbol, period="6mo") for symbol in symbols}
+    start = time.perf_counter()
+    panel = Panel.from_frames(windows)
+    align_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    panel_matches = screen(panel)
+    evaluate_ms = (time.perf_counter() - start) * 1000
+    if sorted(panel_matches) != sorted(matches):
+        raise AssertionError("streamed scan and single-panel evaluation disagree")
+
+    best = min(repeats)
+    return {
+        "symbols": len(symbols),
+        "matches": len(matches),
+        "scan_first_ms": first_ms,
+        "scan_ms": best,
+        "scan_symbols_per_second": len(symbols) / best * 1000,
+        "panel_align_ms": align_ms,
+        "panel_evaluate_ms": evaluate_ms,
+    }
+
+
+if __name__ == "__main__":
+    results = run()
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results['symbols']} symbols, {results['matches']} breakouts")
+        print(f"  streamed scan: {results['scan_ms']:8.1f} ms (first {results['scan_first_ms']:.1f} ms), "
+              f"{results['scan_symbols_per_second']:.0f} symbols/s")
+        print(f"  panel align:   {results['panel_align_ms']:8.1f} ms")
+        print(f"  evaluate:      {results['panel_evaluate_ms']:8.1f} ms")
@@ -0,0 +1,92 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold-start cost per entry point: import time (python -X importtime), resident memory after
+# import, and which heavy stacks got loaded. Each sample is a fresh interpreter, so this is
+# also what every uvicorn / scan / render worker pays before doing any work.
+# Run from backend/: python -m benchmarks.bench_startup [--json] [--repeat N]
+
+TARGETS = [
+    "main",
+    "StockScreener.scan",
+    "StockScreener.engine",
+    "StockScreener.store",
+    "StockScreener.screener",
+    "StockScreener.details",
+]
+
+HEAVY_STACKS = ("langchain_groq", "langgraph", "langchain_core", "gnews", "plotly", "matplotlib", "mplchart", "yfinance")
+
+_PROBE = """
+import json, resource, sys
+import {module}
+rss = 0
+try:
+    with open('/proc/self/statm') as f:
+        rss = int(f.read().split()[1]) * resource.getpagesize() // 1024
+except OSError:
+    pass
+print(json.dumps({{
+    "rss_kb": rss,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def _parse_importtime(stderr):
+    # [(name, depth, self_us, cumulative_us)] from -X importtime output
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative)))
+    return rows
+
+
+def measure(module, env=None):
+    probe = _PROBE.format(module=module, heavy=HEAVY_STACKS)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = _parse_importtime(result.stderr)
+    total = next((cumulative for name, depth, _, cumulative in rows if name == module and depth == 0), None)
+    top = sorted(((cumulative, name) for name, depth, _, cumulative in rows if depth <= 1), reverse=True)[:8]
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample["import_ms"] = total / 1000 if total is not None else None
+    sample["top_imports_ms"] = {name: cumulative / 1000 for cumulative, name in top}
+    return sample
+
+
+def run(targets=TARGETS, repeat=3):
+    # No API keys in the environment: importing must not need them any more
+    env = {key: value for key, value in os.environ.items() if key != "GROQ_API_KEY"}
+    results = {}
+    for module in targets:
+        samples = [measure(module, env) for _ in range(repeat)]
+        best = min(samples, key=lambda sample: sample["import_ms"])
+        results[module] = {
+            "import_ms_median": statistics.median(sample["import_ms"] for sample in samples),
+            "import_ms_min": best["import_ms"],
+            "rss_mb": statistics.median(sample["rss_kb"] for sample in samples) / 1024,
+            "max_rss_mb": statistics.median(sample["max_rss_kb"] for sample in samples) / 1024,
+            "heavy_stacks_loaded": best["loaded"],
+            "top_imports_ms": best["top_imports_ms"],
+        }
+    return results
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[sys.argv.index("--repeat") + 1]) if "--repeat" in sys.argv else 3
+    results = run(repeat=repeat)
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, result in results.items():
+            loaded = ", ".join(result["heavy_stacks_loaded"]) or "-"
+            print(f"{module:>24}: {result['import_ms_median']:7.1f} ms  {result['rss_mb']:6.1f} MB RSS  heavy: {loaded}")
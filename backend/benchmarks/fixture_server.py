@@ -0,0 +1,68 @@
+import email.utils
+import hashlib
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fixtures import SCREENER_DIR
+
+# Local stand-in for screener.in serving the saved fixtures at /company/<SYMBOL>/ with
+# ETag / Last-Modified and 304s, so the scrape client can be exercised offline:
+#   python -m benchmarks.fixture_server 8765
+#   SCREENER_BASE_URL=http://127.0.0.1:8765 uvicorn main:app
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    directory = SCREENER_DIR
+    counts = None
+
+    def do_GET(self):
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+        if len(parts) != 2 or parts[0] != 'company':
+            self.send_error(404)
+            return
+        path = os.path.join(self.directory, f"{parts[1]}.html")
+        if not os.path.exists(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        last_modified = email.utils.formatdate(os.path.getmtime(path), usegmt=True)
+        if self.counts is not None:
+            self.counts[parts[1]] = self.counts.get(parts[1], 0) + 1
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(port=0, directory=None):
+    # Starts the server on a daemon thread; returns (server, base_url). server.shutdown() stops it.
+    handler = type('Handler', (FixtureHandler,), {'directory': directory or SCREENER_DIR, 'counts': {}})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server, url = serve_fixtures(port)
+    print(f"Serving screener.in fixtures at {url}/company/<SYMBOL>/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
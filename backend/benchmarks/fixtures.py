@@ -0,0 +1,283 @@
+import json
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+# Offline fixtures for the benchmarks. screener.in pages are generated with the same
+# markup the parsers look for (top ratios, company profile, quarters / profit-loss /
+# shareholding tables) plus the surrounding sections and boilerplate of a real page, so
+# parse time is representative. News fixtures are GNews-shaped article lists including the
+# syndicated duplicates Google News returns. Regenerate with: python -m benchmarks.fixtures
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+SCREENER_DIR = os.path.join(FIXTURE_DIR, "screener")
+NEWS_DIR = os.path.join(FIXTURE_DIR, "news")
+
+MONTHS = ["Mar", "Jun", "Sep", "Dec"]
+
+
+def _periods(count, yearly=False):
+    labels = []
+    year, month = 2013, 0
+    for _ in range(count):
+        labels.append(f"{'Mar' if yearly else MONTHS[month]} {year}")
+        if yearly:
+            year += 1
+        else:
+            month = (month + 1) % 4
+            year += month == 0
+    return labels
+
+
+def _number(rng, scale):
+    return f"{rng.uniform(-0.1, 1.0) * scale:,.0f}"
+
+
+def _table(rng, labels, periods, scale, percent=False, button_rows=()):
+    head = "".join(f'<th class="">{period}</th>' for period in periods)
+    rows = []
+    for label in labels:
+        if label in button_rows:
+            first = (f'<td class="text"><button class="button-plain" onclick="Company.showSchedule(\'{label}\', '
+                     f'\'quarters\', this)">{label}&nbsp;<span class="blue-icon">+</span></button></td>')
+        else:
+            first = f'<td class="text">{label}</td>'
+        if percent:
+            cells = "".join(f"<td>{rng.uniform(0, 75):.2f}%</td>" for _ in periods)
+        else:
+            cells = "".join(f"<td>{_number(rng, scale)}</td>" for _ in periods)
+        rows.append(f'<tr class="stripe">{first}{cells}</tr>')
+    return (f'<div class="responsive-holder fill-card-width"><table class="data-table responsive-text-nowrap">'
+            f'<thead><tr><th class="text"></th>{head}</tr></thead><tbody>{"".join(rows)}</tbody></table></div>')
+
+
+def screener_page(name, symbol, seed=0, quarters=13, years=12):
+    rng = random.Random(seed)
+    pl_rows = ["Sales", "Expenses", "Operating Profit", "OPM %", "Other Income", "Interest", "Depreciation",
+               "Profit before tax", "Tax %", "Net Profit", "EPS in Rs", "Dividend Payout %"]
+    ratios = [("Market Cap", "₹", "Cr."), ("Current Price", "₹", ""), ("High / Low", "₹", ""),
+              ("Stock P/E", "", ""), ("Book Value", "₹", ""), ("Dividend Yield", "", "%"),
+              ("ROCE", "", "%"), ("ROE", "", "%"), ("Face Value", "₹", "")]
+    top = "".join(
+        f'<li class="flex flex-space-between" data-source="default"><span class="name">{label}</span>'
+        f'<span class="nowrap value">{pre}<span class="number">{rng.uniform(1, 5000):,.2f}</span>{post}</span></li>'
+        for label, pre, post in ratios
+    )
+    nav = "".join(f'<li><a href="/company/{symbol}/#{anchor}">{anchor.title()}</a></li>'
+                  for anchor in ("chart", "analysis", "peers", "quarters", "profit-loss", "balance-sheet",
+                                 "cash-flow", "ratios", "shareholding", "documents"))
+    peers = "".join(
+        f'<tr data-row-company-id="{i}"><td class="text">{i}.</td><td class="text"><a href="/company/P{i}/">Peer {i} Ltd</a></td>'
+        + "".join(f"<td>{rng.uniform(1, 900):.2f}</td>" for _ in range(10)) + "</tr>"
+        for i in range(1, 16)
+    )
+    documents = "".join(
+        f'<li><a href="https://www.bseindia.com/xml-data/corpfiling/{seed}{i}.pdf" target="_blank" rel="noopener noreferrer">'
+        f'Announcement {i}<div class="ink-600 smaller">{rng.randint(1, 28)} {MONTHS[i % 4]} - disclosure under Regulation 30</div></a></li>'
+        for i in range(120)
+    )
+    scripts = "".join(f'<script src="https://cdn-static.screener.in/js/bundle-{i}.js"></script>' for i in range(12))
+    shareholding_rows = ["Promoters", "FIIs", "DIIs", "Government", "Public", "No. of Shareholders"]
+
+    def shareholding_table(periods):
+        rows = []
+        for label in shareholding_rows:
+            if label == "No. of Shareholders":
+                cells = "".join(f"<td>{rng.randint(10000, 900000):,}</td>" for _ in periods)
+                first = f'<td class="text">{label}</td>'
+            else:
+                cells = "".join(f"<td>{rng.uniform(0, 75):.2f}%</td>" for _ in periods)
+                first = (f'<td class="text"><button class="button-plain" onclick="Company.showShareholders(\'{label}\')">'
+                         f'{label}&nbsp;<span class="blue-icon">+</span></button></td>')
+            rows.append(f"<tr>{first}{cells}</tr>")
+        head = "".join(f"<th>{period}</th>" for period in periods)
+        return (f'<table class="data-table"><thead><tr><th class="text"></th>{head}</tr></thead>'
+                f'<tbody>{"".join(rows)}</tbody></table>')
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>{name} share price | About {name} | Key Insights - Screener</title>
+<meta name="description" content="{name} · Mkt Cap: ... · Screener">
+<link rel="stylesheet" href="https://cdn-static.screener.in/css/base.css">
+{scripts}
+</head>
+<body class="light flex-column">
+<nav class="u-full-width"><div class="flex flex-space-between container"><ul class="flex">{nav}</ul></div></nav>
+<main class="flex-grow container">
+<div class="card card-large" id="top">
+  <div class="flex flex-space-between flex-gap-8">
+    <div class="flex-row flex-wrap flex-align-center flex-grow">
+      <h1 class="h2 shrink-text" style="margin: 0.5em 0">{name}</h1>
+      <h1 class="margin-0 show-from-tablet-landscape">{name}</h1>
+    </div>
+  </div>
+  <div class="flex flex-align-center">
+    <div class="font-size-18 strong line-height-14">
+      <span>₹ {rng.uniform(50, 5000):,.0f}</span>
+      <span class="font-size-12 up margin-left-4">{rng.uniform(0, 3):.2f}%</span>
+    </div>
+  </div>
+  <div class="company-info">
+    <div class="company-profile">
+      <div class="flex flex-column" style="flex: 1 1;">
+        <div class="title">About</div>
+        <div class="sub show-more-box about" style="flex-basis: 100px">
+          <p>{name} is engaged in {' '.join(rng.choice(['manufacturing', 'services', 'finance', 'infrastructure', 'retail', 'exports']) for _ in range(60))}.</p>
+        </div>
+        <div class="title">Key Points</div>
+        <div class="sub commentary always-show-more-box"><p>{'Lorem ipsum dolor sit amet. ' * 40}</p></div>
+      </div>
+    </div>
+    <div class="company-ratios"><ul id="top-ratios">{top}</ul></div>
+  </div>
+</div>
+<section id="analysis" class="card card-large"><div class="flex flex-column-mobile flex-gap-32">
+  <div class="pros"><p class="title">Pros</p><ul><li>Company has reduced debt.</li><li>Company is almost debt free.</li></ul></div>
+  <div class="cons"><p class="title">Cons</p><ul><li>Stock is trading at {rng.uniform(2, 20):.2f} times its book value</li></ul></div>
+</div></section>
+<section id="peers" class="card card-large"><h2>Peer comparison</h2>
+  <table class="data-table text-nowrap striped mark-visited"><tbody>{peers}</tbody></table></section>
+<section id="quarters" class="card card-large"><h2>Quarterly Results</h2>
+  {_table(rng, pl_rows, _periods(quarters), 10000, button_rows=("Sales", "Expenses", "Net Profit"))}</section>
+<section id="profit-loss" class="card card-large"><h2>Profit &amp; Loss</h2>
+  {_table(rng, pl_rows, _periods(years, yearly=True) + ["TTM"], 40000, button_rows=("Sales", "Expenses", "Net Profit"))}
+  <div class="ranges-table"><table><tr><th colspan="2">Compounded Sales Growth</th></tr>
+  <tr><td>10 Years:</td><td>{rng.randint(1, 30)}%</td></tr><tr><td>5 Years:</td><td>{rng.randint(1, 30)}%</td></tr></table></div></section>
+<section id="balance-sheet" class="card card-large"><h2>Balance Sheet</h2>
+  {_table(rng, ["Equity Capital", "Reserves", "Borrowings", "Other Liabilities", "Total Liabilities", "Fixed Assets",
+                "CWIP", "Investments", "Other Assets", "Total Assets"], _periods(years, yearly=True), 50000)}</section>
+<section id="cash-flow" class="card card-large"><h2>Cash Flows</h2>
+  {_table(rng, ["Cash from Operating Activity", "Cash from Investing Activity", "Cash from Financing Activity",
+                "Net Cash Flow"], _periods(years, yearly=True), 20000)}</section>
+<section id="ratios" class="card card-large"><h2>Ratios</h2>
+  {_table(rng, ["Debtor Days", "Inventory Days", "Days Payable", "Cash Conversion Cycle", "Working Capital Days",
+                "ROCE %"], _periods(years, yearly=True), 100)}</section>
+<section id="shareholding" class="card card-large"><h2>Shareholding Pattern</h2>
+  <div id="quarterly-shp">{shareholding_table(_periods(12))}</div>
+  <div id="yearly-shp" class="hidden">{shareholding_table(_periods(8, yearly=True))}</div></section>
+<section id="documents" class="card card-large"><h2>Documents</h2><ul class="list-links">{documents}</ul></section>
+</main>
+<footer class="bg-base border-top-upper"><div class="container">Made with care in India. Data provided by C-MOTS Internet Technologies Pvt Ltd</div></footer>
+</body>
+</html>
+"""
+
+
+def synthetic_prices(symbols, bars=500, seed=0, end="2024-12-31"):
+    # {symbol: daily OHLCV frame} as geometric random walks on business days
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=end, periods=bars, name='Date')
+    frames = {}
+    for symbol in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, bars)))
+        open_ = close * np.exp(rng.normal(0, 0.005, bars))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, bars))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, bars))
+        volume = rng.lognormal(13, 0.5, bars).round()
+        frames[symbol] = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=dates)
+    return frames
+
+
+NEWS_TEMPLATES = [
+    "{name} Q{quarter} results: net profit rises {pct}% YoY, beats estimates",
+    "{name} shares hit 52-week high after strong order inflows",
+    "{name} board approves interim dividend of Rs {amount} per share",
+    "Brokerages raise target price on {name} after management commentary",
+    "{name} stock falls {pct}% as margins come under pressure",
+    "FIIs increase stake in {name} during the {month} quarter",
+    "{name} announces capacity expansion worth Rs {amount} crore",
+    "{name} bags new contract; shares gain {pct}% in early trade",
+    "Should you buy {name} shares? Analysts weigh in on valuation",
+    "{name} to consider fund raising via QIP at board meeting",
+    "{name} promoter group pledges {pct}% of holding",
+    "{name} management sees double-digit growth in FY{year}",
+    "Mutual funds trim holdings in {name}; here's why",
+    "{name} appoints new chief financial officer",
+    "Technical view: {name} forms bullish flag on daily chart",
+    "{name} receives tax demand notice of Rs {amount} crore",
+    "{name} completes acquisition of a {pct}% stake in unlisted peer",
+    "Credit rating agency reaffirms {name} outlook as stable",
+    "{name} block deal: {pct} lakh shares change hands",
+    "{name} launches new product line for export markets",
+]
+NEWS_PUBLISHERS = ["The Economic Times", "Moneycontrol", "Business Standard", "Mint", "CNBCTV18", "NDTV Profit"]
+
+
+def news_articles(name, seed=0, count=20):
+    # GNews-shaped articles: roughly a quarter are the same story again from another outlet or
+    # with a tracking-tagged URL, as Google News returns them
+    rng = random.Random(seed)
+    end = pd.Timestamp("2024-12-31 09:00", tz="UTC")
+    stories = []
+    templates = rng.sample(NEWS_TEMPLATES, len(NEWS_TEMPLATES))
+    while len(stories) < count:
+        template = templates[len(stories) % len(templates)]
+        title = template.format(name=name, quarter=rng.randint(1, 4), pct=rng.randint(2, 40),
+                                amount=rng.randint(2, 900), month=rng.choice(MONTHS), year=rng.randint(25, 27))
+        published = end - pd.Timedelta(hours=rng.randint(0, 30 * 24))
+        publisher = rng.choice(NEWS_PUBLISHERS)
+        article_id = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(48))
+        article = {
+            "title": f"{title} - {publisher}",
+            "description": f"{title}  {publisher}",
+            "published date": published.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+            "url": f"https://news.google.com/rss/articles/{article_id}?oc=5",
+            "publisher": {"href": f"https://www.{publisher.lower().replace(' ', '')}.com", "title": publisher},
+        }
+        stories.append(article)
+        if rng.random() < 0.25 and len(stories) < count:
+            duplicate = dict(article)
+            if rng.random() < 0.5:
+                other = rng.choice([p for p in NEWS_PUBLISHERS if p != publisher])
+                duplicate["title"] = f"{title} - {other}"
+                duplicate["publisher"] = {"href": f"https://www.{other.lower().replace(' ', '')}.com", "title": other}
+            duplicate["url"] = article["url"].replace("?oc=5", "?oc=5&utm_source=feed")
+            stories.append(duplicate)
+    return stories
+
+
+def universe_symbols_all():
+    # Every symbol of both universe CSVs (the 750-symbol benchmark universe)
+    from StockScreener.store import UNIVERSES, universe_symbols
+
+    return list(dict.fromkeys(symbol for name in UNIVERSES for symbol in universe_symbols(name)))
+
+
+SCREENER_FIXTURES = [
+    ("Tata Consultancy Services Ltd", "TCS", 1),
+    ("ASK Automotive Ltd", "ASKAUTOLTD", 2),
+    ("3M India Ltd", "3MINDIA", 3),
+]
+
+
+def screener_fixture_paths():
+    return [os.path.join(SCREENER_DIR, f"{symbol}.html") for _, symbol, _ in SCREENER_FIXTURES]
+
+
+def write_screener_fixtures():
+    os.makedirs(SCREENER_DIR, exist_ok=True)
+    for (name, symbol, seed), path in zip(SCREENER_FIXTURES, screener_fixture_paths()):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(screener_page(name, symbol, seed=seed))
+
+
+def news_fixture_paths():
+    from StockScreener.news import fixture_slug
+
+    return [os.path.join(NEWS_DIR, f"{fixture_slug(name)}.json") for name, _, _ in SCREENER_FIXTURES]
+
+
+def write_news_fixtures():
+    os.makedirs(NEWS_DIR, exist_ok=True)
+    for (name, _, seed), path in zip(SCREENER_FIXTURES, news_fixture_paths()):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(news_articles(name, seed=seed), f, indent=1)
+
+
+if __name__ == "__main__":
+    write_screener_fixtures()
+    write_news_fixtures()
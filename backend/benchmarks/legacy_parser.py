@@ -0,0 +1,142 @@
+from bs4 import BeautifulSoup
+
+# The BeautifulSoup extractor the scraper used before StockScreener/parser.py, kept as the
+# reference the single-pass parser is benchmarked and tested against. Not on any request path.
+
+
+def parse_company_page(html):
+    return extract_key_insights(BeautifulSoup(html, 'html.parser'))
+
+
+def results(soup):
+
+    yearly_values = []
+    quarter_values = []
+
+    # Find the section with id "profit-loss"
+    section = soup.find('section', id='profit-loss')
+
+    if section:
+        # Extract rows from this section
+        rows = section.find_all('tr')
+
+        for row in rows:
+            # Check if the row contains the text "Net Profit"
+            if 'Net Profit' in row.get_text():
+                # Find all <td> elements in the row, skipping the first <td> which contains the button
+                columns = row.find_all('td')[1:]
+                yearly_values = [col.get_text(strip=True) for col in columns]
+                break  # Exit loop once we find the correct row
+
+
+
+          # Find the section with id "profit-loss"
+    section = soup.find('section', id='quarters')
+
+    if section:
+        # Extract rows from this section
+        rows = section.find_all('tr')
+
+        for row in rows:
+            # Check if the row contains the text "Net Profit"
+            if 'Net Profit' in row.get_text():
+                # Find all <td> elements in the row, skipping the first <td> which contains the button
+                columns = row.find_all('td')[1:]
+                quarter_values = [col.get_text(strip=True) for col in columns]
+                break  # Exit loop once we find the correct row
+
+
+    return  quarter_values, yearly_values
+
+
+def shareholding(soup):
+
+    Promoters = []
+    DII = []
+    FII = []
+    Public = []
+
+          # Find the section with id "profit-loss"
+    section = soup.find('section', id='shareholding')
+
+    if section:
+        # Extract rows from this section
+        rows = section.find_all('tr')
+
+        for row in rows:
+            # Check if the row contains the text "Net Profit"
+            if 'Promoters' in row.get_text():
+                # Find all <td> elements in the row, skipping the first <td> which contains the button
+                columns = row.find_all('td')[1:]
+                Promoters = [col.get_text(strip=True) for col in columns]
+                break  # Exit loop once we find the correct row
+
+        for row in rows:
+            # Check if the row contains the text "Net Profit"
+            if 'DIIs' in row.get_text():
+                # Find all <td> elements in the row, skipping the first <td> which contains the button
+                columns = row.find_all('td')[1:]
+                DII = [col.get_text(strip=True) for col in columns]
+                break  # Exit loop once we find the correct row
+
+        for row in rows:
+            # Check if the row contains the text "Net Profit"
+            if 'FIIs' in row.get_text():
+                # Find all <td> elements in the row, skipping the first <td> which contains the button
+                columns = row.find_all('td')[1:]
+                FII = [col.get_text(strip=True) for col in columns]
+                break  # Exit loop once we find the correct row
+
+        for row in rows:
+            # Check if the row contains the text "Net Profit"
+            if 'Public' in row.get_text():
+                # Find all <td> elements in the row, skipping the first <td> which contains the button
+                columns = row.find_all('td')[1:]
+                Public = [col.get_text(strip=True) for col in columns]
+                break  # Exit loop once we find the correct row
+
+    return Promoters, DII, FII, Public
+  
+def extract_key_insights(soup):
+    company_name_tag = soup.find('h1', class_='margin-0 show-from-tablet-landscape')
+    company_name = company_name_tag.text.strip() if company_name_tag else "N/A"
+
+    current_price_tag = soup.find('div', class_='font-size-18 strong line-height-14')
+    current_price = current_price_tag.find('span').text.strip() if current_price_tag and current_price_tag.find('span') else "N/A"
+
+    market_cap_tag = soup.find('li', {'data-source': 'default'})
+    market_cap = market_cap_tag.find('span', class_='number').text.strip() if market_cap_tag and market_cap_tag.find('span', class_='number') else "N/A"
+
+    about_section_tag = soup.find('div', class_='company-profile')
+    about_section = about_section_tag.find('div', class_='sub show-more-box about').text.strip() if about_section_tag and about_section_tag.find('div', class_='sub show-more-box about') else "N/A"
+
+    pe_value_tag = soup.find('span', class_='name', string=lambda t: t and "Stock P/E" in t)
+    pe_value = pe_value_tag.find_next('span', class_='number').string if pe_value_tag and pe_value_tag.find_next('span', class_='number') else "N/A"
+
+    roe_tag = soup.find('span', class_='name', string=lambda t: t and "ROE" in t)
+    roe = roe_tag.find_next('span', class_='number').string if roe_tag and roe_tag.find_next('span', class_='number') else "N/A"
+
+    roce_tag = soup.find('span', class_='name', string=lambda t: t and "ROCE" in t)
+    roce = roce_tag.find_next('span', class_='number').string if roce_tag and roce_tag.find_next('span', class_='number') else "N/A"
+
+    quarter_values, yearly_values = results(soup)
+    Promoters, DII, FII, Public = shareholding(soup)
+
+    fundainfo = {
+        "Company Name": company_name,
+        "Current Price": current_price,
+        "Market Cap": market_cap,
+        "About": about_section,
+        "PE" : pe_value,
+        "ROE" : roe,
+        "ROCE" : roce,}
+
+    shareholdnres = {"Quarter" : quarter_values,
+        "Yearly" : yearly_values,
+        "Promoters" : Promoters,
+        "DII" : DII,
+        "FII" : FII,
+        "Public" : Public
+    }
+
+    return fundainfo, shareholdnres
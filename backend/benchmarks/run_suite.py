@@ -0,0 +1,147 @@
+import datetime
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Runs every benchmark offline (each in a fresh interpreter, so settings and caches don't leak
+# between them) and writes one machine-readable JSON result file per run, tagged with the git
+# commit. --compare diffs against an earlier file and flags regressions.
+# Run from backend/:
+#   python -m benchmarks.run_suite [--only scan,chart] [--output PATH] [--compare PATH|latest] [--threshold 0.1]
+
+BENCHMARKS = {
+    "scan": ["benchmarks.bench_scan"],
+    "chart": ["benchmarks.bench_chart"],
+    "parser": ["benchmarks.bench_parser"],
+    "details": ["benchmarks.bench_details"],
+    "rolling": ["benchmarks.bench_rolling"],
+    "backtest": ["benchmarks.bench_backtest"],
+    "startup": ["benchmarks.bench_startup"],
+    "memory": ["benchmarks.bench_memory"],
+}
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _last_json(stdout):
+    # The benchmark's --json document is the last top-level object printed (log lines may precede it)
+    lines = stdout.splitlines()
+    for i in range(len(lines) - 1, -1, -1):
+        if lines[i] == "{":
+            try:
+                return json.loads("\n".join(lines[i:]))
+            except ValueError:
+                continue
+    raise ValueError("no JSON result in benchmark output")
+
+
+def run_benchmark(name, timeout=1800):
+    command = [sys.executable, "-m", *BENCHMARKS[name], "--json"]
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        return {"error": result.stderr[-2000:], "wall_seconds": elapsed}
+    return {"results": _last_json(result.stdout), "wall_seconds": elapsed}
+
+
+def environment():
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+        return items
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def direction(key):
+    # +1 when larger is better, -1 when smaller is better, 0 when the number isn't a measurement
+    leaf = key.rsplit(".", 1)[-1]
+    if leaf.endswith("per_second") or leaf == "speedup":
+        return 1
+    if leaf.endswith("_ms") or leaf.endswith("ms_per_page") or leaf.endswith("_ms_median") or leaf.endswith("_mb") \
+            or leaf in ("seconds", "wall_seconds"):
+        return -1
+    return 0
+
+
+def compare(previous, current, threshold=0.1):
+    # [(key, before, after, relative change, regressed)] for measurements that moved more than threshold
+    before, after = flatten(previous.get("benchmarks", {})), flatten(current.get("benchmarks", {}))
+    changes = []
+    for key in sorted(before.keys() & after.keys()):
+        sign = direction(key)
+        if not sign or key.endswith("wall_seconds") or not before[key]:
+            continue
+        change = (after[key] - before[key]) / abs(before[key])
+        if abs(change) >= threshold:
+            changes.append((key, before[key], after[key], change, change * sign < 0))
+    return changes
+
+
+def latest_result(exclude=None):
+    paths = sorted(path for path in glob.glob(os.path.join(RESULTS_DIR, "*.json")) if path != exclude)
+    return paths[-1] if paths else None
+
+
+def main(argv):
+    only = argv[argv.index("--only") + 1].split(",") if "--only" in argv else list(BENCHMARKS)
+    threshold = float(argv[argv.index("--threshold") + 1]) if "--threshold" in argv else 0.1
+    baseline = argv[argv.index("--compare") + 1] if "--compare" in argv else None
+    if baseline == "latest":
+        baseline = latest_result()
+
+    report = {"environment": environment(), "benchmarks": {}}
+    for name in only:
+        print(f"running {name}...", file=sys.stderr)
+        report["benchmarks"][name] = run_benchmark(name)
+        if "error" in report["benchmarks"][name]:
+            print(f"  {name} failed:\n{report['benchmarks'][name]['error']}", file=sys.stderr)
+
+    stamp = report["environment"]["started_at"].replace(":", "").replace("-", "")[:15]
+    commit = (report["environment"]["commit"] or "nogit")[:10]
+    output = argv[argv.index("--output") + 1] if "--output" in argv else os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}", file=sys.stderr)
+
+    failed = any("error" in result for result in report["benchmarks"].values())
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            changes = compare(json.load(f), report, threshold)
+        print(f"compared with {baseline} (threshold {threshold:.0%}):")
+        for key, before, after, change, regressed in changes:
+            print(f"  {'REGRESSION' if regressed else 'improved  '} {key}: {before:.4g} -> {after:.4g} ({change:+.1%})")
+        if not changes:
+            print("  no changes above threshold")
+        failed = failed or any(regressed for *_, regressed in changes)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
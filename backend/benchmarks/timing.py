@@ -0,0 +1,17 @@
+import numpy as np
+
+# Shared latency summary so every benchmark reports the same percentiles
+
+
+def latency_summary(samples_ms):
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    if not len(samples):
+        return {"count": 0}
+    return {
+        "count": int(len(samples)),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p90_ms": float(np.percentile(samples, 90)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "max_ms": float(samples.max()),
+    }
@@ -1,9 +1,24 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from StockScreener.screener import BreakoutVolume, scrapper, CompanyNews, nifty500_df, microcap250_df, get_yf_symbol, stock_node, analyze_financial_data, plotShareholding
-from StockScreener.mlpchart.mlpchart import chart
-import io
+from StockScreener.details import StageTimings, stock_details, stream_stock_details
+from StockScreener.indicators import IndicatorFormatError, indicator_cache, indicator_payload, payload_cache
+from StockScreener.fundamentals import default_fundamentals, refresh_running, refresh_universe
+from StockScreener.llmcache import default_analysis_cache
+from StockScreener.metrics import http_seconds, registry
+from StockScreener.monitor import monitors
+from StockScreener.news import default_news
+from StockScreener.profiler import profiler
+from StockScreener.query import QueryError, run_screen, screen_tables
+from StockScreener.scrape_client import default_scrape_client
+from StockScreener.mlpchart.mlpchart import chart, chart_cache, chart_prices, chart_validators, prerender, render_pool
+from StockScreener.mlpchart.pool import RenderQueueFull
+from StockScreener.store import UNIVERSES, StorePriceSource, default_store
+from StockScreener.scan import SCAN_MAX_SYMBOLS, scan_coordinator
+from StockScreener.symbols import default_registry, parse_watchlist
+import hashlib
+import time
+from email.utils import parsedate_to_datetime
 
 import logging
 
@@ -25,63 +40,299 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Charts for every breakout hit are rendered in the background before the user clicks
+scan_coordinator.on_complete.append(lambda key, stocks: prerender(stocks))
+
+def scrape_cache_stats(stats):
+    # Fresh and 304-revalidated pages count as hits; full downloads as misses
+    return {"hits": stats["fresh_hits"] + stats["revalidated"], "misses": stats["downloaded"]}
+
+# Hit ratios etc. on /metrics are read from each cache's stats() at scrape time
+registry.register_cache("chart", chart_cache.stats)
+registry.register_cache("indicators", indicator_cache.stats)
+registry.register_cache("indicator_payloads", payload_cache.stats)
+registry.register_cache("analysis", lambda: default_analysis_cache().stats())
+registry.register_cache("news", lambda: default_news().stats())
+registry.register_cache("scan", scan_coordinator.stats)
+registry.register_cache("scrape", lambda: scrape_cache_stats(default_scrape_client().stats))
+registry.gauge("chart_render_pending", "Chart renders queued or running.", collect=lambda: {(): render_pool.pending()})
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    # Latency per route template (for streaming responses: until the response starts);
+    # slow requests are profiled when the sampling profiler is on
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        end = time.perf_counter()
+        route = request.scope.get("route")
+        http_seconds.observe(end - start, method=request.method, route=getattr(route, "path", "unmatched"), status=str(status))
+        profiler.request_finished(f"{request.method} {request.url.path}", start, end)
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
 @app.get("/stock-screener/nifty500")
-async def get_nifty500_breakouts():
-    return StreamingResponse(BreakoutVolume(list(nifty500_df['YFSYMBOL'])), media_type="application/json")
+async def get_nifty500_breakouts(concurrency: int | None = None):
+    scan = scan_coordinator.subscribe("nifty500", default_registry().universe("nifty500"), source=StorePriceSource(default_store()), concurrency=concurrency)
+    return StreamingResponse(scan, media_type="application/x-ndjson")
 
 @app.get("/stock-screener/microcap250")
-async def get_microcap250_breakouts():
-    return StreamingResponse(BreakoutVolume(list(microcap250_df['YFSYMBOL'])), media_type="application/json")
+async def get_microcap250_breakouts(concurrency: int | None = None):
+    scan = scan_coordinator.subscribe("microcap250", default_registry().universe("microcap250"), source=StorePriceSource(default_store()), concurrency=concurrency)
+    return StreamingResponse(scan, media_type="application/x-ndjson")
+
+@app.post("/stock-screener/watchlist")
+async def scan_watchlist(request: Request, concurrency: int | None = None):
+    # Breakout scan of an uploaded symbol list (JSON, a CSV with a Symbol column, or bare
+    # symbols), streamed chunk by chunk like the universe scans and cached the same way
+    try:
+        keys = parse_watchlist((await request.body()).decode('utf-8', errors='replace'))
+        symbols = default_registry().resolve(keys)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable watchlist: {e}")
+    if not symbols:
+        raise HTTPException(status_code=400, detail="Watchlist has no symbols")
+    if len(symbols) > SCAN_MAX_SYMBOLS:
+        raise HTTPException(status_code=413, detail=f"Watchlist has {len(symbols)} symbols, the limit is {SCAN_MAX_SYMBOLS}")
+    key = "watchlist:" + hashlib.sha1("\n".join(symbols).encode('utf-8')).hexdigest()[:16]
+    scan = scan_coordinator.subscribe(key, symbols, source=StorePriceSource(default_store()), concurrency=concurrency)
+    return StreamingResponse(scan, media_type="application/x-ndjson")
+
+@app.websocket("/stock-screener/live/{universe}")
+async def live_breakouts(websocket: WebSocket, universe: str):
+    # Intraday monitor: the current breakout set, then enter/exit events as quotes arrive
+    if universe not in UNIVERSES:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    events = monitors.get(universe).subscribe()
+    try:
+        async for event in events:
+            await websocket.send_json(event)
+        await websocket.close(code=1013)  # Fell too far behind
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await events.aclose()
+
+@app.get("/stock-screener/live")
+def get_live_monitor_stats():
+    return monitors.stats()
+
+@app.get("/stock-screener/scan-cache")
+def get_scan_cache_stats():
+    return scan_coordinator.stats()
 
 @app.get("/stock-screener/details/{symbol}")
-def get_stock_details(symbol: str):
+async def get_stock_details(symbol: str, response: Response):
+    timings = StageTimings()
     try:
-        fundainfo, shareholdnres = scrapper(symbol)
-        news = CompanyNews(fundainfo['Company Name'])
-        analysis = stock_node(fundainfo, shareholdnres, news)
-        financial_analysis = analyze_financial_data(shareholdnres)
-        shareholding_chart = plotShareholding(shareholdnres)
-        if shareholding_chart is None:
+        details = await stock_details(symbol, timings)
+        if details["shareholding_chart"] is None:
             logger.warning(f"Shareholding chart is None for {symbol}")
-            shareholding_chart_json = None
-        else:
-            shareholding_chart_json = shareholding_chart.to_json()
-
-        return {
-            "fundamentals": fundainfo, 
-            "shareholding": shareholdnres, 
-            "news": news, 
-            "analysis": analysis,
-            "financial_analysis": financial_analysis,
-            "shareholding_chart": shareholding_chart_json
-        }
+        if details["partial"]:
+            logger.warning(f"Partial details for {symbol}: {timings.failed}")
+        response.headers["Server-Timing"] = timings.server_timing()
+        return details
     except Exception as e:
         logger.error(f"Error fetching details for {symbol}: {e}", exc_info=True)
-        raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=404, detail=str(e), headers={"Server-Timing": timings.server_timing()})
+
+@app.get("/stock-screener/details/{symbol}/stream")
+async def stream_stock_details_endpoint(symbol: str, format: str = "ndjson"):
+    # Sections are sent as they become ready; the LLM analysis streams last, token by token
+    sse = format == "sse"
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(stream_stock_details(symbol, sse=sse), media_type=media_type)
+
+@app.get("/stock-screener/search")
+def search_symbols(q: str, limit: int = 10, universe: str = None):
+    # Typeahead over company names, NSE symbols and ISINs
+    records = default_registry().search(q, limit=max(1, min(limit, 50)), universe=universe)
+    return {"query": q, "results": [record.to_dict() for record in records]}
+
+@app.get("/stock-screener/screen")
+def get_screen(q: str, universe: str = "nifty500", sort: str = None, offset: int = 0, limit: int = 50):
+    # e.g. q="ROE > 15 and close > SMA50 and FII rising 3 quarters"&sort=-roe
+    try:
+        return run_screen(screen_tables.get(universe), q, sort=sort, offset=max(offset, 0), limit=limit)
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/stock-screener/fundamentals")
+def get_fundamentals_snapshot():
+    snapshot = default_fundamentals()
+    frame = snapshot.frame()
+    rows = frame.drop(columns=['fetched_at']).astype(object).where(frame.notna(), None)
+    return {**snapshot.stats(), "refreshing": refresh_running(), "rows": rows.reset_index().to_dict(orient="records")}
+
+@app.post("/stock-screener/fundamentals/refresh")
+def refresh_fundamentals_snapshot(background_tasks: BackgroundTasks, force: bool = False):
+    # Re-scrapes stale (or all, with force) symbols of both universes in the background
+    if refresh_running():
+        return {"status": "running"}
+    background_tasks.add_task(refresh_universe, None, force)
+    return {"status": "started"}
+
+@app.get("/stock-screener/news")
+def get_news(symbols: str):
+    # Batch mode: news for several companies at once, e.g. symbols=TCS,INFY.NS
+    registry = default_registry()
+    names = {}
+    for symbol in symbols.split(","):
+        record = registry.lookup(symbol.strip().removesuffix(".NS"))
+        if record is not None:
+            names[record.yf_symbol] = record.name
+    articles = default_news().batch(list(names.values()))
+    return {symbol: articles[name] for symbol, name in names.items()}
+
+@app.get("/stock-screener/news-cache")
+def get_news_cache_stats():
+    return default_news().stats()
+
+@app.get("/stock-screener/analysis-cache")
+def get_analysis_cache_stats():
+    return default_analysis_cache().stats()
+
+@app.get("/stock-screener/scrape-cache")
+def get_scrape_cache_stats():
+    return default_scrape_client().stats
+
+def path_symbol(symbol: str):
+    # A symbol from the URL becomes a price store path: resolve it to a Yahoo symbol the
+    # way watchlists are, and reject anything that isn't shaped like a ticker
+    try:
+        symbols = default_registry().resolve([symbol])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No symbol given")
+    return symbols[0]
+
+def chart_response(symbol: str, request: Request):
+    # 304 when the client already has this (symbol, last bar, indicator set) PNG; otherwise
+    # the PNG from the render cache, rendering only on a miss
+    # One store read (and sync) per request, shared by the validators and the render
+    prices = chart_prices(symbol)
+    validators = chart_validators(symbol, prices)
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+    elif if_modified_since is not None:
+        try:
+            if parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(last_modified):
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+
+    img_buffer = chart(symbol, prices)
+    if img_buffer is None:
+        return None
+    return Response(content=img_buffer, media_type="image/png", headers=headers)
 
 @app.get("/stock-screener/chart/{symbol}")
-def get_stock_chart(symbol: str):
+def get_stock_chart(symbol: str, request: Request):
+    symbol = path_symbol(symbol)
     try:
-        img_buffer = chart(symbol)
-        return StreamingResponse(io.BytesIO(img_buffer), media_type="image/png")
+        response = chart_response(symbol, request)
+        if response is None:
+            raise HTTPException(status_code=404, detail="Chart not available for this stock.")
+        return response
+    except HTTPException:
+        raise
+    except RenderQueueFull as e:
+        logger.warning(f"Chart render queue full for {symbol}: {e}")
+        raise HTTPException(status_code=503, detail="Chart renderer busy, retry shortly.", headers={"Retry-After": "2"})
     except Exception as e:
         logger.error(f"Error fetching chart for {symbol}: {e}", exc_info=True)
         raise HTTPException(status_code=404, detail=str(e))
 
 @app.get("/stock-screener/candlestick-chart/{symbol}")
-def get_candlestick_chart(symbol: str):
+def get_candlestick_chart(symbol: str, request: Request):
+    symbol = path_symbol(symbol)
     try:
         logger.info(f"Attempting to generate candlestick chart using mplchart for {symbol}")
-        img_buffer = chart(symbol) # Use the chart function from mlpchart
-        if img_buffer is None:
+        response = chart_response(symbol, request) # Shares the render cache with /chart
+        if response is None:
             logger.warning(f"mplchart.chart returned None for {symbol}")
             raise HTTPException(status_code=404, detail="Candlestick chart not available for this stock.")
-        logger.info(f"Generated mplchart image for {symbol}")
-        return StreamingResponse(io.BytesIO(img_buffer), media_type="image/png")
+        logger.info(f"Served mplchart image for {symbol} ({response.status_code})")
+        return response
+    except HTTPException:
+        raise
+    except RenderQueueFull as e:
+        logger.warning(f"Chart render queue full for {symbol}: {e}")
+        raise HTTPException(status_code=503, detail="Chart renderer busy, retry shortly.", headers={"Retry-After": "2"})
     except Exception as e:
         logger.error(f"Error in get_candlestick_chart (mplchart) for {symbol}: {e}", exc_info=True)
         raise HTTPException(status_code=404, detail=f"Error generating candlestick chart: {e}")
+
+@app.get("/stock-screener/indicators/{symbol}")
+def get_indicators(symbol: str, request: Request, format: str = "json", compression: str = "none", bars: int = None):
+    # OHLCV + SMA10/20/50/200, RSI and MACD as columnar arrays (JSON or Arrow IPC) for client-side charts
+    symbol = path_symbol(symbol)
+    try:
+        payload = indicator_payload(symbol, format, compression, bars)
+    except IndicatorFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing indicators for {symbol}: {e}", exc_info=True)
+        raise HTTPException(status_code=404, detail=str(e))
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Price data not available for this stock.")
+    body, media_type, encoding, etag = payload
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+@app.get("/stock-screener/indicator-cache")
+def get_indicator_cache_stats():
+    return {"indicators": indicator_cache.stats(), "payloads": payload_cache.stats()}
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profiler")
+def get_profiler():
+    return profiler.stats()
+
+@app.post("/debug/profiler")
+def set_profiler(enabled: bool, slow_ms: float = None):
+    # Opt-in: sampling costs a little CPU on every thread while it is on
+    if slow_ms is not None:
+        profiler.slow_ms = slow_ms
+    if enabled:
+        profiler.start()
+    else:
+        profiler.stop()
+    return profiler.stats()
+
+@app.get("/debug/profiler/{index}")
+def get_profile(index: int):
+    # Folded stacks of one slow request: feed to flamegraph.pl or paste into speedscope
+    profiles = list(profiler.profiles)
+    if not -len(profiles) <= index < len(profiles):
+        raise HTTPException(status_code=404, detail="No such profile.")
+    return PlainTextResponse(profiles[index]["folded"])
+
+@app.get("/stock-screener/chart-cache")
+def get_chart_cache_stats():
+    return {**chart_cache.stats(), "render_pool": render_pool.stats()}
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import synthetic_prices
+from StockScreener.engine import ewm_mean
+from StockScreener.indicators import MACD_FAST, MACD_SIGNAL, MACD_SLOW, RSI_PERIOD, compute_indicators, rsi
+
+ta = pytest.importorskip("ta")
+
+# Run from backend/: python -m pytest -q
+
+
+@pytest.fixture
+def prices():
+    return synthetic_prices(["TEST.NS"], bars=300, seed=11)["TEST.NS"]
+
+
+def assert_matches(ours, reference):
+    # Same NaN warm-up and the same values (our columns are float32)
+    reference = np.asarray(reference, dtype=np.float64)
+    assert np.array_equal(np.isnan(ours), np.isnan(reference))
+    np.testing.assert_allclose(ours[~np.isnan(ours)], reference[~np.isnan(reference)], rtol=1e-5, atol=1e-4)
+
+
+def test_rsi_matches_ta(prices):
+    close = prices["Close"]
+    reference = ta.momentum.RSIIndicator(close, window=RSI_PERIOD).rsi()
+    assert_matches(rsi(close.to_numpy().reshape(-1, 1))[:, 0], reference)
+    assert np.flatnonzero(~np.isnan(reference.to_numpy()))[0] == RSI_PERIOD - 1
+
+
+def test_chart_indicators_match_ta(prices):
+    close = prices["Close"]
+    columns = compute_indicators(prices)
+    macd = ta.trend.MACD(close, window_slow=MACD_SLOW, window_fast=MACD_FAST, window_sign=MACD_SIGNAL)
+    assert_matches(columns["rsi"], ta.momentum.RSIIndicator(close, window=RSI_PERIOD).rsi())
+    assert_matches(columns["sma50"], ta.trend.sma_indicator(close, window=50))
+    assert_matches(columns["macd"], macd.macd())
+    assert_matches(columns["macd_signal"], macd.macd_signal())
+    assert_matches(columns["macd_hist"], macd.macd_diff())
+
+
+def test_ewm_mean_skips_missing_bars(prices):
+    # NaN rows are dates a symbol has no bar on: no decay, as if the row weren't there
+    volume = np.column_stack([prices["Volume"].to_numpy()] * 2)
+    volume[:5, 0] = np.nan
+    volume[[40, 41, 42, 100], 0] = np.nan
+    volume[150:160, 1] = np.nan
+    ours = ewm_mean(volume, 20)
+    reference = pd.DataFrame(volume).ewm(span=20, adjust=False, ignore_na=True).mean().to_numpy()
+    np.testing.assert_allclose(ours, reference)
+    own_bars = pd.Series(volume[:, 0]).dropna()
+    np.testing.assert_allclose(ours[own_bars.index, 0], own_bars.ewm(span=20, adjust=False).mean())
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from StockScreener.llmcache import ANALYSIS_FAILED, AnalysisCache, StubAnalyst, cached_analysis, fingerprint
+
+# Run from backend/: python -m pytest -q
+
+FUNDAMENTALS = {"Company Name": "Tata Consultancy Services Ltd", "Stock P/E": "30.1"}
+SHAREHOLDING = {"Promoters": "72.3%"}
+NEWS = [{"title": "TCS bags new contract", "url": "https://d.com/4", "description": "2 hours ago"}]
+
+
+@pytest.fixture
+def cache():
+    return AnalysisCache(":memory:", ttl=60)
+
+
+def age(cache, seconds):
+    with cache._lock:
+        cache._db.execute("UPDATE analysis SET created = created - ?", (seconds,))
+        cache._db.commit()
+
+
+def wait_for_refresh(cache):
+    deadline = time.time() + 5
+    while cache._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_fingerprint_ignores_volatile_news_fields():
+    reworded = [dict(NEWS[0], description="3 hours ago")]
+    assert fingerprint(FUNDAMENTALS, SHAREHOLDING, NEWS, "m") == fingerprint(FUNDAMENTALS, SHAREHOLDING, reworded, "m")
+    assert fingerprint(FUNDAMENTALS, SHAREHOLDING, NEWS, "m") != fingerprint(FUNDAMENTALS, SHAREHOLDING, NEWS, "other")
+
+
+def test_fresh_report_is_served_from_cache(cache):
+    analyst = StubAnalyst()
+    first = cached_analysis(cache, "m", analyst, FUNDAMENTALS, SHAREHOLDING, NEWS)
+    assert cached_analysis(cache, "m", analyst, FUNDAMENTALS, SHAREHOLDING, NEWS) == first
+    assert analyst.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_report_is_served_stale_and_refreshed(cache):
+    cached_analysis(cache, "m", StubAnalyst(report="old"), FUNDAMENTALS, SHAREHOLDING, NEWS)
+    age(cache, 61)
+    refreshed = StubAnalyst(report="new")
+    assert cached_analysis(cache, "m", refreshed, FUNDAMENTALS, SHAREHOLDING, NEWS, stale_while_revalidate=True) == "old"
+    wait_for_refresh(cache)
+    assert cached_analysis(cache, "m", refreshed, FUNDAMENTALS, SHAREHOLDING, NEWS) == "new"
+    assert (refreshed.calls, cache.stale_hits) == (1, 1)
+
+
+def test_expired_report_without_swr_is_regenerated(cache):
+    cached_analysis(cache, "m", StubAnalyst(report="old"), FUNDAMENTALS, SHAREHOLDING, NEWS)
+    age(cache, 61)
+    assert cached_analysis(cache, "m", StubAnalyst(report="new"), FUNDAMENTALS, SHAREHOLDING, NEWS,
+                           stale_while_revalidate=False) == "new"
+
+
+def test_failed_analysis_is_not_cached(cache):
+    failing = StubAnalyst(report=ANALYSIS_FAILED)
+    for _ in range(2):
+        assert cached_analysis(cache, "m", failing, FUNDAMENTALS, SHAREHOLDING, NEWS) == ANALYSIS_FAILED
+    assert failing.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_beyond_the_limit_are_evicted_least_recently_used_first():
+    cache = AnalysisCache(":memory:", ttl=60, max_entries=2)
+    # (spaced out so the access times can't tie)
+    for key in ("a", "b"):
+        cache.put(key, "m", key)
+        time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.put("c", "m", "c")
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == "a" and cache.get("c")[0] == "c"
@@ -0,0 +1,38 @@
+import pytest
+
+from StockScreener.metrics import Registry
+
+# Run from backend/: python -m pytest -q
+
+
+def test_counter_samples_use_the_declared_name():
+    registry = Registry()
+    errors = registry.counter("stage_errors_total", "Stages that raised.", labels=("stage",))
+    errors.inc(stage="fetch")
+    errors.inc(2, stage="fetch")
+    lines = registry.render().splitlines()
+    assert lines == [
+        "# HELP stockscreener_stage_errors_total Stages that raised.",
+        "# TYPE stockscreener_stage_errors_total counter",
+        'stockscreener_stage_errors_total{stage="fetch"} 3',
+    ]
+
+
+def test_counter_requires_total_suffix():
+    with pytest.raises(ValueError):
+        Registry().counter("stage_errors", "Stages that raised.")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+    samples = [line for line in registry.render().splitlines() if not line.startswith("#")]
+    assert samples == [
+        'stockscreener_latency_seconds_bucket{le="0.1"} 1',
+        'stockscreener_latency_seconds_bucket{le="1"} 2',
+        'stockscreener_latency_seconds_bucket{le="+Inf"} 3',
+        "stockscreener_latency_seconds_sum 5.55",
+        "stockscreener_latency_seconds_count 3",
+    ]
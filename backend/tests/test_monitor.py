@@ -0,0 +1,44 @@
+import pytest
+
+from benchmarks.fixtures import synthetic_prices
+from StockScreener.engine import close_above_open
+from StockScreener.monitor import LiveUniverse
+from StockScreener.store import PriceStore
+
+# Run from backend/: python -m pytest -q
+
+SYMBOLS = ["UP.NS", "DOWN.NS", "FLAT.NS"]
+
+
+@pytest.fixture
+def live(tmp_path):
+    # Last stored session is 2024-12-31: only UP closed above its open
+    store = PriceStore(str(tmp_path))
+    for symbol, frame in synthetic_prices(SYMBOLS, bars=150, seed=7).items():
+        frame.iloc[-1, frame.columns.get_loc('Open')] = 100.0
+        frame.iloc[-1, frame.columns.get_loc('Close')] = 101.0 if symbol == "UP.NS" else 99.0
+        store.write_frame(symbol, frame)
+    return LiveUniverse(SYMBOLS, store=store, rule=close_above_open())
+
+
+def quote(symbol, price, time, open_=100.0):
+    return {"symbol": symbol, "open": open_, "price": price, "time": time}
+
+
+def test_quotes_for_the_current_session_enter_and_exit(live):
+    assert live.snapshot() == {"type": "snapshot", "date": "2024-12-31", "stocks": ["UP.NS"]}
+    events = live.apply([quote("DOWN", 102.0, "2024-12-31T14:00:00"), quote("UP", 98.0, "2024-12-31T14:00:00")])
+    assert [(event["type"], event["symbol"]) for event in events] == [("exit", "UP.NS"), ("enter", "DOWN.NS")]
+    assert live.evaluated == 2
+
+
+def test_new_session_reevaluates_every_symbol(live):
+    events = live.apply([quote("FLAT", 101.0, "2025-01-01T09:30:00")])
+    assert [(event["type"], event["symbol"]) for event in events] == [("exit", "UP.NS"), ("enter", "FLAT.NS")]
+    assert live.snapshot() == {"type": "snapshot", "date": "2025-01-01", "stocks": ["FLAT.NS"]}
+
+
+def test_late_quotes_for_a_closed_session_are_ignored(live):
+    live.apply([quote("FLAT", 101.0, "2025-01-01T09:30:00")])
+    assert live.apply([quote("DOWN", 105.0, "2024-12-31T15:29:00")]) == []
+    assert live.quotes == 1
@@ -0,0 +1,64 @@
+import pytest
+
+from StockScreener.news import NewsService, NewsSource, canonical_url, dedupe, trim_article
+
+# Run from backend/: python -m pytest -q
+
+
+class ListSource(NewsSource):
+    def __init__(self, articles):
+        self.articles = articles
+        self.calls = 0
+
+    def fetch(self, name):
+        self.calls += 1
+        if isinstance(self.articles, Exception):
+            raise self.articles
+        return self.articles
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.example.com/markets/tcs-q2/",
+    "http://example.com/markets/tcs-q2?utm_source=gnews&utm_medium=rss",
+    "https://EXAMPLE.com/markets/tcs-q2#comments",
+    "https://example.com/markets/tcs-q2/?fbclid=abc",
+])
+def test_canonical_url_drops_presentation_details(url):
+    assert canonical_url(url) == "example.com/markets/tcs-q2"
+
+
+def test_canonical_url_keeps_meaningful_query():
+    assert canonical_url("https://example.com/article?id=7&utm_campaign=x") == "example.com/article?id=7"
+    assert canonical_url(None) == ""
+
+
+def test_dedupe_by_url_title_and_near_duplicate_title():
+    articles = [
+        {"title": "TCS Q2 results: net profit rises 8% YoY, beats estimates", "url": "https://a.com/1"},
+        {"title": "Different headline entirely", "url": "https://www.a.com/1/?utm_source=x"},
+        {"title": "TCS Q2 Results - net profit rises 8% YoY, beats estimates!", "url": "https://b.com/2"},
+        {"title": "TCS Q2 results: net profit rises 8% YoY, beats street estimates", "url": "https://c.com/3"},
+        {"title": "TCS bags new contract; shares gain 2% in early trade", "url": "https://d.com/4"},
+    ]
+    assert [article["url"] for article in dedupe(articles)] == ["https://a.com/1", "https://d.com/4"]
+
+
+def test_trim_article_strips_publisher_suffix():
+    article = {"title": "TCS shares hit 52-week high - Mint", "publisher": {"title": "Mint"},
+               "published date": "Mon, 14 Oct 2024 07:00:00 GMT", "url": "https://mint.com/x", "description": "..."}
+    assert trim_article(article) == {"title": "TCS shares hit 52-week high", "publisher": "Mint",
+                                     "published date": "2024-10-14", "url": "https://mint.com/x"}
+
+
+def test_service_caches_and_serves_stale_on_failure():
+    source = ListSource([{"title": "TCS bags new contract", "url": "https://d.com/4"}])
+    news = NewsService(source=source, ttl=60)
+    first = news.get("Tata Consultancy Services Ltd")
+    assert news.get("tata consultancy services ltd.") == first
+    assert source.calls == 1
+
+    source.articles = ConnectionError("feed down")
+    assert news.get("Tata Consultancy Services Ltd", force=True) == first
+    assert (news.errors, news.stale_served) == (1, 1)
+    with pytest.raises(ConnectionError):
+        news.get("Infosys Ltd")
@@ -0,0 +1,28 @@
+import pytest
+
+from benchmarks.fixtures import SCREENER_FIXTURES, screener_page
+from StockScreener.parser import BACKENDS, _lxml_available, parse_company_page
+
+pytest.importorskip("bs4")
+from benchmarks.legacy_parser import parse_company_page as legacy_parse
+
+# Run from backend/: python -m pytest -q
+
+
+@pytest.fixture(params=SCREENER_FIXTURES, ids=[symbol for _, symbol, _ in SCREENER_FIXTURES])
+def page(request):
+    name, symbol, seed = request.param
+    return screener_page(name, symbol, seed=seed)
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_parser_matches_beautifulsoup(page, backend):
+    if backend == "lxml" and not _lxml_available():
+        pytest.skip("lxml not installed")
+    assert parse_company_page(page, backend=backend) == legacy_parse(page)
+
+
+def test_parser_handles_missing_sections():
+    # A page without the ratios list or the shareholding table still parses
+    html = "<html><body><section id='quarters'><table></table></section></body></html>"
+    assert parse_company_page(html, backend="html") == legacy_parse(html)
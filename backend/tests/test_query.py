@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from StockScreener.query import QueryError, _Parser, compile_query, run_screen
+
+# Run from backend/: python -m pytest -q
+
+
+class Table:
+    # Just the columns a query reads, one value per symbol
+
+    def __init__(self, **columns):
+        self.columns = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+        self.symbols = [f"S{i}.NS" for i in range(len(next(iter(self.columns.values()))))]
+
+    def column(self, name):
+        return self.columns[name]
+
+
+def value(text, table):
+    _, fn, _ = _Parser(text).arith()
+    return fn(table)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("close - open + high", 10 - 4 + 1),
+    ("close + open - high", 10 + 4 - 1),
+    ("close - open - high", 10 - 4 - 1),
+    ("close / open * high", 10 / 4 * 1),
+    ("close * open / high", 10 * 4 / 1),
+    ("close - open * high + low", 10 - 4 * 1 + 2),
+    ("close / open - high * low", 10 / 4 - 1 * 2),
+])
+def test_mixed_operators_evaluate_left_to_right_by_precedence(text, expected):
+    table = Table(close=[10], open=[4], high=[1], low=[2])
+    assert value(text, table)[0] == pytest.approx(expected)
+
+
+def test_mixed_chain_in_a_condition():
+    table = Table(close=[10, 10], open=[4, 4], high=[1, 5])
+    mask, _ = compile_query("close - open + high > 8")
+    assert list(mask(table)) == [False, True]
+
+
+@pytest.mark.parametrize("sort", ["+close", " close"])
+def test_ascending_sort_survives_query_string_decoding(sort):
+    table = Table(close=[3, 1, 2])
+    page = run_screen(table, "close > 0", sort=sort)
+    assert page["sort"] == "+close"
+    assert [row["close"] for row in page["results"]] == [1, 2, 3]
+
+
+def test_descending_sort_and_unknown_field():
+    table = Table(close=[3, 1, 2])
+    assert [row["close"] for row in run_screen(table, "close > 0", sort="-close")["results"]] == [3, 2, 1]
+    with pytest.raises(QueryError):
+        run_screen(table, "close > 0", sort="+nope")
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from benchmarks.fixtures import synthetic_prices
+from StockScreener.engine import Panel
+from StockScreener.rolling import RollingState, RollingStates, verify
+from StockScreener.store import PriceStore
+
+# Run from backend/: python -m pytest -q
+
+SYMBOLS = ["A.NS", "B.NS", "C.NS"]
+
+
+@pytest.fixture
+def frames():
+    frames = synthetic_prices(SYMBOLS, bars=260, seed=9)
+    # B listed late and skipped a few sessions; C has no bar on the last date
+    frames["B.NS"] = frames["B.NS"].iloc[30:].drop(frames["B.NS"].index[[100, 101, 150]])
+    frames["C.NS"] = frames["C.NS"].iloc[:-1]
+    return frames
+
+
+def head(panel, rows):
+    return Panel(panel.dates[:rows], panel.symbols, {field: values[:rows] for field, values in panel.fields.items()})
+
+
+def test_incremental_state_matches_full_recomputation(frames):
+    panel = Panel.from_frames(frames)
+    state = RollingState.from_panel(head(panel, len(panel.dates) - 5))
+    state.push_panel(panel, start=len(panel.dates) - 5)
+    assert state.rows == len(panel.dates)
+    assert verify(state, panel) == {}
+
+
+def test_verify_reports_drift(frames):
+    panel = Panel.from_frames(frames)
+    state = RollingState.from_panel(panel)
+    state.emas["ema20"] = state.emas["ema20"] + 1.0
+    assert set(verify(state, panel)) == {"ema20"}
+
+
+def test_saved_state_round_trips(frames, tmp_path):
+    panel = Panel.from_frames(frames)
+    path = str(tmp_path / "universe.npz")
+    RollingState.from_panel(head(panel, 200)).save(path)
+    state = RollingState.load(path)
+    state.push_panel(panel, start=200)
+    assert verify(state, panel) == {}
+
+
+def test_states_advance_from_the_store_and_rebuild_after_adjustment(frames, tmp_path):
+    store = PriceStore(str(tmp_path / "prices"))
+    for symbol, frame in frames.items():
+        store.write_frame(symbol, frame.iloc[:-3])
+    states = RollingStates(store=store, directory=str(tmp_path / "state"))
+    states.sync("test", SYMBOLS)
+
+    for symbol, frame in frames.items():
+        assert store.append(symbol, frame.iloc[-4:])
+    advanced = states.sync("test", SYMBOLS)
+    assert verify(advanced, Panel.from_frames(frames)) == {}
+
+    # A split re-adjusts the stored history: the saved state no longer lines up and is rebuilt
+    adjusted = frames["A.NS"].copy()
+    adjusted[["Open", "High", "Low", "Close"]] /= 2
+    store.write_frame("A.NS", adjusted)
+    reloaded = RollingStates(store=store, directory=str(tmp_path / "state")).sync("test", SYMBOLS)
+    assert reloaded.rows == advanced.rows
+    assert verify(reloaded, Panel.from_frames({**frames, "A.NS": adjusted})) == {}
+    assert np.isclose(reloaded.values()["close"][0], adjusted["Close"].iloc[-1])
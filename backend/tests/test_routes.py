@@ -0,0 +1,33 @@
+import pytest
+
+fastapi = pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient
+
+import main
+
+# Run from backend/: python -m pytest -q
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No lifespan: nothing is prerendered or synced
+    def no_store(symbol):
+        raise AssertionError(f"store touched for {symbol!r}")
+
+    monkeypatch.setattr(main, "chart_prices", no_store)
+    monkeypatch.setattr(main, "indicator_payload", lambda symbol, *args: no_store(symbol))
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("route", ["chart", "candlestick-chart", "indicators"])
+@pytest.mark.parametrize("symbol", ["..TCS", "TCS..NS", "A B", "~root", "%00"])
+def test_rejects_non_ticker_symbols(client, route, symbol):
+    response = client.get(f"/stock-screener/{route}/{symbol}")
+    assert response.status_code == 400
+
+
+def test_chart_resolves_bare_nse_symbols(client, monkeypatch):
+    seen = []
+    monkeypatch.setattr(main, "chart_response", lambda symbol, request: seen.append(symbol))
+    assert client.get("/stock-screener/chart/infy").status_code == 404
+    assert seen == ["INFY.NS"]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import synthetic_prices
+from StockScreener import scan
+from StockScreener.fetch import PriceSource
+from StockScreener.scan import ScanCoordinator
+
+# Run from backend/: python -m pytest -q
+
+SYMBOLS = [f"SYN{i:03d}.NS" for i in range(6)]
+
+
+class FakeSource(PriceSource):
+    # Synthetic frames; `gate` holds every download until set, `fail` raises instead
+
+    def __init__(self, fail=False):
+        self.prices = synthetic_prices(SYMBOLS, bars=200, seed=5)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.fail = fail
+        self.calls = 0
+
+    def frames(self, symbols, period="6mo", interval="1d", start=None):
+        self.calls += 1
+        self.gate.wait(5)
+        if self.fail:
+            raise ConnectionError("source down")
+        return {symbol: self.prices[symbol] for symbol in symbols}
+
+
+async def collect(coordinator, key, source):
+    return [line async for line in coordinator.subscribe(key, SYMBOLS, source=source, chunk_size=3)]
+
+
+def test_concurrent_subscribers_share_one_scan():
+    source = FakeSource()
+    coordinator = ScanCoordinator()
+
+    async def main():
+        source.gate.clear()
+        first = asyncio.ensure_future(collect(coordinator, "nifty", source))
+        second = asyncio.ensure_future(collect(coordinator, "nifty", source))
+        await asyncio.sleep(0.05)
+        source.gate.set()
+        return await first, await second, await collect(coordinator, "nifty", source)
+
+    first, second, cached = asyncio.run(main())
+    assert first == second == cached
+    assert "stocks" in json.loads(first[-1])
+    assert source.calls == 2
+    assert (coordinator.misses, coordinator.coalesced, coordinator.hits) == (1, 1, 1)
+
+
+def test_partial_scan_expires_after_partial_ttl():
+    coordinator = ScanCoordinator()
+    lines = asyncio.run(collect(coordinator, "nifty", FakeSource(fail=True)))
+    assert json.loads(lines[-2])["failed_chunks"] == 2
+    cached = coordinator._results.get("nifty")
+    assert cached["partial"]
+    assert cached["expires_at"] <= cached["finished_at"] + pd.Timedelta(seconds=scan.SCAN_PARTIAL_TTL)
+    assert coordinator.partial == 1
+
+
+def test_finished_scans_are_bounded(monkeypatch):
+    monkeypatch.setattr(scan, "SCAN_CACHE_MAX_ENTRIES", 2)
+    coordinator = ScanCoordinator()
+    source = FakeSource()
+
+    async def main():
+        for key in ("a", "b", "c"):
+            await collect(coordinator, key, source)
+
+    asyncio.run(main())
+    stats = coordinator.stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+    assert sorted(stats["cached"]) == ["b", "c"]
+
+
+def test_cancelled_scan_is_not_cached():
+    source = FakeSource()
+    coordinator = ScanCoordinator()
+
+    async def main():
+        source.gate.clear()
+        follower = asyncio.ensure_future(collect(coordinator, "nifty", source))
+        await asyncio.sleep(0.05)
+        task = coordinator._tasks["nifty"]
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        source.gate.set()
+        return await follower
+
+    truncated = asyncio.run(main())
+    assert not any("stocks" in json.loads(line) for line in truncated)
+    assert "nifty" not in coordinator._results
+    assert coordinator.stats()["running"] == []
@@ -0,0 +1,92 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import synthetic_prices
+from StockScreener.fetch import OHLCV_COLUMNS
+from StockScreener.store import MARKET_TZ, PriceStore, completed_bars
+
+# Run from backend/: python -m pytest -q
+
+CLOSE = OHLCV_COLUMNS.index('Close')
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path))
+
+
+@pytest.fixture
+def prices():
+    return synthetic_prices(["TEST.NS"], bars=60, seed=3)["TEST.NS"]
+
+
+def test_append_extends_and_replaces_overlapping_bar(store, prices):
+    store.write_frame("TEST.NS", prices[:40])
+    update = prices[39:].copy()
+    # The stored last bar was fetched mid-session; the download carries its final version
+    update.iloc[0, CLOSE] *= 1.001
+    assert store.append("TEST.NS", update)
+
+    dates, values = store.read("TEST.NS")
+    assert len(dates) == len(values) == 60
+    assert pd.Timestamp(dates[-1]) == prices.index[-1]
+    assert values[39, CLOSE] == update.iloc[0, CLOSE]
+    np.testing.assert_array_equal(values[:39], prices[:39].to_numpy())
+
+
+def test_append_refuses_readjusted_history(store, prices):
+    store.write_frame("TEST.NS", prices[:40])
+    update = prices[39:].copy()
+    update['Close'] *= 0.5
+    assert not store.append("TEST.NS", update)
+    assert len(store.read("TEST.NS")[0]) == 40
+
+
+def test_completed_bars_drops_the_session_in_progress(prices):
+    last = prices.index[-1]
+    during = pd.Timestamp(last.date()).tz_localize(MARKET_TZ) + pd.Timedelta(hours=11)
+    after = during + pd.Timedelta(hours=6)
+    assert completed_bars(prices, now=during).index[-1] == prices.index[-2]
+    assert completed_bars(prices, now=after).index[-1] == last
+
+
+def test_write_keeps_one_generation(store, prices):
+    for end in (20, 30, 40):
+        store.write_frame("TEST.NS", prices[:end])
+    assert min(os.listdir(os.path.join(store.root, "TEST.NS"))) == "CURRENT"
+    assert len(os.listdir(os.path.join(store.root, "TEST.NS"))) == 3
+
+
+def test_reads_never_see_a_half_written_pair(store):
+    # Close encodes the bar's date, so a reader can tell dates and values apart
+    dates = pd.bdate_range(end="2024-12-31", periods=400, name='Date')
+    frame = pd.DataFrame(1.0, index=dates, columns=OHLCV_COLUMNS)
+    frame['Close'] = (dates - pd.Timestamp(0)).days
+    store.write_frame("TEST.NS", frame[:100])
+
+    done = threading.Event()
+    mismatches = []
+
+    def reader():
+        while not done.is_set():
+            stored_dates, values = store.read("TEST.NS")
+            if len(stored_dates) != len(values) or values[-1, CLOSE] != stored_dates[-1].astype('datetime64[D]').astype(np.int64):
+                mismatches.append(len(stored_dates))
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+    try:
+        for end in range(101, len(frame) + 1):
+            assert store.append("TEST.NS", frame[end - 2:end])
+    finally:
+        done.set()
+        for thread in readers:
+            thread.join()
+
+    assert not mismatches
+    assert len(store.read("TEST.NS")[0]) == len(frame)